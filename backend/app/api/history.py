@@ -0,0 +1,77 @@
+import asyncio
+from datetime import date
+
+from fastapi import APIRouter, UploadFile, File, Header, HTTPException, Query
+
+from app.core.history_store import EmptyRange, get_history_store
+from app.core.ingest import discard_spool, is_supported_upload, read_upload, spool_upload
+from app.core.result_stream import json_response, ndjson_response
+from app.core.worker_pool import AnalysisMemoryExceeded, UploadRejected, analyze_history
+from app.utils.metrics import record_summary
+
+router = APIRouter(prefix="/history", tags=["history"])
+
+
+@router.post("/append")
+async def append(file: UploadFile = File(...)):
+    """Add an upload to the historical store, partitioned by day."""
+
+    if not is_supported_upload(file.filename):
+        raise HTTPException(status_code=400, detail="Please upload a CSV, Parquet or Arrow file.")
+
+    path = await spool_upload(file)
+
+    try:
+        df = await asyncio.to_thread(read_upload, path)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid or unreadable upload.")
+    finally:
+        discard_spool(path)
+
+    return await asyncio.to_thread(get_history_store().append, df)
+
+
+@router.get("")
+def summary():
+    store = get_history_store()
+    store.refresh()
+    return store.summary()
+
+
+@router.post("/analyze")
+async def analyze(
+    start: date = None,
+    end: date = None,
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    accept_encoding: str = Header(None)
+):
+    """Run the detectors over the stored days [start, end], inclusive.
+
+    Rings spanning several uploads are found as if their transactions
+    had arrived in one file.
+    """
+
+    store = get_history_store()
+    store.refresh()
+
+    rows = store.count_rows(start, end)
+    if not rows:
+        raise HTTPException(status_code=404, detail="No stored transactions in that date range.")
+
+    try:
+        results = await analyze_history(start, end, rows)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers())
+    except EmptyRange as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except AnalysisMemoryExceeded as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    record_summary(results["summary"])
+
+    if response_format == "ndjson":
+        return ndjson_response(results, accept_encoding)
+
+    return json_response(results)
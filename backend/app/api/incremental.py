@@ -0,0 +1,64 @@
+import asyncio
+
+from fastapi import APIRouter, UploadFile, File, HTTPException
+
+from app.core.incremental import append_batch, get_state, reset_feed
+from app.core.ingest import discard_spool, is_supported_upload, read_upload, spool_upload
+
+router = APIRouter(prefix="/feeds", tags=["incremental"])
+
+
+def _state_or_400(feed):
+    try:
+        return get_state(feed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/{feed}/append")
+async def append(feed: str, file: UploadFile = File(...)):
+    """Append a batch to a feed and return the rings it created or changed."""
+
+    _state_or_400(feed)
+
+    if not is_supported_upload(file.filename):
+        raise HTTPException(status_code=400, detail="Please upload a CSV, Parquet or Arrow file.")
+
+    path = await spool_upload(file)
+
+    try:
+        df = await asyncio.to_thread(read_upload, path)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid or unreadable upload.")
+    finally:
+        discard_spool(path)
+
+    return await asyncio.to_thread(append_batch, feed, df)
+
+
+@router.get("/{feed}")
+def feed_summary(feed: str):
+    return _state_or_400(feed).summary()
+
+
+@router.get("/{feed}/rings")
+def feed_rings(feed: str):
+    return _state_or_400(feed).ring_views()
+
+
+@router.get("/{feed}/accounts/{account_id}")
+def feed_account(feed: str, account_id: str):
+
+    activity = _state_or_400(feed).account_activity(account_id)
+
+    if activity is None:
+        raise HTTPException(status_code=404, detail="Account not seen in this feed.")
+
+    return activity
+
+
+@router.delete("/{feed}")
+def delete_feed(feed: str):
+    _state_or_400(feed)
+    reset_feed(feed)
+    return {"deleted": feed}
@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, UploadFile, File, Header, HTTPException, Query
+
+from app.core.database import SessionLocal
+from app.core.ingest import discard_spool, is_supported_upload, spool_upload
+from app.core.jobs import (
+    admit_job,
+    finish_from_cache,
+    jobs_dir,
+    load_result,
+    new_job_id,
+    release_job,
+    submit_job
+)
+from app.core.result_cache import cache_key, get_cache, upload_digest
+from app.core.result_stream import json_response, ndjson_response
+from app.core.worker_pool import UploadRejected
+from app.repositories.job_repo import create_job, get_job
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+def _job_or_404(job_id):
+
+    db = SessionLocal()
+    try:
+        job = get_job(db, job_id)
+    finally:
+        db.close()
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+
+    return job
+
+
+@router.post("", status_code=202)
+async def submit(file: UploadFile = File(...), refresh: bool = False):
+    """Queue an analysis and return its job id straight away."""
+
+    if not is_supported_upload(file.filename):
+        raise HTTPException(status_code=400, detail="Please upload a CSV, Parquet or Arrow file.")
+
+    digest = upload_digest()
+    path = await spool_upload(file, directory=jobs_dir(), digest=digest)
+
+    cache = get_cache()
+    key = await asyncio.to_thread(cache_key, digest) if cache is not None else None
+
+    cached = None
+    if key is not None and not refresh:
+        cached = await asyncio.to_thread(cache.get, key)
+
+    rows = 0
+    if cached is None:
+        try:
+            rows = await admit_job(path)
+        except UploadRejected as e:
+            discard_spool(path)
+            raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers())
+
+    job_id = new_job_id()
+
+    db = SessionLocal()
+    try:
+        create_job(db, job_id, file.filename, path)
+    except Exception:
+        if cached is None:
+            release_job(rows)
+        raise
+    finally:
+        db.close()
+
+    if cached is not None:
+        discard_spool(path)
+        await asyncio.to_thread(finish_from_cache, job_id, cached)
+        return {"job_id": job_id, "status": "succeeded"}
+
+    submit_job(job_id, key, rows)
+
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.get("/{job_id}")
+def status(job_id: str):
+
+    job = _job_or_404(job_id)
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "filename": job.filename,
+        "progress": json.loads(job.progress) if job.progress else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
+
+
+@router.get("/{job_id}/result")
+def result(
+    job_id: str,
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    accept_encoding: str = Header(None)
+):
+    """The stored response; `format=ndjson` streams it like /analyze does."""
+
+    job = _job_or_404(job_id)
+
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}.")
+
+    results = load_result(job)
+
+    if response_format == "ndjson":
+        return ndjson_response(results, accept_encoding)
+
+    return json_response(results)
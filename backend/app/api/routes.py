@@ -1,6 +1,10 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-import pandas as pd
-import io
+from app.core.ingest import (
+    discard_spool,
+    is_supported_upload,
+    read_upload,
+    spool_upload
+)
 from app.core.orchestrator import run_analysis
 
 router = APIRouter()
@@ -8,21 +12,16 @@ router = APIRouter()
 
 @router.post("/analyze")
 async def analyze(file: UploadFile = File(...)):
-    if not file.filename.endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Only CSV files allowed")
+    if not is_supported_upload(file.filename):
+        raise HTTPException(status_code=400, detail="Only CSV, Parquet or Arrow files allowed")
 
-    contents = await file.read()
-    df = pd.read_csv(io.BytesIO(contents))
+    path = await spool_upload(file)
 
-    required = [
-        "transaction_id",
-        "sender_id",
-        "receiver_id",
-        "amount",
-        "timestamp"
-    ]
-
-    if not all(col in df.columns for col in required):
+    try:
+        df = read_upload(path)
+    except ValueError:
         raise HTTPException(status_code=400, detail="Invalid CSV structure")
+    finally:
+        discard_spool(path)
 
-    return run_analysis(df)
+    return run_analysis(df, filename=file.filename)
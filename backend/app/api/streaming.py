@@ -0,0 +1,145 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.core.incremental import FEED_NAME
+from app.core.streaming import StreamInUse, TooManyStreams, get_monitor, remove_monitor
+
+router = APIRouter(prefix="/stream", tags=["streaming"])
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse that doesn't watch for disconnects while sending.
+
+    The stock one reads the request channel concurrently to spot client
+    disconnects, which swallows the request body this endpoint is still
+    consuming. Here the body iterator is the only reader.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers
+        })
+
+        async for chunk in self.body_iterator:
+            if isinstance(chunk, str):
+                chunk = chunk.encode(self.charset)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _monitor_or_400(name, create=True):
+
+    if not FEED_NAME.match(name):
+        raise HTTPException(status_code=400, detail="Stream names may only use letters, digits, '_' and '-'.")
+
+    try:
+        monitor = get_monitor(name, create)
+    except TooManyStreams as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    if monitor is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+
+    return monitor
+
+
+def _ingest_lines(monitor, lines, line_no):
+    """Alerts for a batch of NDJSON lines; `line_no` is the first one's
+    number. Runs off the event loop, so a busy monitor lock can't stall it."""
+
+    alerts = []
+
+    for offset, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            alerts += monitor.ingest(json.loads(line))
+        except (ValueError, KeyError, TypeError) as e:
+            alerts.append({"error": f"Bad event: {e}", "line": line_no + offset if line_no else None})
+
+    return alerts
+
+
+@router.post("/{name}/events")
+async def stream_events(name: str, request: Request):
+    """NDJSON in, NDJSON out: one transaction per line; alerts are written
+    back as soon as they trip, then a final stats line."""
+
+    monitor = _monitor_or_400(name)
+
+    async def alerts():
+        buffer = b""
+        line_no = 1
+
+        with monitor.connected():
+            # Each network chunk's lines go to the monitor as one batch
+            async for chunk in request.stream():
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+
+                if lines:
+                    for alert in await asyncio.to_thread(_ingest_lines, monitor, lines, line_no):
+                        yield json.dumps(alert) + "\n"
+                    line_no += len(lines)
+
+            if buffer.strip():
+                for alert in await asyncio.to_thread(_ingest_lines, monitor, [buffer], line_no):
+                    yield json.dumps(alert) + "\n"
+
+        yield json.dumps({"stats": monitor.info()}) + "\n"
+
+    return DuplexStreamingResponse(alerts(), media_type="application/x-ndjson")
+
+
+@router.websocket("/{name}/ws")
+async def stream_socket(websocket: WebSocket, name: str):
+    """One JSON transaction per message; alerts are sent back as messages."""
+
+    if not FEED_NAME.match(name):
+        await websocket.close(code=1008)
+        return
+
+    try:
+        monitor = get_monitor(name)
+    except TooManyStreams:
+        await websocket.close(code=1013)
+        return
+
+    await websocket.accept()
+
+    with monitor.connected():
+        try:
+            while True:
+                message = await websocket.receive_text()
+                for alert in await asyncio.to_thread(_ingest_lines, monitor, [message], None):
+                    await websocket.send_text(json.dumps(alert))
+        except WebSocketDisconnect:
+            pass
+
+
+@router.get("/{name}/stats")
+def stream_stats(name: str):
+    return _monitor_or_400(name, create=False).info()
+
+
+@router.delete("/{name}")
+def delete_stream(name: str):
+    """Close a stream and free its window; returns its final stats."""
+
+    _monitor_or_400(name, create=False)
+
+    try:
+        stats = remove_monitor(name)
+    except StreamInUse as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+
+    return stats
@@ -0,0 +1,234 @@
+import json
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.config import (
+    MAX_PAGE_SIZE,
+    SUBGRAPH_MAX_EDGES,
+    SUBGRAPH_MAX_HOPS,
+    SUBGRAPH_MAX_NODES
+)
+from app.core.database import SessionLocal
+from app.core.graph_index import get_graph_index
+from app.db.model import FraudRing, SuspiciousAccount, Transaction
+from app.repositories.upload_repo import (
+    count_rows,
+    get_accounts_by_score,
+    get_ring,
+    get_ring_members,
+    get_rings,
+    get_upload,
+    list_uploads
+)
+from app.utils.pagination import decode_cursor, page
+
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+
+def _upload_or_404(db, upload_id):
+
+    upload = get_upload(db, upload_id)
+
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Unknown upload.")
+
+    return upload
+
+
+def _upload_view(upload):
+    return {
+        "upload_id": upload.id,
+        "filename": upload.filename,
+        "uploaded_at": upload.uploaded_at,
+        "status": upload.status
+    }
+
+
+def _ring_view(ring):
+    return {
+        "ring_id": ring.ring_id,
+        "pattern_type": ring.pattern_type,
+        "risk_score": ring.risk_score
+    }
+
+
+def _cursor_or_400(cursor):
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _account_view(account):
+    return {
+        "account_id": account.account_id,
+        "suspicion_score": account.suspicion_score,
+        "detected_patterns": json.loads(account.detected_patterns),
+        "ring_id": account.ring_id
+    }
+
+
+@router.get("")
+def uploads(
+    status: str = None,
+    cursor: str = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE)
+):
+    """Newest first; status is pending, completed, failed or interrupted."""
+
+    after = _cursor_or_400(cursor)
+
+    db = SessionLocal()
+    try:
+        rows = list_uploads(db, limit, after, status)
+    finally:
+        db.close()
+
+    return page(rows, limit, _upload_view, lambda u: u.id)
+
+
+@router.get("/{upload_id}")
+def upload(upload_id: int):
+
+    db = SessionLocal()
+    try:
+        view = _upload_view(_upload_or_404(db, upload_id))
+        view.update({
+            "transactions": count_rows(db, Transaction, upload_id),
+            "fraud_rings": count_rows(db, FraudRing, upload_id),
+            "suspicious_accounts": count_rows(db, SuspiciousAccount, upload_id)
+        })
+    finally:
+        db.close()
+
+    return view
+
+
+@router.get("/{upload_id}/rings")
+def rings(
+    upload_id: int,
+    pattern_type: str = None,
+    cursor: str = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE)
+):
+
+    after = _cursor_or_400(cursor)
+
+    db = SessionLocal()
+    try:
+        _upload_or_404(db, upload_id)
+        rows = get_rings(db, upload_id, limit, after, pattern_type)
+    finally:
+        db.close()
+
+    return page(rows, limit, _ring_view, lambda r: r.id)
+
+
+@router.get("/{upload_id}/rings/{ring_id}/members")
+def ring_members(
+    upload_id: int,
+    ring_id: str,
+    cursor: str = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE)
+):
+
+    after = _cursor_or_400(cursor)
+
+    db = SessionLocal()
+    try:
+        ring = get_ring(db, upload_id, ring_id)
+        if ring is None:
+            raise HTTPException(status_code=404, detail="Unknown ring.")
+
+        members = get_ring_members(db, ring.id, limit, after)
+    finally:
+        db.close()
+
+    body = page(members, limit, lambda m: m.account_id, lambda m: m.id)
+    body.update(_ring_view(ring))
+
+    return body
+
+
+@router.get("/{upload_id}/accounts")
+def accounts(
+    upload_id: int,
+    min_score: float = None,
+    max_score: float = None,
+    cursor: str = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE)
+):
+    """Flagged accounts of one upload, highest score first."""
+
+    after = _cursor_or_400(cursor)
+    if after is not None and not (isinstance(after, list) and len(after) == 2):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    db = SessionLocal()
+    try:
+        _upload_or_404(db, upload_id)
+        rows = get_accounts_by_score(db, upload_id, limit, after, min_score, max_score)
+    finally:
+        db.close()
+
+    return page(rows, limit, _account_view, lambda a: [a.suspicion_score, a.id])
+
+
+def _epoch(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+@router.get("/{upload_id}/subgraph")
+def subgraph(
+    upload_id: int,
+    ring_id: str = None,
+    account_id: str = None,
+    hops: int = Query(1, ge=0, le=SUBGRAPH_MAX_HOPS),
+    max_nodes: int = Query(200, ge=1, le=SUBGRAPH_MAX_NODES),
+    max_edges: int = Query(1000, ge=1, le=SUBGRAPH_MAX_EDGES),
+    max_fanout: int = Query(25, ge=1),
+    start: datetime = None,
+    end: datetime = None
+):
+    """Bounded neighbourhood of a ring or an account, for graph views.
+
+    Starts from the ring's members (or the one account) and expands
+    `hops` steps either way along transactions inside [start, end].
+    """
+
+    if (ring_id is None) == (account_id is None):
+        raise HTTPException(status_code=400, detail="Pass exactly one of ring_id or account_id.")
+
+    db = SessionLocal()
+    try:
+        upload = _upload_or_404(db, upload_id)
+    finally:
+        db.close()
+
+    index = get_graph_index(upload_id)
+
+    if index is None:
+        if upload.status == "pending":
+            raise HTTPException(status_code=409, detail="Upload is still being written.")
+        raise HTTPException(status_code=404, detail="No graph index for this upload.")
+
+    if ring_id is not None:
+        seeds = index.ring_codes(ring_id)
+        if seeds is None:
+            raise HTTPException(status_code=404, detail="Unknown ring.")
+    else:
+        code = index.code(account_id)
+        if code is None:
+            raise HTTPException(status_code=404, detail="Account not in this upload.")
+        seeds = [code]
+
+    graph = index.subgraph(
+        seeds, hops, max_nodes, max_edges, max_fanout, _epoch(start), _epoch(end)
+    )
+
+    return {"upload_id": upload_id, "ring_id": ring_id, "account_id": account_id, **graph}
@@ -0,0 +1,211 @@
+import os
+
+
+# -----------------------------
+# Parallel Detection
+# -----------------------------
+ANALYSIS_WORKERS = int(os.getenv("RIFT_ANALYSIS_WORKERS", os.cpu_count() or 1))
+
+# Uploads smaller than this run in-process; sharding overhead isn't worth it
+PARALLEL_MIN_ROWS = int(os.getenv("RIFT_PARALLEL_MIN_ROWS", "200000"))
+
+# Shards per worker, so one slow shard doesn't leave the other cores idle
+SHARDS_PER_WORKER = int(os.getenv("RIFT_SHARDS_PER_WORKER", "2"))
+
+
+# -----------------------------
+# Scoring
+# -----------------------------
+# Cap on suspicious accounts returned per analysis (0 = no cap)
+MAX_SUSPICIOUS_ACCOUNTS = int(os.getenv("RIFT_MAX_SUSPICIOUS_ACCOUNTS", "0"))
+
+
+# -----------------------------
+# Anomaly Model
+# -----------------------------
+MODEL_PATH = os.getenv(
+    "RIFT_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "anomaly_model.joblib")
+)
+
+# "auto": use the persisted model when one is loaded, else refit per upload
+# "pretrained": always use the persisted model; "refit": always refit
+MODEL_MODE = os.getenv("RIFT_MODEL_MODE", "auto")
+
+MODEL_N_JOBS = int(os.getenv("RIFT_MODEL_N_JOBS", "-1"))
+SCORE_BATCH_SIZE = int(os.getenv("RIFT_SCORE_BATCH_SIZE", "65536"))
+
+
+# -----------------------------
+# Stage Scheduler
+# -----------------------------
+# Threads for independent run_analysis stages (graph, detectors, ML)
+STAGE_WORKERS = int(os.getenv("RIFT_STAGE_WORKERS", "4"))
+
+
+# -----------------------------
+# Result Cache
+# -----------------------------
+# Repeat uploads of the same bytes return the stored response
+RESULT_CACHE_ENABLED = os.getenv("RIFT_RESULT_CACHE", "1") == "1"
+
+RESULT_CACHE_DIR = os.getenv(
+    "RIFT_RESULT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "results")
+)
+
+RESULT_CACHE_MEMORY_ENTRIES = int(os.getenv("RIFT_RESULT_CACHE_MEMORY_ENTRIES", "32"))
+RESULT_CACHE_DISK_BYTES = int(os.getenv("RIFT_RESULT_CACHE_DISK_BYTES", str(1024 ** 3)))
+
+
+# -----------------------------
+# Background Jobs
+# -----------------------------
+# Analyses running at once for POST /jobs; the rest wait in the queue
+JOB_WORKERS = int(os.getenv("RIFT_JOB_WORKERS", "2"))
+
+# Address-space cap per job analysis; jobs take the uploads too large for
+# /analyze, so they get a bigger budget on their own pool (0 = none)
+JOB_MEMORY_LIMIT_MB = int(os.getenv("RIFT_JOB_MEMORY_LIMIT_MB", "32768"))
+
+# Jobs allowed to wait behind the running ones; past that POST /jobs is a 429
+JOB_MAX_QUEUE = int(os.getenv("RIFT_JOB_MAX_QUEUE", "32"))
+
+# Spooled uploads and finished results for jobs, kept across restarts
+JOBS_DIR = os.getenv(
+    "RIFT_JOBS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "jobs")
+)
+
+
+# -----------------------------
+# Analysis Worker Pool
+# -----------------------------
+# Pre-warmed processes that run /analyze uploads, one upload each at a time
+POOL_WORKERS = int(os.getenv("RIFT_POOL_WORKERS", "2"))
+
+# Uploads waiting for a worker before new ones are turned away (429)
+ADMISSION_MAX_QUEUE = int(os.getenv("RIFT_ADMISSION_MAX_QUEUE", "16"))
+
+# Estimated rows admitted (queued + running) before new ones wait it out (429)
+ADMISSION_MAX_ROWS = int(os.getenv("RIFT_ADMISSION_MAX_ROWS", "20000000"))
+
+# Larger single uploads are refused outright (413); use POST /jobs offline
+ADMISSION_MAX_REQUEST_ROWS = int(os.getenv("RIFT_ADMISSION_MAX_REQUEST_ROWS", "10000000"))
+
+# Address-space cap per analysis on top of the warm worker's own (0 = none)
+WORKER_MEMORY_LIMIT_MB = int(os.getenv("RIFT_WORKER_MEMORY_LIMIT_MB", "8192"))
+
+
+# -----------------------------
+# Incremental Analysis
+# -----------------------------
+# Appended batches per feed, replayed to rebuild state after a restart
+INCREMENTAL_DIR = os.getenv(
+    "RIFT_INCREMENTAL_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "incremental")
+)
+
+# How far behind a feed's newest transaction an appended one may be; older
+# ones are skipped, so dedupe ids and smurfing windows can be pruned
+INCREMENTAL_LATENESS_HOURS = float(os.getenv("RIFT_INCREMENTAL_LATENESS_HOURS", "168"))
+
+
+# -----------------------------
+# Streaming Ingestion
+# -----------------------------
+# Live window for /stream, matching detect_smurfing's window_hours
+STREAM_WINDOW_HOURS = float(os.getenv("RIFT_STREAM_WINDOW_HOURS", "72"))
+
+# Events held per stream; beyond this the oldest are shed early
+STREAM_MAX_EVENTS = int(os.getenv("RIFT_STREAM_MAX_EVENTS", "1000000"))
+
+# Named streams a process will hold; each can grow to STREAM_MAX_EVENTS
+STREAM_MAX_MONITORS = int(os.getenv("RIFT_STREAM_MAX_MONITORS", "16"))
+
+# A stream with no events and no connections for this long is dropped
+STREAM_IDLE_SECONDS = float(os.getenv("RIFT_STREAM_IDLE_SECONDS", "3600"))
+
+
+# -----------------------------
+# Persistence
+# -----------------------------
+# Flagged accounts per INSERT ... ON CONFLICT statement (5 bound values each)
+DB_BATCH_SIZE = int(os.getenv("RIFT_DB_BATCH_SIZE", "2000"))
+
+# Also store every uploaded transaction, not just rings and flagged accounts
+PERSIST_TRANSACTIONS = os.getenv("RIFT_PERSIST_TRANSACTIONS", "1") == "1"
+
+# Page size cap for the /uploads read endpoints
+MAX_PAGE_SIZE = int(os.getenv("RIFT_MAX_PAGE_SIZE", "1000"))
+
+# Finished analyses are written by a background writer, not before the
+# response goes out (0 = write synchronously)
+WRITE_BEHIND = os.getenv("RIFT_WRITE_BEHIND", "1") == "1"
+
+# Analyses waiting for the writer before run_analysis blocks on the queue
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("RIFT_WRITE_BEHIND_MAX_PENDING", "8"))
+
+# Connections kept per process, plus overflow under bursts
+DB_POOL_SIZE = int(os.getenv("RIFT_DB_POOL_SIZE", "8"))
+DB_MAX_OVERFLOW = int(os.getenv("RIFT_DB_MAX_OVERFLOW", "16"))
+
+# SQLite page cache per connection, in MiB
+SQLITE_CACHE_MB = int(os.getenv("RIFT_SQLITE_CACHE_MB", "64"))
+
+
+# -----------------------------
+# Responses
+# -----------------------------
+# NDJSON lines serialized and flushed together when streaming results
+RESULT_STREAM_BATCH = int(os.getenv("RIFT_RESULT_STREAM_BATCH", "2000"))
+
+# zlib level for gzip-encoded result streams (1 fastest .. 9 smallest)
+RESULT_GZIP_LEVEL = int(os.getenv("RIFT_RESULT_GZIP_LEVEL", "5"))
+
+
+# -----------------------------
+# Graph Index
+# -----------------------------
+# Per-upload adjacency kept after analysis for the subgraph endpoint
+GRAPH_INDEX_ENABLED = os.getenv("RIFT_GRAPH_INDEX", "1") == "1"
+
+GRAPH_INDEX_DIR = os.getenv(
+    "RIFT_GRAPH_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "graph_index")
+)
+
+# Loaded indexes kept in memory, most recently used first
+GRAPH_INDEX_CACHE_ENTRIES = int(os.getenv("RIFT_GRAPH_INDEX_CACHE_ENTRIES", "4"))
+
+# Indexes kept on disk; the oldest are deleted past this (0 = keep all)
+GRAPH_INDEX_MAX_UPLOADS = int(os.getenv("RIFT_GRAPH_INDEX_MAX_UPLOADS", "200"))
+
+# Upper bounds on what one subgraph request may ask for
+SUBGRAPH_MAX_HOPS = int(os.getenv("RIFT_SUBGRAPH_MAX_HOPS", "3"))
+SUBGRAPH_MAX_NODES = int(os.getenv("RIFT_SUBGRAPH_MAX_NODES", "1000"))
+SUBGRAPH_MAX_EDGES = int(os.getenv("RIFT_SUBGRAPH_MAX_EDGES", "5000"))
+
+# Transactions read per node and direction; hubs past it use their latest
+SUBGRAPH_MAX_SCAN = int(os.getenv("RIFT_SUBGRAPH_MAX_SCAN", "50000"))
+
+
+# -----------------------------
+# Known Fraudsters
+# -----------------------------
+# Keep FraudAccount history in memory and boost repeat offenders
+KNOWN_FRAUD_ENABLED = os.getenv("RIFT_KNOWN_FRAUD", "1") == "1"
+
+# Re-read rows flagged this long before the newest one seen, so writes
+# committed out of timestamp order by other processes aren't missed
+KNOWN_FRAUD_REFRESH_OVERLAP_SECONDS = int(os.getenv("RIFT_KNOWN_FRAUD_REFRESH_OVERLAP", "300"))
+
+
+# -----------------------------
+# Historical Store
+# -----------------------------
+# Date-partitioned, memory-mapped transaction segments for /history
+HISTORY_DIR = os.getenv(
+    "RIFT_HISTORY_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "history")
+)
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+
+def build_account_activity(graph):
+    """Per-account activity index, built once per analysis.
+
+    Works off the graph's aggregated edges rather than raw rows: every
+    edge contributes once as the sender side and once as the receiver
+    side, and a single groupby reduces both. Indexed by account code.
+    """
+
+    n_edges = graph.number_of_edges()
+    zeros = np.zeros(n_edges)
+    zero_counts = np.zeros(n_edges, dtype=np.int64)
+
+    sides = pd.DataFrame({
+        "account": np.concatenate([graph.edge_src, graph.edge_dst]),
+        "counterparty": np.concatenate([graph.edge_dst, graph.edge_src]),
+        "sent": np.concatenate([graph.amount_sum, zeros]),
+        "received": np.concatenate([zeros, graph.amount_sum]),
+        "sent_count": np.concatenate([graph.tx_count, zero_counts]),
+        "received_count": np.concatenate([zero_counts, graph.tx_count]),
+        "first_ts": np.concatenate([graph.first_ts, graph.first_ts]),
+        "last_ts": np.concatenate([graph.last_ts, graph.last_ts])
+    })
+
+    activity = sides.groupby("account", sort=True).agg(
+        sent=("sent", "sum"),
+        received=("received", "sum"),
+        sent_count=("sent_count", "sum"),
+        received_count=("received_count", "sum"),
+        first_ts=("first_ts", "min"),
+        last_ts=("last_ts", "max"),
+        counterparties=("counterparty", "nunique")
+    )
+
+    activity = activity.reindex(np.arange(graph.number_of_nodes()))
+
+    activity["tx_count"] = activity["sent_count"] + activity["received_count"]
+    activity["in_degree"] = graph.in_degree
+    activity["out_degree"] = graph.out_degree
+
+    activity.index.name = "account"
+
+    return activity
@@ -1,20 +1,276 @@
-import networkx as nx
+import time
 
-def detect_cycles(graph, min_len=3, max_len=5):
+import numpy as np
+from scipy.sparse.csgraph import connected_components
+
+
+MAX_CYCLES_PER_SCC = 10_000
+SCC_TIME_BUDGET_SECONDS = 5.0
+
+
+def strongly_connected_components(graph):
+    """Return (labels, members) where members[k] lists the nodes of SCC k."""
+
+    _, labels = connected_components(
+        graph.to_scipy(), directed=True, connection="strong"
+    )
+
+    order = np.argsort(labels, kind="stable")
+    bounds = np.flatnonzero(np.diff(labels[order])) + 1
+
+    return labels, np.split(order, bounds)
+
+
+# -----------------------------
+# Bounded Cycle Enumeration
+# -----------------------------
+def enumerate_cycles(
+    graph,
+    min_len=3,
+    max_len=5,
+    max_cycles_per_scc=MAX_CYCLES_PER_SCC,
+    time_budget_seconds=SCC_TIME_BUDGET_SECONDS
+):
+    """Enumerate simple cycles of min_len..max_len edges, SCC by SCC.
+
+    Each cycle is rooted at its lowest node code and only extended through
+    higher codes, so every cycle is produced exactly once, already rotated
+    into canonical form. A reverse BFS from the root, limited to half the
+    maximum length, prunes every branch in the second half of the search
+    that cannot close within max_len.
+
+    Returns (cycles, truncated_sccs); an SCC is truncated when it hits the
+    cycle cap or its time budget.
+    """
+
+    labels, components = strongly_connected_components(graph)
+
+    # Plain lists make the per-step neighbour slicing cheap in the DFS
+    indptr = graph.indptr.tolist()
+    indices = graph.indices.tolist()
+    in_indptr = graph.in_indptr.tolist()
+    in_indices = graph.in_indices.tolist()
+    labels = labels.tolist()
+
+    cycles = []
+    truncated_sccs = 0
+
+    for component in components:
+
+        if len(component) < min_len:
+            continue
+
+        found, complete = _cycles_in_scc(
+            sorted(component.tolist()),
+            labels,
+            indptr, indices,
+            in_indptr, in_indices,
+            min_len, max_len,
+            max_cycles_per_scc,
+            time.perf_counter() + time_budget_seconds
+        )
+
+        cycles.extend(found)
+
+        if not complete:
+            truncated_sccs += 1
+
+    return cycles, truncated_sccs
+
+
+def _cycles_in_scc(nodes, labels, indptr, indices, in_indptr, in_indices,
+                   min_len, max_len, max_cycles, deadline):
+
+    found = []
+    label = labels[nodes[0]]
+    back_limit = max_len // 2
+    steps = 0
+
+    for root in nodes:
+
+        if time.perf_counter() > deadline:
+            return found, False
+
+        dist = _distances_to_root(
+            root, label, labels, in_indptr, in_indices, back_limit
+        )
+
+        if len(dist) < 2:
+            continue
+
+        path = [root]
+        on_path = {root}
+        stack = [iter(indices[indptr[root]:indptr[root + 1]])]
+
+        while stack:
+
+            steps += 1
+            if steps & 1023 == 0 and time.perf_counter() > deadline:
+                return found, False
+
+            nxt = next(stack[-1], None)
+
+            if nxt is None:
+                stack.pop()
+                on_path.discard(path.pop())
+                continue
+
+            if nxt == root:
+                if len(path) >= min_len:
+                    found.append(list(path))
+                    if len(found) >= max_cycles:
+                        return found, False
+                continue
+
+            if nxt in on_path:
+                continue
+
+            hops = dist.get(nxt)
+
+            if hops is None:
+                # Too deep to close without passing within back_limit of root
+                if max_len - len(path) <= back_limit:
+                    continue
+                if nxt < root or labels[nxt] != label:
+                    continue
+            elif len(path) + hops > max_len:
+                continue
+
+            path.append(nxt)
+            on_path.add(nxt)
+            stack.append(iter(indices[indptr[nxt]:indptr[nxt + 1]]))
+
+    return found, True
+
+
+def _distances_to_root(root, label, labels, in_indptr, in_indices, limit):
+    """Hops from each higher-coded SCC node back to root, up to limit."""
+
+    dist = {root: 0}
+    frontier = [root]
+
+    for depth in range(1, limit + 1):
+
+        nxt_frontier = []
+
+        for node in frontier:
+            for pred in in_indices[in_indptr[node]:in_indptr[node + 1]]:
+                if pred > root and pred not in dist and labels[pred] == label:
+                    dist[pred] = depth
+                    nxt_frontier.append(pred)
+
+        if not nxt_frontier:
+            break
+
+        frontier = nxt_frontier
+
+    return dist
+
+
+# -----------------------------
+# Ring Detection
+# -----------------------------
+def detect_cycles(graph, min_len=3, max_len=5, max_cycles_per_scc=MAX_CYCLES_PER_SCC):
+    """Cycle rings, and how many SCCs hit the cycle cap or time budget.
+
+    A non-zero count means the ring list is incomplete, and may differ
+    between runs since the budget is wall-clock time.
+    """
 
     rings = []
     ring_index = 1
 
-    for component in nx.strongly_connected_components(graph):
-        size = len(component)
+    cycles, truncated_sccs = enumerate_cycles(
+        graph, min_len=min_len, max_len=max_len, max_cycles_per_scc=max_cycles_per_scc
+    )
+
+    for cycle in cycles:
+        rings.append({
+            "ring_id": f"RING_{ring_index:03d}",
+            "members": cycle,
+            "pattern_type": f"cycle_length_{len(cycle)}",
+            "risk_score": 95.0
+        })
+        ring_index += 1
+
+    return rings, truncated_sccs
+
+
+def cycles_through_edge(succ, pred, u, v, min_len=3, max_len=5, max_cycles=MAX_CYCLES_PER_SCC,
+                        time_budget_seconds=SCC_TIME_BUDGET_SECONDS):
+    """Simple cycles of min_len..max_len nodes that use the edge u -> v.
+
+    `succ`/`pred` map a node to its neighbour sets, so this works on a
+    graph that is still growing. Every cycle that a new edge creates goes
+    through it, which is what incremental analysis relies on. Cycles are
+    rotated to start at their lowest node, as enumerate_cycles emits them.
+
+    Returns (cycles, complete). Like one SCC in enumerate_cycles, the
+    search stops at max_cycles or after time_budget_seconds, and then
+    complete is False.
+    """
+
+    if u == v:
+        return [], True
+
+    deadline = time.perf_counter() + time_budget_seconds
+
+    # Nodes within two hops of closing back into u
+    back_limit = max_len // 2
+    near = {u: 0}
+    frontier = [u]
+    for depth in range(1, back_limit + 1):
+        nxt = []
+        for x in frontier:
+            for p in pred.get(x, ()):
+                if p not in near:
+                    near[p] = depth
+                    nxt.append(p)
+        frontier = nxt
+
+    found = []
+    path = [u, v]
+    on_path = {u, v}
+    search = {"steps": 0, "complete": True}
+
+    def extend(w):
+        if not search["complete"]:
+            return
+
+        search["steps"] += 1
+        if len(found) >= max_cycles or (
+            search["steps"] & 1023 == 0 and time.perf_counter() > deadline
+        ):
+            search["complete"] = False
+            return
+
+        if len(path) >= min_len and u in succ.get(w, ()):
+            found.append(list(path))
+
+        remaining = max_len - len(path)
+        if remaining <= 0:
+            return
+
+        for x in succ.get(w, ()):
+            if x in on_path:
+                continue
+            if remaining <= back_limit and near.get(x, back_limit + 1) > remaining:
+                continue
+
+            path.append(x)
+            on_path.add(x)
+            extend(x)
+            on_path.discard(x)
+            path.pop()
+
+    extend(v)
+
+    if len(found) >= max_cycles:
+        search["complete"] = False
 
-        if min_len <= size <= max_len:
-            rings.append({
-                "ring_id": f"RING_{ring_index:03d}",
-                "members": list(component),
-                "pattern_type": f"cycle_length_{size}",
-                "risk_score": 95.0
-            })
-            ring_index += 1
+    cycles = []
+    for cycle in found:
+        k = cycle.index(min(cycle))
+        cycles.append(cycle[k:] + cycle[:k])
 
-    return rings
+    return cycles, search["complete"]
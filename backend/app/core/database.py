@@ -1,13 +1,49 @@
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-# Hardcode SQLite for now (no .env needed)
-DATABASE_URL = "sqlite:///./riftdb.db"
+from app.config import DB_MAX_OVERFLOW, DB_POOL_SIZE, SQLITE_CACHE_MB
+
+# SQLite next to the process by default (no .env needed)
+DATABASE_URL = os.getenv("RIFT_DATABASE_URL", "sqlite:///./riftdb.db")
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Writers wait this long for SQLite's lock instead of failing at once
+SQLITE_BUSY_TIMEOUT_MS = 30_000
+
+if IS_SQLITE and ":memory:" not in DATABASE_URL and DATABASE_URL != "sqlite://":
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW
+    )
+elif IS_SQLITE:
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+else:
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True
+    )
+
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets readers run alongside the writer and other processes;
+        # NORMAL only fsyncs at checkpoints, which WAL keeps consistent
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -1,28 +1,13 @@
+import numpy as np
 import pandas as pd
 
 
-def build_node_features(graph, df):
+def build_node_features(activity):
 
-    sent_agg = df.groupby("sender_id")["amount"].sum().rename("sent")
-    received_agg = df.groupby("receiver_id")["amount"].sum().rename("received")
-
-    in_degrees = dict(graph.in_degree())
-    out_degrees = dict(graph.out_degree())
-
-    all_nodes = list(graph.nodes())
-
-    data = []
-
-    for node in all_nodes:
-        data.append([
-            node,
-            in_degrees.get(node, 0),
-            out_degrees.get(node, 0),
-            sent_agg.get(node, 0),
-            received_agg.get(node, 0)
-        ])
-
-    return pd.DataFrame(
-        data,
-        columns=["account_id", "in_degree", "out_degree", "sent", "received"]
-    )
+    return pd.DataFrame({
+        "account_id": activity.index.to_numpy(dtype=np.int32),
+        "in_degree": activity["in_degree"].to_numpy(),
+        "out_degree": activity["out_degree"].to_numpy(),
+        "sent": activity["sent"].to_numpy(),
+        "received": activity["received"].to_numpy()
+    })
@@ -0,0 +1,287 @@
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.config import KNOWN_FRAUD_ENABLED, KNOWN_FRAUD_REFRESH_OVERLAP_SECONDS
+from app.core.database import SessionLocal
+from app.models.db_models import FraudAccount, FraudAccountFlag
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+COLUMNS = ["times_flagged", "highest_score"]
+
+# Accounts flagged by the latest analyses, so a re-analysis can leave
+# out its own flags even before the writer has committed them
+RECENT_KEYS = 256
+
+
+def analysis_key(tx, accounts):
+    """Fingerprint of an analysed dataset that flags are counted against.
+
+    A sum of per-row hashes over (sender, receiver, amount, time), so the
+    same transactions give the same key whichever way they arrived: an
+    upload, its re-upload or refresh, a job, or a history replay.
+    """
+
+    account_hash = pd.util.hash_array(np.asarray(accounts, dtype=object))
+
+    rows = pd.DataFrame({
+        "src": account_hash[tx["src"].to_numpy()],
+        "dst": account_hash[tx["dst"].to_numpy()],
+        "amount": tx["amount"].to_numpy(dtype=np.float64),
+        "ts": tx["timestamp"].to_numpy().astype("datetime64[ns]").astype(np.int64)
+    })
+    row_hash = pd.util.hash_pandas_object(rows, index=False).to_numpy()
+
+    return f"{int(row_hash.sum(dtype=np.uint64)):016x}-{len(rows):x}"
+
+
+def _empty():
+    return pd.DataFrame(
+        {"times_flagged": np.zeros(0, dtype=np.int64), "highest_score": np.zeros(0)},
+        index=pd.Index([], dtype=object, name="account_id")
+    )
+
+
+class KnownFraudIndex:
+    """FraudAccount history held in memory, keyed by account id.
+
+    Loaded once, then topped up from rows whose last_flagged_at is at or
+    past the newest one seen (minus an overlap), so keeping in sync costs
+    one indexed query per analysis rather than one per account. Lookups
+    are a single hash join of an upload's account table against the index.
+    The analysis keys already counted are tracked too, so a re-analysis
+    doesn't bump its accounts again, nor see its own flags as history.
+    """
+
+    def __init__(self):
+        self.frame = _empty()
+        self.keys = set()
+        self.recent = OrderedDict()
+        self.watermark = None
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def _read(self, since=None):
+
+        db = SessionLocal()
+        try:
+            query = db.query(
+                FraudAccount.account_id,
+                FraudAccount.total_times_flagged,
+                FraudAccount.highest_score_seen,
+                FraudAccount.last_flagged_at
+            )
+            if since is not None:
+                query = query.filter(FraudAccount.last_flagged_at >= since)
+            rows = query.all()
+        finally:
+            db.close()
+
+        frame = pd.DataFrame(
+            rows, columns=["account_id", "times_flagged", "highest_score", "last_flagged_at"]
+        )
+
+        newest = frame["last_flagged_at"].max() if len(frame) else None
+
+        frame = frame.set_index("account_id")[COLUMNS]
+        frame["times_flagged"] = frame["times_flagged"].fillna(0).astype(np.int64)
+        frame["highest_score"] = frame["highest_score"].fillna(0.0).astype(np.float64)
+
+        return frame, newest
+
+    def _read_keys(self, since=None):
+
+        db = SessionLocal()
+        try:
+            query = db.query(FraudAccountFlag.upload_key).distinct()
+            if since is not None:
+                query = query.filter(FraudAccountFlag.flagged_at >= since)
+            return {key for (key,) in query}
+        finally:
+            db.close()
+
+    def _flagged_under(self, key):
+
+        with self._lock:
+            ids = self.recent.get(key)
+
+        if ids is not None:
+            return ids
+
+        db = SessionLocal()
+        try:
+            rows = db.query(FraudAccountFlag.account_id).filter(
+                FraudAccountFlag.upload_key == key
+            )
+            return pd.Index([account for (account,) in rows], dtype=object)
+        finally:
+            db.close()
+
+    def _merge(self, updates):
+        # Rows in `updates` replace existing ones; one vectorized pass
+        kept = self.frame[~self.frame.index.isin(updates.index)]
+        self.frame = pd.concat([kept, updates]) if len(kept) else updates
+
+    def load(self):
+
+        frame, newest = self._read()
+        keys = self._read_keys()
+
+        with self._lock:
+            self.frame = frame
+            self.keys = keys
+            self.watermark = newest
+            self.loaded = True
+
+        logger.info("Loaded %d known fraud accounts", len(frame))
+
+    def refresh(self):
+        """Pull rows other writers flagged since the last load or refresh."""
+
+        if not self.loaded:
+            self.load()
+            return
+
+        since = None
+        if self.watermark is not None:
+            since = self.watermark - timedelta(seconds=KNOWN_FRAUD_REFRESH_OVERLAP_SECONDS)
+
+        updates, newest = self._read(since)
+        keys = self._read_keys(since)
+
+        with self._lock:
+            self.keys |= keys
+            if len(updates):
+                self._merge(updates)
+            if newest is not None and (self.watermark is None or newest > self.watermark):
+                self.watermark = newest
+
+    def record(self, suspicious_accounts, key=None):
+        """Apply an analysis's flags right away, before its write lands.
+
+        The next refresh replaces these with the committed values. An
+        analysis whose key was already counted changes nothing.
+        """
+
+        if not suspicious_accounts:
+            return
+
+        ids = [a["account_id"] for a in suspicious_accounts]
+        scores = np.array([a["suspicion_score"] for a in suspicious_accounts], dtype=np.float64)
+
+        with self._lock:
+            if key is not None:
+                if key in self.keys:
+                    return
+                self.keys.add(key)
+                self.recent[key] = pd.Index(ids, dtype=object)
+                while len(self.recent) > RECENT_KEYS:
+                    self.recent.popitem(last=False)
+
+            pos = self.frame.index.get_indexer(ids)
+            known = pos >= 0
+
+            times = np.ones(len(ids), dtype=np.int64)
+            highest = scores.copy()
+            times[known] += self.frame["times_flagged"].to_numpy()[pos[known]]
+            highest[known] = np.maximum(
+                highest[known], self.frame["highest_score"].to_numpy()[pos[known]]
+            )
+
+            self._merge(pd.DataFrame(
+                {"times_flagged": times, "highest_score": highest},
+                index=pd.Index(ids, dtype=object, name="account_id")
+            ))
+
+    def lookup(self, accounts, key=None):
+        """History for every account code of an upload.
+
+        Returns (times_flagged, highest_score) arrays aligned with
+        `accounts`; zeros for accounts never flagged. Flags recorded under
+        `key`, the analysis's own dataset, don't count.
+        """
+
+        with self._lock:
+            frame = self.frame
+            counted = key is not None and key in self.keys
+
+        pos = frame.index.get_indexer(accounts)
+        known = pos >= 0
+
+        times = np.zeros(len(accounts), dtype=np.int64)
+        highest = np.zeros(len(accounts))
+        times[known] = frame["times_flagged"].to_numpy()[pos[known]]
+        highest[known] = frame["highest_score"].to_numpy()[pos[known]]
+
+        if counted:
+            own = known & pd.Index(accounts).isin(self._flagged_under(key))
+            times[own] -= 1
+            highest[own & (times == 0)] = 0.0
+
+        return times, highest
+
+    def epoch(self, key=None):
+        """How many datasets' flags are counted, besides `key`'s own."""
+
+        with self._lock:
+            return len(self.keys) - (key in self.keys)
+
+    def __len__(self):
+        return len(self.frame)
+
+
+_index = KnownFraudIndex()
+
+
+def get_fraud_index():
+    return _index
+
+
+def load_known_fraud():
+    if KNOWN_FRAUD_ENABLED:
+        _index.load()
+
+
+def known_offenders(accounts, key=None):
+    """Stage: refresh the index, then join the upload's accounts against it.
+
+    `key` is the analysis_key of the dataset being scored, whose own
+    earlier flags are left out.
+    """
+
+    if not KNOWN_FRAUD_ENABLED:
+        n = len(accounts)
+        return np.zeros(n, dtype=np.int64), np.zeros(n)
+
+    _index.refresh()
+
+    return _index.lookup(accounts, key)
+
+
+def flag_history(account_ids, key):
+    """Prior flags of `account_ids` and the epoch, as analysis `key` sees them.
+
+    Lets a stored response be checked against the current history without
+    the dataset's own flags, which a response never counts, getting in
+    the way.
+    """
+
+    if not KNOWN_FRAUD_ENABLED:
+        return None
+
+    _index.refresh()
+
+    times, _ = _index.lookup(pd.Index(account_ids, dtype=object), key)
+
+    return times, _index.epoch(key)
+
+
+def record_flags(suspicious_accounts, key=None):
+    if KNOWN_FRAUD_ENABLED:
+        _index.record(suspicious_accounts, key)
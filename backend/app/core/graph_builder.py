@@ -1,11 +1,127 @@
-import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
 
 
-def build_graph(df):
-    return nx.from_pandas_edgelist(
-        df,
-        source="sender_id",
-        target="receiver_id",
-        edge_attr=["amount", "timestamp"],
-        create_using=nx.DiGraph()
+class TransactionGraph:
+    """Directed account graph held as NumPy CSR (successors) and CSC
+    (predecessors) arrays over interned account codes.
+
+    Parallel transactions between the same pair of accounts are aggregated
+    into one edge carrying ``tx_count``, ``amount_sum``, ``first_ts`` and
+    ``last_ts``. Edges are sorted by (src, dst), so edge ``e`` of the CSR
+    layout is also row ``e`` of every edge attribute array.
+    """
+
+    def __init__(self, n_nodes, edge_src, edge_dst,
+                 tx_count, amount_sum, first_ts, last_ts):
+
+        self.n_nodes = n_nodes
+
+        self.edge_src = edge_src
+        self.edge_dst = edge_dst
+        self.edge_keys = edge_src.astype(np.int64) * n_nodes + edge_dst
+        self.tx_count = tx_count
+        self.amount_sum = amount_sum
+        self.first_ts = first_ts
+        self.last_ts = last_ts
+
+        self.out_degree = np.bincount(edge_src, minlength=n_nodes)
+        self.in_degree = np.bincount(edge_dst, minlength=n_nodes)
+        self.degree = self.in_degree + self.out_degree
+
+        # CSR: successors of u are indices[indptr[u]:indptr[u + 1]]
+        self.indptr = _offsets(self.out_degree)
+        self.indices = edge_dst
+
+        # CSC: predecessors of v, plus the CSR edge id of each entry
+        self.in_edges = np.argsort(edge_dst, kind="stable")
+        self.in_indptr = _offsets(self.in_degree)
+        self.in_indices = edge_src[self.in_edges]
+
+    def number_of_nodes(self):
+        return self.n_nodes
+
+    def number_of_edges(self):
+        return len(self.edge_src)
+
+    def successors(self, node):
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def predecessors(self, node):
+        return self.in_indices[self.in_indptr[node]:self.in_indptr[node + 1]]
+
+    def out_edge_ids(self, node):
+        return np.arange(self.indptr[node], self.indptr[node + 1])
+
+    def in_edge_ids(self, node):
+        return self.in_edges[self.in_indptr[node]:self.in_indptr[node + 1]]
+
+    def has_edges(self, src, dst):
+        """Vectorized membership test for the edges src[i] → dst[i]."""
+
+        wanted = (
+            np.asarray(src, dtype=np.int64) * self.n_nodes +
+            np.asarray(dst, dtype=np.int64)
+        )
+
+        if len(self.edge_keys) == 0:
+            return np.zeros(len(wanted), dtype=bool)
+
+        pos = np.searchsorted(self.edge_keys, wanted)
+        pos = np.minimum(pos, len(self.edge_keys) - 1)
+
+        return self.edge_keys[pos] == wanted
+
+    def has_edge(self, u, v):
+        return bool(self.has_edges([u], [v])[0])
+
+    def to_scipy(self):
+        data = np.ones(len(self.indices), dtype=np.int8)
+        return csr_matrix(
+            (data, self.indices, self.indptr),
+            shape=(self.n_nodes, self.n_nodes)
+        )
+
+
+def _offsets(counts):
+    indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr
+
+
+def build_graph(tx, n_nodes=None):
+
+    src = tx["src"].to_numpy(dtype=np.int64)
+    dst = tx["dst"].to_numpy(dtype=np.int64)
+    amount = tx["amount"].to_numpy(dtype=np.float64)
+    ts = tx["timestamp"].to_numpy()
+
+    if n_nodes is None:
+        n_nodes = int(max(src.max(initial=-1), dst.max(initial=-1))) + 1
+
+    # One sort by (src, dst) groups parallel transactions together
+    keys = src * n_nodes + dst
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+
+    if len(keys) == 0:
+        empty = np.zeros(0, dtype=np.int32)
+        return TransactionGraph(
+            n_nodes, empty, empty,
+            np.zeros(0, dtype=np.int64), np.zeros(0), ts[:0], ts[:0]
+        )
+
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    edge_keys = keys[starts]
+
+    ts_sorted = ts[order]
+
+    return TransactionGraph(
+        n_nodes,
+        (edge_keys // n_nodes).astype(np.int32),
+        (edge_keys % n_nodes).astype(np.int32),
+        np.diff(np.r_[starts, len(keys)]),
+        np.add.reduceat(amount[order], starts),
+        np.minimum.reduceat(ts_sorted, starts),
+        np.maximum.reduceat(ts_sorted, starts)
     )
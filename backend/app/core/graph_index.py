@@ -0,0 +1,361 @@
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.config import (
+    GRAPH_INDEX_CACHE_ENTRIES,
+    GRAPH_INDEX_DIR,
+    GRAPH_INDEX_MAX_UPLOADS,
+    SUBGRAPH_MAX_SCAN
+)
+
+
+def _offsets(counts):
+    indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr
+
+
+def _epoch_seconds(timestamps):
+    return np.asarray(timestamps).astype("datetime64[s]").astype(np.int64)
+
+
+def _iso(seconds):
+    return str(np.datetime64(int(seconds), "s"))
+
+
+class GraphIndex:
+    """One upload's transactions laid out for neighbourhood queries.
+
+    Raw transactions are kept twice, grouped by sender (CSR) and by
+    receiver (CSC), each group sorted by time, so a node's neighbours in
+    a time window are a slice found by binary search. Ring members are
+    kept as a ragged array keyed by ring id. Saved as one .npy file per
+    array and memory-mapped on load, so a query only pages in the slices
+    it reads.
+    """
+
+    ARRAYS = (
+        "accounts", "account_order",
+        "out_ptr", "out_peer", "out_amount", "out_ts",
+        "in_ptr", "in_peer", "in_amount", "in_ts",
+        "ring_ids", "ring_ptr", "ring_members"
+    )
+
+    def __init__(self, **arrays):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+
+        self._sorted_accounts = self.accounts[self.account_order]
+        self._ring_pos = {r: i for i, r in enumerate(self.ring_ids.tolist())}
+
+    # -----------------------------
+    # Build / Persist
+    # -----------------------------
+    @classmethod
+    def build(cls, tx, accounts, rings):
+        """From run_analysis's interned frame, account table and rings."""
+
+        n = len(accounts)
+        src = tx["src"].to_numpy(dtype=np.int64)
+        dst = tx["dst"].to_numpy(dtype=np.int64)
+        amount = tx["amount"].to_numpy(dtype=np.float64)
+        ts = _epoch_seconds(tx["timestamp"].to_numpy())
+
+        arrays = {}
+        for side, key, peer in (("out", src, dst), ("in", dst, src)):
+            order = np.lexsort((ts, key))
+            arrays[f"{side}_ptr"] = _offsets(np.bincount(key, minlength=n))
+            arrays[f"{side}_peer"] = peer[order].astype(np.int32)
+            arrays[f"{side}_amount"] = amount[order]
+            arrays[f"{side}_ts"] = ts[order]
+
+        accounts = np.asarray(accounts).astype(str)
+        members = [np.asarray(r["members"], dtype=np.int32) for r in rings]
+
+        return cls(
+            accounts=accounts,
+            account_order=np.argsort(accounts, kind="stable"),
+            ring_ids=np.array([r["ring_id"] for r in rings], dtype=str),
+            ring_ptr=_offsets([len(m) for m in members]),
+            ring_members=np.concatenate(members) if members else np.zeros(0, dtype=np.int32),
+            **arrays
+        )
+
+    def save(self, path):
+
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        for name in self.ARRAYS:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(self, name))
+
+        # Re-analysis of an upload replaces its index
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        return cls(**{
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in cls.ARRAYS
+        })
+
+    # -----------------------------
+    # Lookups
+    # -----------------------------
+    def code(self, account_id):
+
+        pos = np.searchsorted(self._sorted_accounts, account_id)
+        if pos < len(self._sorted_accounts) and self._sorted_accounts[pos] == account_id:
+            return int(self.account_order[pos])
+
+        return None
+
+    def ring_codes(self, ring_id):
+
+        i = self._ring_pos.get(ring_id)
+        if i is None:
+            return None
+
+        return self.ring_members[self.ring_ptr[i]:self.ring_ptr[i + 1]]
+
+    def _slice(self, side, node, start, end, limit=None):
+        """Rows of `node` on one side inside [start, end]; with `limit`,
+        only the latest `limit` of them."""
+
+        ptr = getattr(self, f"{side}_ptr")
+        lo, hi = int(ptr[node]), int(ptr[node + 1])
+
+        ts = getattr(self, f"{side}_ts")
+        if start is not None:
+            lo += int(np.searchsorted(ts[lo:hi], start, side="left"))
+        if end is not None:
+            hi = lo + int(np.searchsorted(ts[lo:hi], end, side="right"))
+
+        if limit is not None:
+            lo = max(lo, hi - limit)
+
+        return slice(lo, hi)
+
+    def _capped(self, node, start, end, limit):
+
+        for side in ("out", "in"):
+            rows = self._slice(side, node, start, end)
+            if rows.stop - rows.start > limit:
+                return True
+
+        return False
+
+    def neighbours(self, node, start=None, end=None, limit=SUBGRAPH_MAX_SCAN):
+        """Distinct counterparties either way, with the amount exchanged,
+        over at most the latest `limit` transactions per direction."""
+
+        out = self._slice("out", node, start, end, limit)
+        inc = self._slice("in", node, start, end, limit)
+
+        peers = np.concatenate([self.out_peer[out], self.in_peer[inc]])
+        amounts = np.concatenate([self.out_amount[out], self.in_amount[inc]])
+
+        keep = peers != node
+        peers, inverse = np.unique(peers[keep], return_inverse=True)
+
+        return peers, np.bincount(inverse, weights=amounts[keep], minlength=len(peers))
+
+    # -----------------------------
+    # Subgraph
+    # -----------------------------
+    def subgraph(self, seeds, hops, max_nodes, max_edges, max_fanout, start=None, end=None):
+        """Bounded k-hop neighbourhood of `seeds`, edges aggregated per pair.
+
+        Nodes whose counterparties exceed `max_fanout` only expand to the
+        heaviest ones by amount; the rest are counted, not returned. The
+        node cap fills breadth-first and heaviest-first, and if edges
+        among the kept nodes pass `max_edges` the heaviest are kept. Hubs
+        with more than SUBGRAPH_MAX_SCAN transactions either way in the
+        window are read over their latest ones only.
+        """
+
+        hop_of = {}
+        hidden = {}
+        capped = set()
+
+        for s in seeds:
+            if len(hop_of) >= max_nodes:
+                break
+            hop_of.setdefault(int(s), 0)
+
+        frontier = list(hop_of)
+        nodes_truncated = len(hop_of) < len(set(int(s) for s in seeds))
+
+        for hop in range(1, hops + 1):
+            next_frontier = []
+
+            for u in frontier:
+                if self._capped(u, start, end, SUBGRAPH_MAX_SCAN):
+                    capped.add(u)
+                peers, amounts = self.neighbours(u, start, end)
+
+                order = np.argsort(-amounts, kind="stable")
+                if len(order) > max_fanout:
+                    hidden[u] = len(order) - max_fanout
+                    order = order[:max_fanout]
+
+                for v in peers[order].tolist():
+                    if v in hop_of:
+                        continue
+                    if len(hop_of) >= max_nodes:
+                        nodes_truncated = True
+                        break
+                    hop_of[v] = hop
+                    next_frontier.append(v)
+
+            frontier = next_frontier
+            if not frontier:
+                break
+
+        nodes = np.fromiter(hop_of, dtype=np.int64, count=len(hop_of))
+        edges, edges_truncated = self._edges_among(nodes, max_edges, start, end)
+        capped.update(u for u in nodes.tolist() if self._capped(u, start, end, SUBGRAPH_MAX_SCAN))
+
+        seed_set = set(int(s) for s in seeds)
+
+        return {
+            "nodes": [
+                {
+                    "id": account,
+                    "hop": hop_of[code],
+                    "seed": code in seed_set,
+                    "hidden_neighbours": hidden.get(code, 0)
+                }
+                for code, account in zip(nodes.tolist(), self.accounts[nodes].tolist())
+            ],
+            "edges": edges,
+            "truncated": {
+                "nodes": nodes_truncated,
+                "edges": edges_truncated,
+                "fanout": len(hidden),
+                "scan": len(capped)
+            }
+        }
+
+    def _edges_among(self, nodes, max_edges, start, end):
+
+        node_set = np.sort(nodes)
+        src_parts, dst_parts, amount_parts, ts_parts = [], [], [], []
+
+        for u in nodes.tolist():
+            s = self._slice("out", u, start, end, SUBGRAPH_MAX_SCAN)
+            peers = self.out_peer[s]
+            # Binary search into the few kept nodes; no sort of the slice
+            pos = np.minimum(np.searchsorted(node_set, peers), len(node_set) - 1)
+            keep = node_set[pos] == peers
+            if keep.any():
+                src_parts.append(np.full(int(keep.sum()), u, dtype=np.int64))
+                dst_parts.append(peers[keep].astype(np.int64))
+                amount_parts.append(self.out_amount[s][keep])
+                ts_parts.append(self.out_ts[s][keep])
+
+        if not src_parts:
+            return [], False
+
+        src = np.concatenate(src_parts)
+        dst = np.concatenate(dst_parts)
+        amount = np.concatenate(amount_parts)
+        ts = np.concatenate(ts_parts)
+
+        pairs, inverse = np.unique(src * len(self.accounts) + dst, return_inverse=True)
+
+        count = np.bincount(inverse, minlength=len(pairs))
+        total = np.bincount(inverse, weights=amount, minlength=len(pairs))
+        first = np.full(len(pairs), np.iinfo(np.int64).max)
+        last = np.full(len(pairs), np.iinfo(np.int64).min)
+        np.minimum.at(first, inverse, ts)
+        np.maximum.at(last, inverse, ts)
+
+        order = np.argsort(-total, kind="stable")
+        truncated = len(order) > max_edges
+        order = order[:max_edges]
+
+        pair_src = pairs[order] // len(self.accounts)
+        pair_dst = pairs[order] % len(self.accounts)
+
+        edges = [
+            {
+                "source": s,
+                "target": d,
+                "tx_count": int(c),
+                "amount_sum": round(float(a), 2),
+                "first_ts": _iso(f),
+                "last_ts": _iso(l)
+            }
+            for s, d, c, a, f, l in zip(
+                self.accounts[pair_src].tolist(),
+                self.accounts[pair_dst].tolist(),
+                count[order], total[order], first[order], last[order]
+            )
+        ]
+
+        return edges, truncated
+
+
+# -----------------------------
+# Storage
+# -----------------------------
+def index_path(upload_id):
+    return os.path.join(GRAPH_INDEX_DIR, str(int(upload_id)))
+
+
+def _prune(keep):
+    """Delete the least recently written indexes beyond `keep`."""
+
+    names = [n for n in os.listdir(GRAPH_INDEX_DIR) if n.isdigit()]
+    if len(names) <= keep:
+        return
+
+    names.sort(key=lambda n: os.path.getmtime(os.path.join(GRAPH_INDEX_DIR, n)))
+
+    for name in names[:len(names) - keep]:
+        shutil.rmtree(os.path.join(GRAPH_INDEX_DIR, name), ignore_errors=True)
+        with _loaded_lock:
+            _loaded.pop(int(name), None)
+
+
+def save_graph_index(upload_id, tx, accounts, rings):
+
+    os.makedirs(GRAPH_INDEX_DIR, exist_ok=True)
+    GraphIndex.build(tx, accounts, rings).save(index_path(upload_id))
+
+    if GRAPH_INDEX_MAX_UPLOADS:
+        _prune(GRAPH_INDEX_MAX_UPLOADS)
+
+
+_loaded = OrderedDict()
+_loaded_lock = threading.Lock()
+
+
+def get_graph_index(upload_id):
+    """The upload's index, loaded once and kept in a small LRU; None if absent."""
+
+    with _loaded_lock:
+        index = _loaded.get(upload_id)
+        if index is not None:
+            _loaded.move_to_end(upload_id)
+            return index
+
+    path = index_path(upload_id)
+    if not os.path.exists(path):
+        return None
+
+    index = GraphIndex.load(path)
+
+    with _loaded_lock:
+        _loaded[upload_id] = index
+        while len(_loaded) > GRAPH_INDEX_CACHE_ENTRIES:
+            _loaded.popitem(last=False)
+
+    return index
@@ -0,0 +1,358 @@
+import fcntl
+import json
+import os
+import re
+import shutil
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from app.config import HISTORY_DIR
+
+
+SEGMENT_NAME = re.compile(r"^(\d{8})-(\d{4}-\d{2}-\d{2})$")
+
+COLUMNS = ("src", "dst", "amount", "ts", "tx_id")
+
+
+class EmptyRange(ValueError):
+    pass
+
+
+def _as_date(value):
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+@contextmanager
+def _exclusive(path):
+    """flock on `path`: held across processes, released if one dies."""
+
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# -----------------------------
+# Account Table
+# -----------------------------
+class _AccountTable:
+    """Account ids by global code, grown in place as segments arrive.
+
+    Lookups go through a few hash indexes over consecutive code ranges,
+    merged whenever one is no more than twice the size of the next (as in
+    a log-structured merge), so adding accounts never rebuilds the index
+    of the whole table and a lookup probes O(log n) indexes.
+    """
+
+    def __init__(self):
+        self.ids = np.empty(1024, dtype=object)
+        self.size = 0
+        self._parts = []          # (first code, pd.Index of its range)
+
+    def __len__(self):
+        return self.size
+
+    def view(self):
+        return self.ids[:self.size]
+
+    def extend(self, new_ids):
+
+        end = self.size + len(new_ids)
+
+        if end > len(self.ids):
+            grown = np.empty(max(end, 2 * len(self.ids)), dtype=object)
+            grown[:self.size] = self.ids[:self.size]
+            self.ids = grown
+
+        self.ids[self.size:end] = new_ids
+        self._parts.append((self.size, pd.Index(self.ids[self.size:end])))
+        self.size = end
+
+        while len(self._parts) >= 2 and len(self._parts[-2][1]) <= 2 * len(self._parts[-1][1]):
+            start = self._parts[-2][0]
+            self._parts[-2:] = [(start, pd.Index(self.ids[start:end]))]
+
+    def get_indexer(self, ids):
+        """Codes of `ids`, -1 where unknown."""
+
+        codes = np.full(len(ids), -1, dtype=np.int64)
+
+        for start, index in reversed(self._parts):
+            missing = np.flatnonzero(codes < 0)
+            if not len(missing):
+                break
+
+            found = index.get_indexer(ids[missing])
+            hit = found >= 0
+            codes[missing[hit]] = start + found[hit]
+
+        return codes
+
+
+class HistoryStore:
+    """Append-only transaction history on disk, one segment per day per append.
+
+    A segment is a directory of .npy columns (src, dst, amount, ts,
+    tx_id and, when supplied, is_fraud) opened memory-mapped, so reading a
+    date range touches only that range's pages. Account codes are global:
+    each segment also stores the accounts it introduced, and the account
+    table is those lists concatenated in segment order. Segments are
+    written to a temporary directory and renamed into place, so readers
+    in other processes only ever see whole segments; appends hold an
+    flock on the directory, so writers in different processes take turns
+    numbering segments and accounts.
+    """
+
+    def __init__(self, directory=HISTORY_DIR):
+        self.directory = directory
+        self.segments_dir = os.path.join(directory, "segments")
+        os.makedirs(self.segments_dir, exist_ok=True)
+
+        self.lock_path = os.path.join(directory, ".append.lock")
+
+        self.segments = []
+        self.account_table = _AccountTable()
+
+        self._lock = threading.Lock()
+        self.refresh()
+
+    @property
+    def accounts(self):
+        return self.account_table.view()
+
+    # -----------------------------
+    # Segments On Disk
+    # -----------------------------
+    def _open_segment(self, name):
+
+        path = os.path.join(self.segments_dir, name)
+
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+
+        meta["path"] = path
+        meta["seq"] = int(SEGMENT_NAME.match(name).group(1))
+
+        return meta
+
+    def _column(self, segment, name):
+        return np.load(os.path.join(segment["path"], f"{name}.npy"), mmap_mode="r")
+
+    def refresh(self):
+        """Pick up segments other processes appended since the last look."""
+
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+
+        last = self.segments[-1]["seq"] if self.segments else -1
+
+        names = sorted(
+            n for n in os.listdir(self.segments_dir)
+            if SEGMENT_NAME.match(n) and int(n[:8]) > last
+        )
+
+        for name in names:
+            segment = self._open_segment(name)
+            self.segments.append(segment)
+
+            # Only the new segment's accounts are added
+            if segment["new_accounts"]:
+                self.account_table.extend(self._column(segment, "new_accounts"))
+
+    # -----------------------------
+    # Append
+    # -----------------------------
+    def _intern(self, ids):
+        """Global codes for `ids`, extending the account table as needed."""
+
+        codes = self.account_table.get_indexer(ids)
+        missing = codes < 0
+
+        new_accounts = pd.unique(ids[missing])
+        if len(new_accounts):
+            codes[missing] = len(self.accounts) + pd.Index(new_accounts).get_indexer(ids[missing])
+
+        return codes.astype(np.int32), np.asarray(new_accounts, dtype=str)
+
+    def _known_tx_ids(self, dates):
+
+        parts = [
+            self._column(s, "tx_id") for s in self.segments if s["date"] in dates
+        ]
+
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=str)
+
+    def _write_segment(self, seq, date, columns, new_accounts):
+
+        name = f"{seq:08d}-{date}"
+        tmp_path = os.path.join(self.segments_dir, f".{name}.tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        for column, values in columns.items():
+            np.save(os.path.join(tmp_path, f"{column}.npy"), values)
+        np.save(os.path.join(tmp_path, "new_accounts.npy"), new_accounts)
+
+        meta = {
+            "date": date,
+            "rows": len(columns["src"]),
+            "new_accounts": len(new_accounts),
+            "has_is_fraud": "is_fraud" in columns
+        }
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+        os.rename(tmp_path, os.path.join(self.segments_dir, name))
+
+        return name
+
+    def append(self, df):
+        """Add an upload's transactions; ids already stored for those days are skipped."""
+
+        # Codes and sequence numbers come from what is on disk, so read
+        # the latest segments and write ours without another process
+        # appending in between
+        with self._lock, _exclusive(self.lock_path):
+            self._refresh()
+
+            timestamps = pd.to_datetime(df["timestamp"])
+            if getattr(timestamps.dt, "tz", None) is not None:
+                timestamps = timestamps.dt.tz_convert(None)
+
+            tx_ids = df["transaction_id"].astype(str).to_numpy()
+            dates = timestamps.dt.strftime("%Y-%m-%d").to_numpy()
+
+            # Hash-based; np.isin on string arrays falls back to a slow path
+            ids = pd.Series(tx_ids)
+            fresh = ~ids.duplicated().to_numpy()
+            fresh &= ~ids.isin(self._known_tx_ids(set(dates.tolist())).astype(object)).to_numpy()
+
+            df = df[fresh]
+            tx_ids, dates, timestamps = tx_ids[fresh], dates[fresh], timestamps[fresh]
+
+            senders = df["sender_id"].astype(str).to_numpy(dtype=object)
+            receivers = df["receiver_id"].astype(str).to_numpy(dtype=object)
+
+            codes, new_accounts = self._intern(np.concatenate([senders, receivers]))
+            n = len(df)
+
+            columns = {
+                "src": codes[:n],
+                "dst": codes[n:],
+                "amount": df["amount"].to_numpy(dtype=np.float64),
+                "ts": timestamps.to_numpy(dtype="datetime64[ns]").astype(np.int64),
+                "tx_id": tx_ids.astype(str)
+            }
+            if "is_fraud" in df.columns:
+                columns["is_fraud"] = df["is_fraud"].to_numpy(dtype=np.int8)
+
+            seq = self.segments[-1]["seq"] + 1 if self.segments else 0
+            written = []
+
+            for date in sorted(set(dates.tolist())):
+                rows = dates == date
+                name = self._write_segment(
+                    seq,
+                    date,
+                    {c: v[rows] for c, v in columns.items()},
+                    # A batch's new accounts ride on its first segment
+                    new_accounts if not written else np.zeros(0, dtype=str)
+                )
+                written.append(name)
+                seq += 1
+
+            self._refresh()
+
+        return {
+            "rows_added": n,
+            "duplicates_skipped": int((~fresh).sum()),
+            "new_accounts": len(new_accounts),
+            "segments_written": written,
+            **self.summary()
+        }
+
+    # -----------------------------
+    # Read
+    # -----------------------------
+    def _in_range(self, start, end):
+
+        start = _as_date(start) if start is not None else None
+        end = _as_date(end) if end is not None else None
+
+        return [
+            s for s in self.segments
+            if (start is None or s["date"] >= start) and (end is None or s["date"] <= end)
+        ]
+
+    def count_rows(self, start=None, end=None):
+        return sum(s["rows"] for s in self._in_range(start, end))
+
+    def load_range(self, start=None, end=None):
+        """run_analysis input for the days [start, end], inclusive.
+
+        Returns the interned frame and its account table. Store codes
+        are remapped onto the accounts the range uses (a vectorized
+        renumbering, not a second pass over account strings), so the
+        detectors see no accounts from outside the range.
+        """
+
+        segments = self._in_range(start, end)
+        if not segments:
+            raise EmptyRange("No stored transactions in that date range.")
+
+        def gather(column):
+            return np.concatenate([self._column(s, column) for s in segments])
+
+        src, dst = gather("src"), gather("dst")
+        n = len(src)
+
+        used, local = np.unique(np.concatenate([src, dst]), return_inverse=True)
+
+        tx = pd.DataFrame({
+            "src": local[:n].astype(np.int32),
+            "dst": local[n:].astype(np.int32),
+            "amount": gather("amount"),
+            "timestamp": gather("ts").view("datetime64[ns]")
+        })
+
+        if all(s["has_is_fraud"] for s in segments):
+            tx["is_fraud"] = gather("is_fraud")
+
+        return tx, self.accounts[used].astype(object)
+
+    def summary(self):
+
+        days = {}
+        for s in self.segments:
+            days[s["date"]] = days.get(s["date"], 0) + s["rows"]
+
+        return {
+            "total_rows": sum(days.values()),
+            "total_accounts": len(self.accounts),
+            "segments": len(self.segments),
+            "first_date": min(days) if days else None,
+            "last_date": max(days) if days else None,
+            "rows_by_date": dict(sorted(days.items()))
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history_store():
+
+    global _store
+
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore()
+
+    return _store
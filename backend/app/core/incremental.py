@@ -0,0 +1,805 @@
+import bisect
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.config import INCREMENTAL_DIR, INCREMENTAL_LATENESS_HOURS
+from app.core.graph_builder import build_graph
+from app.core.cycle_detector import cycles_through_edge, detect_cycles
+from app.core.smurf_detector import detect_smurfing
+from app.core.shell_detector import detect_shell_layers
+from app.core.partitioning import cycle_members
+from app.core.streaming import FRAGMENTATION_RATIO, MIN_AGGREGATION, SMURF_THRESHOLD
+
+
+FEED_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+SEGMENT_SUFFIX = ".npz"
+
+# Batches adding more than this share of the graph's edges (the first
+# load, say) are cheaper to analyze with the batch detectors
+FULL_RESCAN_EDGE_FRACTION = 0.25
+
+# detect_smurfing's default window
+SMURF_WINDOW_SECONDS = 72 * 3600
+
+
+# -----------------------------
+# Growable Columns
+# -----------------------------
+class _Column:
+    """Append-only NumPy column with amortised O(1) appends."""
+
+    def __init__(self, dtype, fill=0):
+        self.data = np.full(1024, fill, dtype=dtype)
+        self.fill = fill
+        self.size = 0
+
+    def _reserve(self, size):
+        if size > len(self.data):
+            grown = np.full(max(size, 2 * len(self.data)), self.fill, dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+
+    def extend(self, values):
+        end = self.size + len(values)
+        self._reserve(end)
+        self.data[self.size:end] = values
+        self.size = end
+
+    def grow_to(self, size):
+        self._reserve(size)
+        self.size = max(self.size, size)
+
+    def view(self):
+        return self.data[:self.size]
+
+
+# -----------------------------
+# Per-Account Smurfing Windows
+# -----------------------------
+class _HubWindow:
+    """One account's transfers in one direction, sorted by time, with the
+    first window that trips the smurfing rule cached.
+
+    Adding events only records the earliest one, so re-evaluating scans
+    from one window before it instead of the account's whole history; for
+    a feed arriving in time order that is the batch plus one window.
+    Events older than any later arrival can reach are pruned; once the
+    first trip is that old too it can't change, and no events are kept.
+    """
+
+    __slots__ = ("events", "trip", "members", "stale_from", "final")
+
+    def __init__(self):
+        self.events = []          # (seconds, row, counterparty), sorted
+        self.trip = None          # (left, right) event keys of the first trip
+        self.members = None
+        self.stale_from = None
+        self.final = False
+
+    def add(self, seconds, row, counterparty):
+
+        if self.final:
+            return
+
+        bisect.insort(self.events, (seconds, row, counterparty))
+
+        key = (seconds, row)
+        if self.stale_from is None or key < self.stale_from:
+            self.stale_from = key
+
+    def first_trip(self, threshold=SMURF_THRESHOLD, window_seconds=SMURF_WINDOW_SECONDS):
+        """Counterparties of the first window with `threshold` distinct ones,
+        plus the rest of its burst, as detect_smurfing picks them; or None."""
+
+        if self.stale_from is None or self.final:
+            self.stale_from = None
+            return self.members
+
+        if self.trip is not None and self.trip[1] < self.stale_from:
+            # Everything new came after the trip: at most the burst grew
+            left = bisect.bisect_left(self.events, self.trip[0])
+            if self.stale_from[0] - self.events[left][0] <= window_seconds:
+                self.members = self._burst(left, window_seconds)
+        else:
+            self._scan(bisect.bisect_left(self.events, self.stale_from), threshold, window_seconds)
+
+        self.stale_from = None
+
+        return self.members
+
+    def prune(self, horizon):
+        """Drop events before `horizon`, which no accepted event's window
+        can reach back to."""
+
+        if self.stale_from is not None:
+            self.first_trip()
+
+        if self.trip is not None and self.trip[0][0] < horizon:
+            self.final = True
+            self.events = []
+            return
+
+        del self.events[:bisect.bisect_left(self.events, (horizon,))]
+
+    def _scan(self, start, threshold, window_seconds):
+
+        events = self.events
+        left = bisect.bisect_left(events, (events[start][0] - window_seconds,))
+
+        counts = {}
+        for _, _, cp in events[left:start]:
+            counts[cp] = counts.get(cp, 0) + 1
+
+        for right in range(start, len(events)):
+
+            t, _, cp = events[right]
+            counts[cp] = counts.get(cp, 0) + 1
+
+            while t - events[left][0] > window_seconds:
+                old = events[left][2]
+                if counts[old] == 1:
+                    del counts[old]
+                else:
+                    counts[old] -= 1
+                left += 1
+
+            if len(counts) >= threshold:
+                self.trip = (events[left][:2], events[right][:2])
+                self.members = self._burst(left, window_seconds)
+                return
+
+        self.trip = None
+        self.members = None
+
+    def _burst(self, left, window_seconds):
+
+        events = self.events
+        end = bisect.bisect_right(events, (events[left][0] + window_seconds, float("inf")))
+
+        return list(dict.fromkeys(cp for _, _, cp in events[left:end]))
+
+
+# -----------------------------
+# Analysis State
+# -----------------------------
+class AnalysisState:
+    """Graph, activity aggregates and rings for one transaction feed.
+
+    Batches are appended rather than re-analyzed: new cycles must run
+    through a new edge, smurfing can only change for accounts the batch
+    touches, and shell chains only around those accounts. Each append is
+    stored on disk as one segment (the batch plus the ring diff it caused),
+    and loading replays the segments in order.
+
+    Transactions more than `lateness_hours` behind the newest one already
+    appended are skipped. That bounds what dedupe and the smurfing windows
+    have to remember, however long the feed runs.
+    """
+
+    def __init__(self, directory=None, lateness_hours=INCREMENTAL_LATENESS_HOURS):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.lateness_seconds = int(lateness_hours * 3600)
+
+        # Accounts are interned once and keep their code forever
+        self.account_code = {}
+        self.accounts = []
+
+        # Newest transaction time appended, and where it was last pruned at
+        self.watermark = None
+        self.pruned_at = None
+
+        # Transaction id -> seconds, for ids recent enough to arrive again
+        self.seen_tx = {}
+        self.src = _Column(np.int64)
+        self.dst = _Column(np.int64)
+        self.amount = _Column(np.float64)
+        self.seconds = _Column(np.int64)
+
+        # Smurfing windows by account code, per direction
+        self.fan_out = {}
+        self.fan_in = {}
+
+        self.succ = {}
+        self.pred = {}
+        self.n_edges = 0
+
+        # Activity aggregates indexed by account code
+        self.sent = _Column(np.float64)
+        self.received = _Column(np.float64)
+        self.sent_count = _Column(np.int64)
+        self.received_count = _Column(np.int64)
+        self.first_seen = _Column(np.int64, np.iinfo(np.int64).max)
+        self.last_seen = _Column(np.int64, np.iinfo(np.int64).min)
+
+        # Rings by key: cycle -> members tuple, smurf -> (pattern, hub),
+        # shell -> ("shell", members tuple)
+        self.rings = {}
+        self.in_cycle = set()
+        self.shell_keys_by_member = {}
+        self.counters = {"cycle": 1, "smurf": 1, "shell": 500}
+        self.segments = 0
+        self.cycle_searches_truncated = 0
+
+    # -----------------------------
+    # Batch ingestion
+    # -----------------------------
+    def _intern(self, ids):
+        """Codes for account ids, creating new ones in first-seen order."""
+
+        codes, uniques = pd.factorize(ids)
+        new_accounts = []
+
+        mapped = np.empty(len(uniques), dtype=np.int64)
+        for i, account in enumerate(uniques.tolist()):
+            code = self.account_code.get(account)
+            if code is None:
+                code = len(self.accounts)
+                self.account_code[account] = code
+                self.accounts.append(account)
+                new_accounts.append(account)
+            mapped[i] = code
+
+        return mapped[codes], new_accounts
+
+    def _apply(self, tx_ids, src, dst, amount, seconds):
+        """Add a batch to the graph and aggregates; returns the new edges."""
+
+        first_row = self.src.size
+
+        self.seen_tx.update(zip(tx_ids, seconds.tolist()))
+        self.src.extend(src)
+        self.dst.extend(dst)
+        self.amount.extend(amount)
+        self.seconds.extend(seconds)
+
+        n = len(self.accounts)
+        for column in (self.sent, self.received, self.sent_count,
+                       self.received_count, self.first_seen, self.last_seen):
+            column.grow_to(n)
+
+        np.add.at(self.sent.data, src, amount)
+        np.add.at(self.received.data, dst, amount)
+        np.add.at(self.sent_count.data, src, 1)
+        np.add.at(self.received_count.data, dst, 1)
+        for side in (src, dst):
+            np.minimum.at(self.first_seen.data, side, seconds)
+            np.maximum.at(self.last_seen.data, side, seconds)
+
+        new_edges = []
+
+        rows = zip(src.tolist(), dst.tolist(), seconds.tolist())
+
+        for row, (s, d, t) in enumerate(rows, start=first_row):
+            self._window(self.fan_out, s).add(t, row, d)
+            self._window(self.fan_in, d).add(t, row, s)
+
+            out = self.succ.setdefault(s, set())
+            if d not in out:
+                out.add(d)
+                self.pred.setdefault(d, set()).add(s)
+                new_edges.append((s, d))
+
+        self.n_edges += len(new_edges)
+
+        newest = int(seconds.max())
+        if self.watermark is None or newest > self.watermark:
+            self.watermark = newest
+
+        return new_edges
+
+    def _prune(self):
+        """Forget ids and window events no acceptable arrival can need.
+
+        Runs once the watermark has moved a smurfing window past the last
+        prune, so the sweep over every window stays amortised.
+        """
+
+        if self.watermark is None:
+            return
+        if self.pruned_at is not None and self.watermark - self.pruned_at < SMURF_WINDOW_SECONDS:
+            return
+
+        oldest_accepted = self.watermark - self.lateness_seconds
+
+        self.seen_tx = {i: t for i, t in self.seen_tx.items() if t >= oldest_accepted}
+
+        horizon = oldest_accepted - SMURF_WINDOW_SECONDS
+        for windows in (self.fan_out, self.fan_in):
+            for window in windows.values():
+                window.prune(horizon)
+
+        self.pruned_at = self.watermark
+
+    def _window(self, windows, account):
+        window = windows.get(account)
+        if window is None:
+            window = windows[account] = _HubWindow()
+        return window
+
+    def append(self, df):
+        """Append a transaction batch and return the ring diff it causes."""
+
+        start_time = time.time()
+
+        tx_ids = df["transaction_id"].astype(str)
+
+        timestamps = pd.to_datetime(df["timestamp"])
+        if getattr(timestamps.dt, "tz", None) is not None:
+            timestamps = timestamps.dt.tz_convert(None)
+        seconds = timestamps.to_numpy().astype("datetime64[s]").astype(np.int64)
+
+        # Too far behind the feed to be checked against what was pruned
+        late = np.zeros(len(df), dtype=bool)
+        if self.watermark is not None:
+            late = seconds < self.watermark - self.lateness_seconds
+
+        # Feeds overlap: skip ids already applied or repeated in the batch
+        seen = self.seen_tx
+        fresh = ~late & ~tx_ids.duplicated().to_numpy() & np.fromiter(
+            (i not in seen for i in tx_ids.tolist()), dtype=bool, count=len(tx_ids)
+        )
+        received = len(df)
+        df = df[fresh]
+        tx_ids = tx_ids[fresh].tolist()
+        seconds = seconds[fresh]
+        truncated_before = self.cycle_searches_truncated
+
+        n_before = len(self.accounts)
+
+        codes, new_accounts = self._intern(
+            pd.concat([df["sender_id"], df["receiver_id"]], ignore_index=True).astype(str)
+        )
+        src, dst = codes[:len(df)], codes[len(df):]
+        amount = df["amount"].to_numpy(dtype=np.float64)
+
+        if tx_ids:
+            new_edges = self._apply(tx_ids, src, dst, amount, seconds)
+            touched = set(src.tolist()) | set(dst.tolist())
+
+            if len(new_edges) > FULL_RESCAN_EDGE_FRACTION * self.n_edges:
+                diff = self._rescan_rings()
+            else:
+                diff = self._update_rings(new_edges, touched)
+            self._prune()
+            self._save_segment(new_accounts, tx_ids, src, dst, amount, seconds, diff)
+        else:
+            new_edges, touched = [], set()
+            diff = {"new": [], "changed": [], "removed": []}
+
+        return {
+            "new_rings": [self._ring_view(r) for r in diff["new"]],
+            "changed_rings": [self._ring_view(r) for r in diff["changed"]],
+            "removed_rings": diff["removed"],
+            "summary": {
+                "transactions_received": received,
+                "transactions_appended": len(tx_ids),
+                "duplicates_skipped": received - len(tx_ids) - int(late.sum()),
+                "late_skipped": int(late.sum()),
+                "cycle_searches_truncated": self.cycle_searches_truncated - truncated_before,
+                "new_accounts": len(self.accounts) - n_before,
+                "new_edges": len(new_edges),
+                "affected_accounts": len(touched),
+                "total_transactions": self.src.size,
+                "total_accounts": len(self.accounts),
+                "total_rings": len(self.rings),
+                "processing_time_seconds": round(time.time() - start_time, 3)
+            }
+        }
+
+    # -----------------------------
+    # Ring maintenance
+    # -----------------------------
+    def _next_id(self, kind):
+
+        template = {"cycle": "RING_{:03d}", "smurf": "RING_S_{:03d}", "shell": "RING_L_{}"}[kind]
+        ring_id = template.format(self.counters[kind])
+        self.counters[kind] += 1
+
+        return ring_id
+
+    def _upsert(self, key, kind, pattern, members, risk_score, diff):
+        """Add or update a ring, recording it in `diff` if anything changed."""
+
+        old = self.rings.get(key)
+
+        if old is None:
+            ring = {
+                "key": key,
+                "ring_id": self._next_id(kind),
+                "members": members,
+                "pattern_type": pattern,
+                "risk_score": risk_score
+            }
+            self.rings[key] = ring
+            if kind == "shell":
+                self._index_shell(members, key)
+            diff["new"].append(ring)
+
+        elif set(old["members"]) != set(members):
+            old["members"] = members
+            diff["changed"].append(old)
+
+    def _drop(self, key, diff):
+
+        ring = self.rings.pop(key)
+        if key[0] == "shell":
+            self._index_shell(ring["members"], key, remove=True)
+        diff["removed"].append(ring["ring_id"])
+
+    def _update_rings(self, new_edges, touched):
+
+        diff = {"new": [], "changed": [], "removed": []}
+
+        # -------- Cycles: only through new edges; never go away --------
+        newly_cycled = set()
+
+        for u, v in new_edges:
+            cycles, complete = cycles_through_edge(self.succ, self.pred, u, v)
+            if not complete:
+                self.cycle_searches_truncated += 1
+
+            for cycle in cycles:
+                key = tuple(cycle)
+                if key not in self.rings:
+                    self._upsert(key, "cycle", f"cycle_length_{len(cycle)}", cycle, 95.0, diff)
+                    newly_cycled.update(m for m in cycle if m not in self.in_cycle)
+
+        self.in_cycle |= newly_cycled
+
+        # -------- Smurfing: touched accounts' windows, from the new rows on --------
+        for pattern, windows in (("smurfing_fan_out", self.fan_out), ("smurfing_fan_in", self.fan_in)):
+            for hub in touched:
+                key = (pattern, hub)
+                window = windows.get(hub)
+                counterparties = None
+
+                if window is not None and self._smurf_eligible(pattern, hub):
+                    counterparties = window.first_trip()
+
+                if counterparties is not None:
+                    self._upsert(key, "smurf", pattern, [hub] + counterparties, 93.0, diff)
+                elif key in self.rings:
+                    self._drop(key, diff)
+
+        # -------- Shell chains around touched / newly cycled nodes --------
+        affected = touched | newly_cycled
+
+        stale = set()
+        for node in affected:
+            stale |= self.shell_keys_by_member.get(node, set())
+
+        valid = {tuple(chain) for chain in self._shell_chains(self._shell_candidates(affected))}
+
+        for key in stale:
+            if key[1] not in valid:
+                self._drop(key, diff)
+
+        for chain in sorted(valid):
+            self._upsert(("shell", chain), "shell", "shell_layering", list(chain), 88.0, diff)
+
+        return diff
+
+    def _smurf_eligible(self, pattern, hub):
+        """detect_smurfing's pre-filter, from the running aggregates."""
+
+        in_count = int(self.received_count.data[hub])
+        out_count = int(self.sent_count.data[hub])
+
+        avg_in = self.received.data[hub] / max(in_count, 1)
+        avg_out = self.sent.data[hub] / max(out_count, 1)
+        fragmented = avg_in <= avg_out * FRAGMENTATION_RATIO
+
+        if pattern == "smurfing_fan_out":
+            # Dispersal must follow aggregation, otherwise it's payroll
+            return len(self.succ.get(hub, ())) >= SMURF_THRESHOLD and fragmented and in_count >= MIN_AGGREGATION
+
+        return len(self.pred.get(hub, ())) >= SMURF_THRESHOLD and fragmented and out_count >= 1
+
+    def _transactions(self):
+        """Stored transactions in detector form."""
+
+        src, dst, amount, seconds = (self.src.view(), self.dst.view(), self.amount.view(), self.seconds.view())
+
+        return pd.DataFrame({
+            "src": src.astype(np.int32),
+            "dst": dst.astype(np.int32),
+            "amount": amount,
+            "timestamp": seconds.astype("datetime64[s]")
+        })
+
+    def _rescan_rings(self):
+        """Run the batch detectors over everything and diff against the
+        current rings; cheaper than edge-by-edge work for large batches."""
+
+        diff = {"new": [], "changed": [], "removed": []}
+
+        tx = self._transactions()
+        graph = build_graph(tx, n_nodes=len(self.accounts))
+
+        cycles, truncated_sccs = detect_cycles(graph)
+        self.cycle_searches_truncated += truncated_sccs
+        smurf = detect_smurfing(tx)
+        shell = detect_shell_layers(graph, cycle_members(cycles))
+
+        seen = set()
+
+        for ring in cycles:
+            key = tuple(ring["members"])
+            seen.add(key)
+            self._upsert(key, "cycle", ring["pattern_type"], list(key), ring["risk_score"], diff)
+
+        self.in_cycle = cycle_members(cycles)
+
+        for ring in smurf:
+            key = (ring["pattern_type"], ring["members"][0])
+            seen.add(key)
+            self._upsert(key, "smurf", ring["pattern_type"], [int(m) for m in ring["members"]], ring["risk_score"], diff)
+
+        for ring in shell:
+            key = ("shell", tuple(ring["members"]))
+            seen.add(key)
+            self._upsert(key, "shell", ring["pattern_type"], list(key[1]), ring["risk_score"], diff)
+
+        for key in [k for k in self.rings if k not in seen]:
+            self._drop(key, diff)
+
+        return diff
+
+    def _index_shell(self, members, key, remove=False):
+        for m in members:
+            keys = self.shell_keys_by_member.setdefault(m, set())
+            if remove:
+                keys.discard(key)
+            else:
+                keys.add(key)
+
+    def _is_mid(self, node):
+        return (
+            len(self.pred.get(node, ())) == 1 and
+            len(self.succ.get(node, ())) == 1 and
+            node not in self.in_cycle
+        )
+
+    def _shell_candidates(self, affected):
+        """First-layer nodes of every chain an affected node could sit in."""
+
+        candidates = set()
+
+        for node in affected:
+            candidates.add(node)                    # as the first layer
+            candidates |= self.succ.get(node, set())  # as the start
+            for p in self.pred.get(node, ()):
+                candidates.add(p)                   # as the second layer
+                if len(self.pred.get(p, ())) == 1:
+                    candidates |= self.pred[p]      # as the end
+
+        return candidates
+
+    def _shell_chains(self, candidates):
+        """Same rule as detect_shell_layers, for chains through candidates."""
+
+        chains = []
+
+        for mid1 in candidates:
+            if not self._is_mid(mid1):
+                continue
+
+            (start,) = self.pred[mid1]
+            (mid2,) = self.succ[mid1]
+
+            degree = len(self.pred.get(start, ())) + len(self.succ.get(start, ()))
+            if degree <= 2 or start in self.in_cycle or not self._is_mid(mid2):
+                continue
+
+            (end,) = self.succ[mid2]
+            if end in self.in_cycle or start in self.succ.get(end, ()):
+                continue
+
+            chains.append([start, mid1, mid2, end])
+
+        return chains
+
+    # -----------------------------
+    # Views
+    # -----------------------------
+    def _ring_view(self, ring):
+        return {
+            "ring_id": ring["ring_id"],
+            "member_accounts": [self.accounts[m] for m in ring["members"]],
+            "pattern_type": ring["pattern_type"],
+            "risk_score": ring["risk_score"]
+        }
+
+    # Views run on request threads while a batch may be appending, so they
+    # read under the feed lock
+
+    def ring_views(self):
+        with self.lock:
+            return [self._ring_view(r) for r in self.rings.values()]
+
+    def summary(self):
+        with self.lock:
+            return {
+                "total_transactions": self.src.size,
+                "total_accounts": len(self.accounts),
+                "total_edges": self.n_edges,
+                "total_rings": len(self.rings),
+                "accounts_in_cycles": len(self.in_cycle),
+                "segments": self.segments,
+                # New-edge searches and rescanned SCCs that hit the cycle
+                # budget; when non-zero some cycle rings may be missing
+                "cycle_searches_truncated": self.cycle_searches_truncated
+            }
+
+    def account_activity(self, account_id):
+        """Running aggregates for one account, or None if never seen."""
+
+        with self.lock:
+            return self._account_activity(account_id)
+
+    def _account_activity(self, account_id):
+
+        code = self.account_code.get(account_id)
+        if code is None:
+            return None
+
+        return {
+            "account_id": account_id,
+            "sent": float(self.sent.data[code]),
+            "received": float(self.received.data[code]),
+            "sent_count": int(self.sent_count.data[code]),
+            "received_count": int(self.received_count.data[code]),
+            "in_degree": len(self.pred.get(code, ())),
+            "out_degree": len(self.succ.get(code, ())),
+            "first_ts": pd.Timestamp(int(self.first_seen.data[code]), unit="s"),
+            "last_ts": pd.Timestamp(int(self.last_seen.data[code]), unit="s"),
+            "in_cycle": code in self.in_cycle,
+            "ring_ids": [
+                r["ring_id"] for r in self.rings.values() if code in r["members"]
+            ]
+        }
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def _save_segment(self, new_accounts, tx_ids, src, dst, amount, seconds, diff):
+
+        self.segments += 1
+
+        if self.directory is None:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        def stored(ring):
+            return {k: v for k, v in ring.items() if k != "key"} | {"key": _key_to_json(ring["key"])}
+
+        ring_diff = json.dumps({
+            "upserts": [stored(r) for r in diff["new"] + diff["changed"]],
+            "removed": diff["removed"],
+            "counters": self.counters
+        })
+
+        path = os.path.join(self.directory, f"{self.segments:08d}{SEGMENT_SUFFIX}")
+        tmp_path = f"{path}.tmp"
+
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                new_accounts=np.array(new_accounts, dtype=str),
+                tx_ids=np.array(tx_ids, dtype=str),
+                src=src, dst=dst, amount=amount, seconds=seconds,
+                ring_diff=np.array(ring_diff)
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, directory):
+        """Rebuild a feed's state by replaying its segments."""
+
+        state = cls(directory)
+
+        if not os.path.isdir(directory):
+            return state
+
+        names = sorted(n for n in os.listdir(directory) if n.endswith(SEGMENT_SUFFIX))
+
+        for name in names:
+            with np.load(os.path.join(directory, name)) as segment:
+                for account in segment["new_accounts"].tolist():
+                    state.account_code[account] = len(state.accounts)
+                    state.accounts.append(account)
+
+                state._apply(
+                    segment["tx_ids"].tolist(),
+                    segment["src"], segment["dst"],
+                    segment["amount"], segment["seconds"]
+                )
+
+                state._replay_rings(json.loads(str(segment["ring_diff"])))
+                state._prune()
+
+            state.segments += 1
+
+        return state
+
+    def _replay_rings(self, ring_diff):
+
+        removed = set(ring_diff["removed"])
+        for key, ring in list(self.rings.items()):
+            if ring["ring_id"] in removed:
+                del self.rings[key]
+                if key[0] == "shell":
+                    self._index_shell(ring["members"], key, remove=True)
+
+        for ring in ring_diff["upserts"]:
+            key = _key_from_json(ring["key"])
+            ring = dict(ring, key=key)
+            self.rings[key] = ring
+
+            if ring["pattern_type"].startswith("cycle"):
+                self.in_cycle.update(ring["members"])
+            elif key[0] == "shell":
+                self._index_shell(ring["members"], key)
+
+        self.counters = ring_diff["counters"]
+
+
+def _key_to_json(key):
+    return [list(part) if isinstance(part, tuple) else part for part in key]
+
+
+def _key_from_json(key):
+    return tuple(tuple(part) if isinstance(part, list) else part for part in key)
+
+
+# -----------------------------
+# Feed Registry
+# -----------------------------
+_states = {}
+_states_lock = threading.Lock()
+
+
+def get_state(feed):
+    """The (lazily loaded) state for a feed name."""
+
+    if not FEED_NAME.match(feed):
+        raise ValueError("Feed names may only use letters, digits, '_' and '-'.")
+
+    with _states_lock:
+        state = _states.get(feed)
+        if state is None:
+            state = AnalysisState.load(os.path.join(INCREMENTAL_DIR, feed))
+            _states[feed] = state
+
+    return state
+
+
+def append_batch(feed, df):
+
+    state = get_state(feed)
+
+    with state.lock:
+        return state.append(df)
+
+
+def reset_feed(feed):
+
+    state = get_state(feed)
+
+    with state.lock:
+        if state.directory and os.path.isdir(state.directory):
+            for name in os.listdir(state.directory):
+                os.remove(os.path.join(state.directory, name))
+            os.rmdir(state.directory)
+
+        with _states_lock:
+            _states.pop(feed, None)
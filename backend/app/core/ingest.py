@@ -0,0 +1,282 @@
+import os
+import tempfile
+
+import pandas as pd
+
+from app.utils.validation import ACCOUNT_COLUMNS, blank_account_rows, missing_columns
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # columnar uploads are optional
+    pa = None
+
+
+SPOOL_CHUNK_BYTES = 1024 * 1024
+CSV_CHUNK_ROWS = 250_000
+
+CSV_SUFFIXES = (".csv", ".csv.gz", ".csv.zst", ".gz", ".zst")
+PARQUET_SUFFIXES = (".parquet", ".pq")
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+
+ACCEPTED_SUFFIXES = CSV_SUFFIXES + PARQUET_SUFFIXES + ARROW_SUFFIXES
+
+# Account ids are kept as strings even when they look numeric, so every
+# chunk parses to the same dtypes regardless of what it happens to contain.
+CSV_DTYPES = {
+    "transaction_id": str,
+    "sender_id": str,
+    "receiver_id": str,
+    "amount": "float64"
+}
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+PARQUET_MAGIC = b"PAR1"
+ARROW_FILE_MAGIC = b"ARROW1"
+ARROW_STREAM_MAGIC = b"\xff\xff\xff\xff"
+
+
+def is_supported_upload(filename):
+    return bool(filename) and filename.lower().endswith(ACCEPTED_SUFFIXES)
+
+
+# -----------------------------
+# Spooling
+# -----------------------------
+async def spool_upload(file, directory=None, digest=None):
+    """Copy an UploadFile to a temp file on disk in fixed-size chunks.
+
+    A hashlib `digest`, when given, is fed the same chunks on the way.
+    """
+
+    fd, path = tempfile.mkstemp(prefix="rift_upload_", dir=directory)
+
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(SPOOL_CHUNK_BYTES)
+                if not chunk:
+                    break
+                out.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+    except Exception:
+        os.remove(path)
+        raise
+
+    return path
+
+
+def discard_spool(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# -----------------------------
+# Format Detection
+# -----------------------------
+def detect_format(path):
+
+    with open(path, "rb") as fh:
+        magic = fh.read(6)
+
+    if magic.startswith(PARQUET_MAGIC):
+        return "parquet"
+
+    if magic == ARROW_FILE_MAGIC:
+        return "arrow"
+
+    if magic.startswith(ARROW_STREAM_MAGIC):
+        return "arrow_stream"
+
+    return "csv"
+
+
+def detect_compression(path):
+
+    with open(path, "rb") as fh:
+        magic = fh.read(4)
+
+    if magic.startswith(GZIP_MAGIC):
+        return "gzip"
+
+    if magic == ZSTD_MAGIC:
+        return "zstd"
+
+    return None
+
+
+# -----------------------------
+# CSV
+# -----------------------------
+def iter_csv_chunks(path, chunksize=CSV_CHUNK_ROWS):
+    """Yield typed, validated DataFrame chunks, decompressing on the fly."""
+
+    compression = detect_compression(path)
+
+    try:
+        reader = pd.read_csv(
+            path,
+            compression=compression,
+            dtype=CSV_DTYPES,
+            chunksize=chunksize
+        )
+    except ImportError:
+        raise ValueError(f"{compression} uploads are not supported on this server.")
+
+    with reader:
+        for chunk in reader:
+
+            missing = missing_columns(chunk.columns)
+            if missing:
+                raise ValueError(f"Missing columns: {missing}")
+
+            blank = blank_account_rows(chunk)
+            if blank:
+                raise ValueError(f"Rows with no sender_id or receiver_id: {blank}")
+
+            chunk["timestamp"] = pd.to_datetime(chunk["timestamp"])
+
+            yield chunk
+
+
+def read_transactions(path, chunksize=CSV_CHUNK_ROWS):
+    """Parse a CSV upload into one frame holding the whole upload.
+
+    Each chunk is copied out column by column, so no column keeps the
+    chunk's shared blocks alive and the chunk is freed before the next one
+    is parsed. Each column's pieces go as soon as that column is joined.
+    Peak memory is the finished frame plus one chunk and one column's
+    pieces. Only parsing is chunked: graph and aggregate building start
+    from the complete frame.
+    """
+
+    parts = {}
+
+    for chunk in iter_csv_chunks(path, chunksize=chunksize):
+        for name in chunk.columns:
+            parts.setdefault(name, []).append(chunk[name].copy())
+        del chunk
+
+    if not parts:
+        raise ValueError("Upload contains no transactions.")
+
+    columns = {}
+
+    for name in list(parts):
+        pieces = parts.pop(name)
+        columns[name] = (
+            pd.concat(pieces, ignore_index=True) if len(pieces) > 1
+            else pieces[0].reset_index(drop=True)
+        )
+        del pieces
+
+    return pd.DataFrame(columns, copy=False)
+
+
+# -----------------------------
+# Parquet / Arrow IPC
+# -----------------------------
+def read_columnar(path, fmt):
+    """Memory-map a Parquet or Arrow IPC file and hand it to pandas.
+
+    Numeric and timestamp columns are converted without going through text,
+    so the orchestrator receives an already-typed ``timestamp`` column.
+    """
+
+    if pa is None:
+        raise ValueError("Parquet/Arrow uploads require the 'pyarrow' package.")
+
+    if fmt == "parquet":
+        table = pq.read_table(path, memory_map=True)
+    else:
+        with pa.memory_map(path) as source:
+            if fmt == "arrow":
+                table = pa.ipc.open_file(source).read_all()
+            else:
+                table = pa.ipc.open_stream(source).read_all()
+
+    missing = missing_columns(table.column_names)
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    blank = pa.compute.sum(pa.compute.or_(
+        *(pa.compute.is_null(table.column(name)) for name in ACCOUNT_COLUMNS)
+    )).as_py()
+    if blank:
+        raise ValueError(f"Rows with no sender_id or receiver_id: {blank}")
+
+    table = _normalize_columns(table)
+
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _normalize_columns(table):
+
+    casts = {
+        "transaction_id": pa.string(),
+        "sender_id": pa.string(),
+        "receiver_id": pa.string(),
+        "amount": pa.float64()
+    }
+
+    for name, target in casts.items():
+        idx = table.schema.get_field_index(name)
+        column = table.column(idx)
+
+        if pa.types.is_large_string(column.type) or column.type == target:
+            continue
+
+        table = table.set_column(idx, name, column.cast(target))
+
+    idx = table.schema.get_field_index("timestamp")
+    column = table.column(idx)
+
+    if not pa.types.is_timestamp(column.type):
+        if pa.types.is_date(column.type):
+            column = column.cast(pa.timestamp("ms"))
+        else:
+            # Text timestamps are parsed once, here, rather than per request
+            column = pa.array(pd.to_datetime(column.to_pandas()))
+        table = table.set_column(idx, "timestamp", column)
+
+    return table
+
+
+# Rough sizing for admission control before the file is parsed
+CSV_BYTES_PER_ROW = 64
+COMPRESSION_RATIO = 5
+
+
+def estimate_rows(path):
+    """Cheap row-count estimate: Parquet footers are exact, others go by size."""
+
+    fmt = detect_format(path)
+
+    if fmt == "parquet" and pa is not None:
+        try:
+            return pq.ParquetFile(path).metadata.num_rows
+        except Exception:
+            pass
+
+    size = os.path.getsize(path)
+
+    if fmt == "csv" and detect_compression(path):
+        size *= COMPRESSION_RATIO
+
+    return size // CSV_BYTES_PER_ROW
+
+
+def read_upload(path):
+
+    fmt = detect_format(path)
+
+    if fmt == "csv":
+        return read_transactions(path)
+
+    return read_columnar(path, fmt)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+
+def intern_accounts(df):
+    """Replace sender/receiver strings with dense int32 account codes.
+
+    Returns the working transaction frame (``src``, ``dst``, ``amount``,
+    ``timestamp`` and ``is_fraud`` when present) and the reverse table
+    ``accounts`` where ``accounts[code]`` is the original account id.
+    Missing ids raise ValueError; ingest rejects them before this point.
+    """
+
+    n = len(df)
+
+    timestamps = df["timestamp"]
+    if getattr(timestamps.dt, "tz", None) is not None:
+        timestamps = timestamps.dt.tz_convert(None)
+
+    codes, accounts = pd.factorize(
+        pd.concat([df["sender_id"], df["receiver_id"]], ignore_index=True)
+    )
+
+    # factorize codes missing values as -1, which no graph array accepts
+    if len(codes) and codes.min() < 0:
+        raise ValueError("Transactions with a missing sender_id or receiver_id")
+
+    tx = pd.DataFrame({
+        "src": codes[:n].astype(np.int32),
+        "dst": codes[n:].astype(np.int32),
+        "amount": df["amount"].to_numpy(),
+        "timestamp": timestamps.to_numpy()
+    })
+
+    if "is_fraud" in df.columns:
+        tx["is_fraud"] = df["is_fraud"].to_numpy()
+
+    return tx, np.asarray(accounts, dtype=object)
+
+
+def account_ids(accounts, codes):
+    return accounts[np.asarray(codes, dtype=np.int64)].tolist()
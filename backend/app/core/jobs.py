@@ -0,0 +1,249 @@
+import asyncio
+import gzip
+import json
+import math
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.config import JOB_MAX_QUEUE, JOB_MEMORY_LIMIT_MB, JOB_WORKERS, JOBS_DIR
+from app.core.database import SessionLocal
+from app.core.ingest import estimate_rows, read_upload
+from app.core.orchestrator import run_analysis
+from app.core.result_cache import get_cache
+from app.core.worker_pool import (
+    AdmissionController,
+    AnalysisMemoryExceeded,
+    address_space_limit,
+    out_of_memory,
+    run_in_pool
+)
+from app.repositories.job_repo import get_job, unfinished_jobs, update_job
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="rift-job")
+
+# Jobs exist for uploads too big for /analyze, so only the queue is
+# bounded, not their size
+_admission = AdmissionController("jobs", JOB_WORKERS, JOB_MAX_QUEUE, math.inf, math.inf)
+
+
+# -----------------------------
+# Paths
+# -----------------------------
+def new_job_id():
+    return uuid.uuid4().hex
+
+
+def jobs_dir():
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    return JOBS_DIR
+
+
+def result_path(job_id):
+    return os.path.join(jobs_dir(), f"{job_id}.json.gz")
+
+
+def load_result(job):
+    with gzip.open(job.result_path, "rt") as f:
+        return json.load(f)
+
+
+def _write_result(job_id, results):
+
+    path = result_path(job_id)
+    tmp_path = f"{path}.tmp"
+
+    with gzip.open(tmp_path, "wt") as f:
+        json.dump(results, f)
+    os.replace(tmp_path, path)
+
+    return path
+
+
+# -----------------------------
+# Execution
+# -----------------------------
+def _update(job_id, **fields):
+
+    db = SessionLocal()
+    try:
+        update_job(db, job_id, **fields)
+    finally:
+        db.close()
+
+
+class _Progress:
+    """on_stage callback that mirrors stage progress into the job row.
+
+    Stages report from several scheduler threads at once.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.running = []
+        self.done = []
+        self._lock = threading.Lock()
+
+    def __call__(self, stage, state):
+
+        with self._lock:
+            if state == "running":
+                self.running.append(stage)
+            else:
+                self.running.remove(stage)
+                self.done.append(stage)
+
+            progress = json.dumps({"running": self.running, "done": self.done})
+
+            _update(self.job_id, progress=progress)
+
+
+def _analyze_job(job_id, path, filename, memory_limit_bytes):
+    """Worker side of a job: parse and analyze under the job memory cap."""
+
+    progress = _Progress(job_id)
+
+    with address_space_limit(memory_limit_bytes):
+        try:
+            progress("ingest", "running")
+            df = read_upload(path)
+            progress("ingest", "done")
+
+            return run_analysis(df, on_stage=progress, filename=filename)
+        except Exception as e:
+            if memory_limit_bytes and out_of_memory(e):
+                raise AnalysisMemoryExceeded("Job exceeds the per-job memory limit.")
+            raise
+
+
+def run_job(job_id, cache_key=None, rows=0):
+    """Analyze a queued job's spooled upload and persist the response.
+
+    Releases the admission slot `rows` was admitted with.
+    """
+
+    elapsed = None
+
+    try:
+        elapsed = _run_job(job_id, cache_key)
+    finally:
+        _admission.release(rows, elapsed)
+
+
+def _run_job(job_id, cache_key):
+
+    db = SessionLocal()
+    try:
+        job = get_job(db, job_id)
+    finally:
+        db.close()
+
+    if job is None:
+        return
+
+    _update(job_id, status="running", started_at=datetime.utcnow(), error=None)
+
+    cache = get_cache()
+
+    try:
+        # In a spawned worker with its own memory cap, not on this thread:
+        # jobs carry the uploads too big for /analyze
+        results = run_in_pool(
+            "jobs",
+            _analyze_job,
+            job_id,
+            job.upload_path,
+            job.filename,
+            JOB_MEMORY_LIMIT_MB * 1024 ** 2
+        )
+
+        if cache is not None and cache_key is not None:
+            cache.put(cache_key, results)
+
+        path = _write_result(job_id, results)
+
+    except Exception as e:
+        logger.exception("Job %s failed", job_id)
+        _update(job_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+        return
+
+    _update(job_id, status="succeeded", result_path=path, finished_at=datetime.utcnow())
+
+    try:
+        os.remove(job.upload_path)
+    except OSError:
+        pass
+
+    return results["summary"]["processing_time_seconds"]
+
+
+def finish_from_cache(job_id, results):
+    """Complete a job straight from a cached response."""
+
+    path = _write_result(job_id, results)
+    now = datetime.utcnow()
+
+    _update(
+        job_id,
+        status="succeeded",
+        result_path=path,
+        progress=json.dumps({"running": [], "done": ["cache"]}),
+        started_at=now,
+        finished_at=now
+    )
+
+
+async def admit_job(path):
+    """Admit a spooled upload to the job queue; returns its estimated rows.
+
+    Raises UploadRejected (429) while JOB_MAX_QUEUE jobs already wait.
+    """
+
+    rows = await asyncio.to_thread(estimate_rows, path)
+    _admission.admit(rows)
+
+    return rows
+
+
+def release_job(rows):
+    """Give back the slot of an admitted upload that never became a job."""
+    _admission.release(rows)
+
+
+def submit_job(job_id, cache_key=None, rows=0):
+    """Queue an admitted job; run_job gives its admission slot back."""
+    return _executor.submit(run_job, job_id, cache_key, rows)
+
+
+def resume_jobs():
+    """Re-queue jobs a restart interrupted; their uploads are still on disk."""
+
+    db = SessionLocal()
+    try:
+        jobs = unfinished_jobs(db)
+    finally:
+        db.close()
+
+    for job in jobs:
+        if job.upload_path and os.path.exists(job.upload_path):
+            _update(job.id, status="queued", progress=None)
+            # Accepted before the restart, so queued even over the limit
+            rows = estimate_rows(job.upload_path)
+            _admission.admit(rows, force=True)
+            submit_job(job.id, rows=rows)
+        else:
+            _update(
+                job.id,
+                status="failed",
+                error="Upload lost before the job could run.",
+                finished_at=datetime.utcnow()
+            )
+
+    if jobs:
+        logger.info("Resumed %d unfinished jobs", len(jobs))
@@ -0,0 +1,160 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import sklearn
+from joblib import Parallel, delayed
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from app.config import MODEL_N_JOBS, MODEL_PATH, SCORE_BATCH_SIZE
+
+
+FEATURE_COLUMNS = ["in_degree", "out_degree", "sent", "received"]
+
+
+class AnomalyModel:
+    """A fitted scaler + IsolationForest and the raw-score range it saw in
+    training, so ml_score means the same thing on every upload."""
+
+    def __init__(self, scaler, forest, score_min, score_max, n_samples):
+        self.scaler = scaler
+        self.forest = forest
+        self.score_min = score_min
+        self.score_max = score_max
+        self.n_samples = n_samples
+        self.trained_at = datetime.now(timezone.utc)
+        self.sklearn_version = sklearn.__version__
+
+    def raw_scores(self, X, n_jobs=MODEL_N_JOBS, batch_size=SCORE_BATCH_SIZE):
+
+        X_scaled = self.scaler.transform(X)
+
+        if len(X_scaled) <= batch_size:
+            return -self.forest.score_samples(X_scaled)
+
+        batches = [
+            X_scaled[i:i + batch_size]
+            for i in range(0, len(X_scaled), batch_size)
+        ]
+
+        # Tree traversal releases the GIL, so threads are enough here
+        parts = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(self.forest.score_samples)(batch) for batch in batches
+        )
+
+        return -np.concatenate(parts)
+
+    def normalize(self, raw):
+
+        normalized = 100 * (raw - self.score_min) / (self.score_max - self.score_min + 1e-8)
+
+        return np.clip(normalized, 0, 100)
+
+    def score(self, feature_df):
+        return self.normalize(self.raw_scores(feature_matrix(feature_df)))
+
+
+def feature_matrix(feature_df):
+    return feature_df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+
+
+def train_model(feature_df, n_estimators=200, contamination=0.05, n_jobs=MODEL_N_JOBS):
+    return fit_model(feature_matrix(feature_df), n_estimators, contamination, n_jobs)[0]
+
+
+def fit_model(X, n_estimators=200, contamination=0.05, n_jobs=MODEL_N_JOBS):
+    """Fit on X and also return X's raw scores, which the fit computes anyway."""
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    forest = IsolationForest(
+        n_estimators=n_estimators,
+        contamination=contamination,
+        random_state=42,
+        n_jobs=n_jobs
+    )
+    forest.fit(X_scaled)
+
+    # Higher anomaly → more negative → invert
+    raw = -forest.score_samples(X_scaled)
+
+    model = AnomalyModel(scaler, forest, float(raw.min()), float(raw.max()), len(X))
+
+    return model, raw
+
+
+# -----------------------------
+# Registry
+# -----------------------------
+_active_model = None
+
+
+def get_model():
+    return _active_model
+
+
+def save_model(model, path=MODEL_PATH):
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Write then rename, so a running server never loads half a file
+    tmp_path = f"{path}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_model(path=MODEL_PATH):
+    """Load the persisted model into the registry; None if there is none."""
+
+    global _active_model
+
+    if not os.path.exists(path):
+        return None
+
+    _active_model = joblib.load(path)
+
+    return _active_model
+
+
+def features_for_upload(path):
+
+    from app.core.activity import build_account_activity
+    from app.core.feature_engineering import build_node_features
+    from app.core.graph_builder import build_graph
+    from app.core.ingest import read_upload
+    from app.core.interning import intern_accounts
+
+    tx, accounts = intern_accounts(read_upload(path))
+    graph = build_graph(tx, n_nodes=len(accounts))
+
+    return build_node_features(build_account_activity(graph))
+
+
+def main(argv):
+    # python -m app.core.model_registry train <upload> [<upload> ...]
+    if len(argv) < 2 or argv[0] != "train":
+        print("usage: python -m app.core.model_registry train <file> [<file> ...]")
+        return 1
+
+    import pandas as pd
+
+    features = pd.concat(
+        [features_for_upload(path) for path in argv[1:]],
+        ignore_index=True
+    )
+
+    model = train_model(features)
+    save_model(model)
+
+    print(f"Trained on {model.n_samples} accounts, saved to {MODEL_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    # Import through the package so the pickled class path is importable
+    from app.core.model_registry import main as registry_main
+    sys.exit(registry_main(sys.argv[1:]))
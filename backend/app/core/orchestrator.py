@@ -1,223 +1,310 @@
 import time
+import numpy as np
 import pandas as pd
 
+from app.config import (
+    MAX_SUSPICIOUS_ACCOUNTS,
+    PARALLEL_MIN_ROWS,
+    STAGE_WORKERS,
+    WRITE_BEHIND
+)
+from app.core.interning import intern_accounts, account_ids
 from app.core.graph_builder import build_graph
 from app.core.cycle_detector import detect_cycles
 from app.core.smurf_detector import detect_smurfing
 from app.core.shell_detector import detect_shell_layers
+from app.core.activity import build_account_activity
+from app.core.partitioning import assign_ring_ids, cycle_members, partition_workers, run_partitioned
 from app.core.feature_engineering import build_node_features
 from app.core.scoring_model import compute_anomaly_scores
+from app.core.fraud_index import analysis_key, known_offenders
+from app.core.scheduler import Stage, run_stages
+from app.utils.logger import get_logger
+from app.utils.metrics import record_summary
+
+
+logger = get_logger(__name__)
+
+
+STRUCTURAL_SCORES = {
+    "cycle_length_3": 90,
+    "cycle_length_4": 93,
+    "cycle_length_5": 97,
+    "smurfing_fan_out": 94,
+    "smurfing_fan_in": 94,
+    "shell_layering": 88
+}
+
+ML_ANOMALY_THRESHOLD = 97
 
 
 # -----------------------------
 # Merchant / Payroll Shield
 # -----------------------------
-def is_legitimate_hub(node, graph, cycle_nodes):
+def legitimate_hub_mask(activity, in_cycle):
 
-    in_deg = graph.in_degree(node)
-    out_deg = graph.out_degree(node)
+    in_deg = activity["in_degree"].to_numpy()
+    out_deg = activity["out_degree"].to_numpy()
 
     # Payroll / structured merchant pattern
-    if (
-        out_deg >= 100 and
-        in_deg <= 5 and
-        node not in cycle_nodes
-    ):
-        return True
-    
-    # High-volume receiver (merchant pattern)
-    if (
-        in_deg >= 100 and
-        out_deg <= 5 and
-        node not in cycle_nodes
-    ):
-        return True
-    
-        return False
-    
+    return (out_deg >= 100) & (in_deg <= 5) & ~in_cycle
+
 
 # -----------------------------
 # Velocity Bonus
 # -----------------------------
-def compute_velocity_bonus(account_id, df):
+def compute_velocity_bonus(activity):
+    """Velocity bonus for every account at once, read off the activity index."""
 
-    user_tx = df[
-        (df["sender_id"] == account_id) |
-        (df["receiver_id"] == account_id)
-    ]
+    time_span = (
+        activity["last_ts"] - activity["first_ts"]
+    ).dt.total_seconds().to_numpy() / 3600
 
-    if len(user_tx) < 5:
-        return 0
+    bonus = np.select([time_span < 24, time_span < 72], [3, 1], default=0)
+    bonus[activity["tx_count"].to_numpy() < 5] = 0
 
-    time_span = (
-        user_tx["timestamp"].max() -
-        user_tx["timestamp"].min()
-    ).total_seconds() / 3600
-
-    if time_span < 24:
-        return 3
-    elif time_span < 72:
-        return 1
-    else:
-        return 0
+    return bonus
 
 
 # -----------------------------
-# Main Engine
+# Repeat Offender Bonus
 # -----------------------------
-import time
-import pandas as pd
+def compute_repeat_offender_bonus(times_flagged):
+    """Bonus for accounts earlier analyses already flagged."""
 
-from app.core.graph_builder import build_graph
-from app.core.cycle_detector import detect_cycles
-from app.core.smurf_detector import detect_smurfing
-from app.core.shell_detector import detect_shell_layers
-from app.core.feature_engineering import build_node_features
-from app.core.scoring_model import compute_anomaly_scores
+    return np.select([times_flagged >= 3, times_flagged >= 1], [5, 3], default=0)
 
 
 # -----------------------------
-# Merchant / Payroll Shield
+# Score Assembly
 # -----------------------------
-def is_legitimate_hub(node, graph, cycle_nodes):
+def assemble_scores(all_rings, ml_scores, activity, velocity_bonus, top_n=None,
+                    repeat_bonus=0):
+    """Final suspicion scores as column operations over every account.
 
-    in_deg = graph.in_degree(node)
-    out_deg = graph.out_degree(node)
+    Returns the emitted account codes (best first), their scores and the
+    index into all_rings of each one's first ring (-1 for ML-only hits).
+    """
 
-    if out_deg >= 100 and in_deg <= 5 and node not in cycle_nodes:
-        return True
+    n = len(activity)
 
-    return False
+    ml = np.zeros(n)
+    ml[ml_scores["account_id"].to_numpy()] = ml_scores["ml_score"].to_numpy()
 
+    sizes = [len(r["members"]) for r in all_rings]
+    members = np.fromiter(
+        (m for r in all_rings for m in r["members"]),
+        dtype=np.int64,
+        count=sum(sizes)
+    )
+    member_ring = np.repeat(np.arange(len(all_rings)), sizes)
 
-# -----------------------------
-# Velocity Bonus
-# -----------------------------
-def compute_velocity_bonus(account_id, df):
+    # First ring an account appears in wins, as with dict.setdefault
+    first_ring = np.full(n, -1)
+    unique_members, first_pos = np.unique(members, return_index=True)
+    first_ring[unique_members] = member_ring[first_pos]
 
-    user_tx = df[
-        (df["sender_id"] == account_id) |
-        (df["receiver_id"] == account_id)
-    ]
+    repetitions = np.bincount(members, minlength=n)
 
-    if len(user_tx) < 5:
-        return 0
+    is_cycle_ring = np.array(
+        [r["pattern_type"].startswith("cycle") for r in all_rings], dtype=bool
+    )
+    in_cycle = np.zeros(n, dtype=bool)
+    in_cycle[members[is_cycle_ring[member_ring]]] = True
 
-    time_span = (
-        user_tx["timestamp"].max() -
-        user_tx["timestamp"].min()
-    ).total_seconds() / 3600
-
-    if time_span < 24:
-        return 3
-    elif time_span < 72:
-        return 1
-    else:
-        return 0
+    ring_structural = np.array(
+        [STRUCTURAL_SCORES.get(r["pattern_type"], 0) for r in all_rings] + [0]
+    )
+
+    in_ring = first_ring >= 0
+    structural = ring_structural[first_ring]  # -1 picks the trailing 0
+
+    emit = (
+        ~legitimate_hub_mask(activity, in_cycle) &
+        (in_ring | (ml >= ML_ANOMALY_THRESHOLD))
+    )
+
+    final = (
+        0.8 * structural +
+        0.2 * ml +
+        velocity_bonus +
+        repeat_bonus +
+        np.where(repetitions > 1, 2, 0)
+    )
+    final = np.minimum(np.round(final, 2), 100)
+
+    emitted = np.flatnonzero(emit)
+    scores = final[emitted]
+
+    if top_n and len(emitted) > top_n:
+        keep = np.argpartition(-scores, top_n - 1)[:top_n]
+        emitted, scores = emitted[keep], scores[keep]
+        keep = np.argsort(emitted, kind="stable")
+        emitted, scores = emitted[keep], scores[keep]
+
+    order = np.argsort(-scores, kind="stable")
+
+    return emitted[order], scores[order], first_ring[emitted[order]]
 
 
 # -----------------------------
-# MAIN ENGINE
+# Pipeline Stages
 # -----------------------------
-def run_analysis(df: pd.DataFrame):
-
-    from app.core.database import SessionLocal
-    from app.repositories.analysis_repo import save_analysis
-    from app.repositories.fraud_account_repo import update_fraud_account
+def analysis_stages(n_accounts, parallel, top_n):
+    """The run_analysis DAG. Smurfing only needs tx, and activity/ML don't
+    wait on ring detection, so those branches overlap."""
 
-    start_time = time.time()
+    stages = [
+        Stage("graph", lambda tx: build_graph(tx, n_nodes=n_accounts), ["tx"])
+    ]
 
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    graph = build_graph(df)
+    if parallel:
+        # Shards run every detector together, in the process pool
+        stages += [
+            Stage("detect", run_partitioned, ["graph", "tx"]),
+            Stage("cycles", lambda found: (found[0], found[4]), ["detect"]),
+            Stage("smurf", lambda found: found[1], ["detect"]),
+            Stage("shell", lambda found: found[2], ["detect"]),
+            Stage("activity", lambda found: found[3], ["detect"])
+        ]
+    else:
+        stages += [
+            Stage("cycles", detect_cycles, ["graph"]),
+            Stage("smurf", detect_smurfing, ["tx"]),
+            Stage(
+                "shell",
+                lambda graph, cycles: detect_shell_layers(graph, cycle_members(cycles[0])),
+                ["graph", "cycles"]
+            ),
+            Stage("activity", build_account_activity, ["graph"])
+        ]
+
+    stages += [
+        Stage("analysis_key", analysis_key, ["tx", "accounts"]),
+        Stage("prior", known_offenders, ["accounts", "analysis_key"]),
+        Stage("features", build_node_features, ["activity"]),
+        Stage("ml", compute_anomaly_scores, ["features"]),
+        Stage(
+            "scoring",
+            lambda cycles, smurf, shell, ml_scores, activity, prior: score_rings(
+                cycles[0], smurf, shell, ml_scores, activity, prior, top_n
+            ),
+            ["cycles", "smurf", "shell", "ml", "activity", "prior"]
+        )
+    ]
 
-    # -------- 1️⃣ Cycles --------
-    cycle_rings = detect_cycles(graph)
+    return stages
 
-    cycle_nodes = set()
-    for ring in cycle_rings:
-        cycle_nodes.update(ring["members"])
 
-    # -------- 2️⃣ Smurf --------
-    smurf_rings = detect_smurfing(df)
+def score_rings(cycle_rings, smurf_rings, shell_rings, ml_scores, activity, prior, top_n):
 
-    # -------- 3️⃣ Shell --------
-    shell_rings = detect_shell_layers(graph, cycle_nodes)
+    assign_ring_ids(cycle_rings, "RING_{:03d}")
+    assign_ring_ids(smurf_rings, "RING_S_{:03d}")
+    assign_ring_ids(shell_rings, "RING_L_{}", start=500)
 
     all_rings = cycle_rings + smurf_rings + shell_rings
 
-    ring_lookup = {}
-    repetition_count = {}
+    emitted, scores, emitted_rings = assemble_scores(
+        all_rings,
+        ml_scores,
+        activity,
+        compute_velocity_bonus(activity),
+        top_n=top_n,
+        repeat_bonus=compute_repeat_offender_bonus(prior[0])
+    )
 
-    for ring in all_rings:
-        for member in ring["members"]:
-            ring_lookup.setdefault(member, ring)
-            repetition_count[member] = repetition_count.get(member, 0) + 1
+    return all_rings, emitted, scores, emitted_rings
 
-    # -------- 4️⃣ ML Scoring --------
-    feature_df = build_node_features(graph, df)
-    ml_scores = compute_anomaly_scores(feature_df)
 
-    suspicious_accounts = []
+# -----------------------------
+# MAIN ENGINE
+# -----------------------------
+def run_analysis(df: pd.DataFrame, parallel=None, top_n=MAX_SUSPICIOUS_ACCOUNTS, on_stage=None,
+                 filename=None, accounts=None):
+    """Detect rings and score accounts in one upload.
 
-    for _, row in ml_scores.iterrows():
+    `on_stage(name, state)` is called as each stage starts ("running")
+    and finishes ("done"), for progress reporting. The run is stored
+    under a new upload id (`summary["upload_id"]`) labelled `filename`;
+    with write-behind on, GET /uploads/{id} shows when it is durable.
 
-        account_id = row["account_id"]
-        ml_score = float(row["ml_score"])
+    With `accounts` given, `df` is already interned (src/dst codes into
+    `accounts`, as intern_accounts returns) and its rows aren't stored
+    again.
+    """
 
-        if is_legitimate_hub(account_id, graph, cycle_nodes):
-            continue
+    from app.core.persistence import persist_analysis
 
-        structural_score = 0
-        pattern_type = None
-        ring_id = ""
+    start_time = time.time()
 
-        if account_id in ring_lookup:
-            ring = ring_lookup[account_id]
-            pattern_type = ring["pattern_type"]
-            ring_id = ring["ring_id"]
+    # Chunked CSV and columnar ingest already deliver typed timestamps
+    if not pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
 
-            if "cycle_length_3" in pattern_type:
-                structural_score = 90
-            elif "cycle_length_4" in pattern_type:
-                structural_score = 93
-            elif "cycle_length_5" in pattern_type:
-                structural_score = 97
-            elif "smurf" in pattern_type:
-                structural_score = 94
-            elif "shell" in pattern_type:
-                structural_score = 88
+    # Every detector below works on int32 account codes; strings only
+    # come back from `accounts` when the response is built.
+    if on_stage:
+        on_stage("intern", "running")
 
-        else:
-            if ml_score < 97:
-                continue
-            pattern_type = "ml_anomaly"
-            ring_id = f"RING_ML_{account_id}"
+    intern_start = time.perf_counter()
+    if accounts is None:
+        tx, accounts = intern_accounts(df)
+        transactions = df
+    else:
+        tx, transactions = df, None
+    intern_seconds = round(time.perf_counter() - intern_start, 4)
+
+    if on_stage:
+        on_stage("intern", "done")
+
+    if parallel is None:
+        parallel = partition_workers() > 1 and len(tx) >= PARALLEL_MIN_ROWS
+
+    # -------- 1️⃣ Cycles  2️⃣ Smurf  3️⃣ Shell  4️⃣ ML --------
+    # Independent stages run concurrently; partitioned mode shards the
+    # detectors by weakly connected component, with identical results.
+    results, stage_timings = run_stages(
+        analysis_stages(len(accounts), parallel, top_n),
+        inputs={"tx": tx, "accounts": accounts},
+        max_workers=STAGE_WORKERS,
+        on_stage=on_stage
+    )
 
-        velocity_bonus = compute_velocity_bonus(account_id, df)
-        repetition_bonus = 2 if repetition_count.get(account_id, 0) > 1 else 0
+    stage_timings = {"intern": {"wall_seconds": intern_seconds}, **stage_timings}
 
-        final_score = (
-            0.8 * structural_score +
-            0.2 * ml_score +
-            velocity_bonus +
-            repetition_bonus
-        )
+    graph = results["graph"]
+    cycle_rings, cycles_truncated = results["cycles"]
 
-        final_score = min(round(final_score, 2), 100)
+    if cycles_truncated:
+        logger.warning("Cycle search stopped early in %d SCCs; cycle rings are incomplete", cycles_truncated)
+    smurf_rings = results["smurf"]
+    shell_rings = results["shell"]
+    all_rings, emitted, scores, emitted_rings = results["scoring"]
+    times_flagged = results["prior"][0]
+
+    # Dicts (and account strings) only for the accounts we emit
+    suspicious_accounts = []
+
+    for account, score, ring_idx, prior_flags in zip(
+        accounts[emitted].tolist(), scores.tolist(), emitted_rings.tolist(),
+        times_flagged[emitted].tolist()
+    ):
+        if ring_idx >= 0:
+            ring = all_rings[ring_idx]
+            pattern_type = ring["pattern_type"]
+            ring_id = ring["ring_id"]
+        else:
+            pattern_type = "ml_anomaly"
+            ring_id = f"RING_ML_{account}"
 
         suspicious_accounts.append({
-            "account_id": account_id,
-            "suspicion_score": final_score,
+            "account_id": account,
+            "suspicion_score": score,
             "detected_patterns": [pattern_type],
-            "ring_id": ring_id
+            "ring_id": ring_id,
+            "prior_flags": prior_flags
         })
 
-    suspicious_accounts = sorted(
-        suspicious_accounts,
-        key=lambda x: x["suspicion_score"],
-        reverse=True
-    )
-
     # -----------------------------
     # METRIC CALCULATION (if ground truth exists)
     # -----------------------------
@@ -225,9 +312,9 @@ def run_analysis(df: pd.DataFrame):
     recall = None
     false_positive_rate = None
     
-    if "is_fraud" in df.columns:
-        flagged_ids = set([a["account_id"] for a in suspicious_accounts])
-        true_fraud_ids = set(df[df["is_fraud"] == 1]["sender_id"].unique())
+    if "is_fraud" in tx.columns:
+        flagged_ids = set(emitted.tolist())
+        true_fraud_ids = set(tx[tx["is_fraud"] == 1]["src"].unique().tolist())
     
         tp = len(flagged_ids & true_fraud_ids)
         fp = len(flagged_ids - true_fraud_ids)
@@ -237,53 +324,71 @@ def run_analysis(df: pd.DataFrame):
         recall = round(tp / (tp + fn + 1e-8), 3)
         false_positive_rate = round(fp / (tp + fp + 1e-8), 3)
     
+    fraud_rings = [
+        {
+            "ring_id": r["ring_id"],
+            "member_accounts": account_ids(accounts, r["members"]),
+            "pattern_type": r["pattern_type"],
+            "risk_score": r["risk_score"]
+        } for r in all_rings
+    ]
+
     summary = {
+        "total_transactions_analyzed": len(tx),
+        "total_edges_analyzed": graph.number_of_edges(),
         "total_accounts_analyzed": graph.number_of_nodes(),
         "suspicious_accounts_flagged": len(suspicious_accounts),
         "fraud_rings_detected": len(all_rings),
+        # SCCs whose cycle search hit its cap or time budget; when non-zero
+        # the cycle rings are incomplete
+        "cycle_sccs_truncated": cycles_truncated,
+        "known_offenders_seen": int(np.count_nonzero(times_flagged)),
+        "analysis_key": results["analysis_key"],
         "processing_time_seconds": round(time.time() - start_time, 3),
         "precision": precision,
         "recall": recall,
-        "false_positive_rate": false_positive_rate
+        "false_positive_rate": false_positive_rate,
+        "stage_timings": stage_timings
     }
 
     # -----------------------------
     # DATABASE SAVE
     # -----------------------------
-    db = SessionLocal()
-
-    try:
-        # Save summary
-        record = save_analysis(
-            db=db,
-            graph_id="AUTO",
-            risk_score=float(summary["suspicious_accounts_flagged"]),
-            cycle=len(cycle_rings),
-            smurf=len(smurf_rings),
-            shell=len(shell_rings)
-        )
+    # Only the upload row is written here; the rest goes to the
+    # write-behind writer so the response doesn't wait on the database
+    if on_stage:
+        on_stage("db_save", "running")
+
+    db_start = time.perf_counter()
+
+    upload_id = persist_analysis(
+        filename,
+        {"cycle": len(cycle_rings), "smurf": len(smurf_rings), "shell": len(shell_rings)},
+        fraud_rings,
+        suspicious_accounts,
+        transactions,
+        graph=(tx, accounts, all_rings),
+        # Re-analysing the same transactions doesn't count their flags twice
+        analysis_key=results["analysis_key"]
+    )
+
+    stage_timings["db_save"] = {
+        "wall_seconds": round(time.perf_counter() - db_start, 4)
+    }
 
-        # Save / update repeat fraudsters
-        for account in suspicious_accounts:
-            update_fraud_account(db, account)
+    summary["upload_id"] = upload_id
+    summary["persistence"] = "pending" if WRITE_BEHIND else "completed"
 
-        print("Saved Analysis ID:", record.id)
+    if on_stage:
+        on_stage("db_save", "done")
 
-    finally:
-        db.close()
+    record_summary(summary)
 
     # -----------------------------
     # RETURN RESPONSE
     # -----------------------------
     return {
         "suspicious_accounts": suspicious_accounts,
-        "fraud_rings": [
-            {
-                "ring_id": r["ring_id"],
-                "member_accounts": r["members"],
-                "pattern_type": r["pattern_type"],
-                "risk_score": r["risk_score"]
-            } for r in all_rings
-        ],
+        "fraud_rings": fraud_rings,
         "summary": summary
     }
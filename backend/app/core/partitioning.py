@@ -0,0 +1,176 @@
+import heapq
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.sparse.csgraph import connected_components
+
+from app.config import ANALYSIS_WORKERS, JOB_WORKERS, POOL_WORKERS, SHARDS_PER_WORKER
+from app.core.graph_builder import build_graph
+from app.core.cycle_detector import detect_cycles
+from app.core.smurf_detector import detect_smurfing
+from app.core.shell_detector import detect_shell_layers
+from app.core.activity import build_account_activity
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def partition_workers():
+    """Shard processes available to one analysis. Inside an analysis or job
+    pool worker the CPUs are split between the pool's workers, so a busy
+    pool doesn't start cpu_count processes per worker."""
+
+    if multiprocessing.parent_process() is None:
+        return ANALYSIS_WORKERS
+
+    return max(1, ANALYSIS_WORKERS // (POOL_WORKERS + JOB_WORKERS))
+
+
+def get_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: this runs from scheduler threads while other
+            # stages may hold DB, logging or allocator locks
+            _pool = ProcessPoolExecutor(
+                max_workers=partition_workers(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+    return _pool
+
+
+# -----------------------------
+# Detectors (shared by both modes)
+# -----------------------------
+def cycle_members(cycle_rings):
+
+    cycle_nodes = set()
+    for ring in cycle_rings:
+        cycle_nodes.update(ring["members"])
+
+    return cycle_nodes
+
+
+def run_detectors(graph, tx):
+
+    cycle_rings, cycles_truncated = detect_cycles(graph)
+    smurf_rings = detect_smurfing(tx)
+    shell_rings = detect_shell_layers(graph, cycle_members(cycle_rings))
+    activity = build_account_activity(graph)
+
+    return cycle_rings, smurf_rings, shell_rings, activity, cycles_truncated
+
+
+def assign_ring_ids(rings, template, start=1):
+    """Order rings by their members and number them, so the ids don't
+    depend on SCC discovery order or on how the graph was sharded."""
+
+    rings.sort(key=lambda r: (len(r["members"]), [int(m) for m in r["members"]]))
+
+    for index, ring in enumerate(rings, start):
+        ring["ring_id"] = template.format(index)
+
+    return rings
+
+
+# -----------------------------
+# Sharding by Weakly Connected Component
+# -----------------------------
+def partition_components(graph, tx, n_shards):
+    """Map each account to a shard; no transaction crosses two shards."""
+
+    _, labels = connected_components(
+        graph.to_scipy(), directed=True, connection="weak"
+    )
+
+    # Cost of a component is its number of transactions
+    cost = np.bincount(labels[tx["src"].to_numpy()], minlength=labels.max() + 1)
+
+    component_shard = np.zeros(len(cost), dtype=np.int32)
+    bins = [(0, shard) for shard in range(n_shards)]
+
+    order = np.argsort(-cost, kind="stable")
+
+    # Longest-processing-time first: biggest components go to the emptiest bin
+    for component, weight in zip(order.tolist(), cost[order].tolist()):
+        load, shard = bins[0]
+        component_shard[component] = shard
+        heapq.heapreplace(bins, (load + weight, shard))
+
+    return component_shard[labels]
+
+
+def analyze_shard(tx, nodes):
+    """Worker entry point: tx uses shard-local codes, nodes maps them back."""
+
+    graph = build_graph(tx, n_nodes=len(nodes))
+
+    cycle_rings, smurf_rings, shell_rings, activity, cycles_truncated = run_detectors(graph, tx)
+
+    for ring in cycle_rings + smurf_rings + shell_rings:
+        ring["members"] = nodes[np.asarray(ring["members"], dtype=np.int64)].tolist()
+
+    activity.index = pd.Index(nodes, name="account")
+
+    return cycle_rings, smurf_rings, shell_rings, activity, cycles_truncated
+
+
+def run_partitioned(graph, tx, workers=None):
+
+    if workers is None:
+        workers = partition_workers()
+
+    n_shards = max(1, workers * SHARDS_PER_WORKER)
+    node_shard = partition_components(graph, tx, n_shards)
+    row_shard = node_shard[tx["src"].to_numpy()]
+
+    node_groups = _group_by(node_shard, n_shards)
+    row_groups = _group_by(row_shard, n_shards)
+
+    pool = get_pool()
+    futures = []
+
+    for nodes, rows in zip(node_groups, row_groups):
+
+        if len(nodes) == 0:
+            continue
+
+        nodes = nodes.astype(np.int32)
+        shard_tx = tx.iloc[rows].reset_index(drop=True)
+
+        # nodes is sorted, so local codes keep the global ordering
+        shard_tx["src"] = np.searchsorted(nodes, shard_tx["src"].to_numpy()).astype(np.int32)
+        shard_tx["dst"] = np.searchsorted(nodes, shard_tx["dst"].to_numpy()).astype(np.int32)
+
+        futures.append(pool.submit(analyze_shard, shard_tx, nodes))
+
+    cycle_rings, smurf_rings, shell_rings, activities = [], [], [], []
+    cycles_truncated = 0
+
+    # Collect in submission order so the merge is deterministic
+    for future in futures:
+        cycles, smurfs, shells, activity, truncated = future.result()
+        cycle_rings.extend(cycles)
+        smurf_rings.extend(smurfs)
+        shell_rings.extend(shells)
+        activities.append(activity)
+        cycles_truncated += truncated
+
+    activity = pd.concat(activities).sort_index()
+
+    return cycle_rings, smurf_rings, shell_rings, activity, cycles_truncated
+
+
+def _group_by(keys, n_groups):
+    """Split positions 0..len(keys)-1 into n_groups sorted index arrays."""
+
+    order = np.argsort(keys, kind="stable")
+    bounds = np.searchsorted(keys[order], np.arange(1, n_groups))
+
+    return np.split(order, bounds)
@@ -0,0 +1,210 @@
+import atexit
+import multiprocessing.util
+import queue
+import threading
+import time
+
+from app.config import (
+    GRAPH_INDEX_ENABLED,
+    PERSIST_TRANSACTIONS,
+    WRITE_BEHIND,
+    WRITE_BEHIND_MAX_PENDING
+)
+from app.core.database import SessionLocal
+from app.core.fraud_index import record_flags
+from app.core.graph_index import save_graph_index
+from app.repositories.analysis_repo import save_analysis
+from app.repositories.fraud_account_repo import upsert_fraud_accounts
+from app.repositories.upload_repo import (
+    create_upload,
+    interrupt_pending_uploads,
+    save_upload_results,
+    set_upload_status
+)
+from app.utils.logger import get_logger
+from app.utils.metrics import PERSIST_QUEUE_DEPTH, PERSIST_SECONDS, PERSIST_WRITES
+
+
+logger = get_logger(__name__)
+
+
+# -----------------------------
+# Writing One Analysis
+# -----------------------------
+def write_analysis(upload_id, ring_counts, fraud_rings, suspicious_accounts, transactions=None,
+                   graph=None, analysis_key=None):
+    """Summary row, repeat fraudsters and the upload's tables in one transaction.
+
+    `graph` is (tx, accounts, rings) to also save the subgraph index,
+    written first so a "completed" upload always has one. Repeat-fraudster
+    counts move once per `analysis_key`. The upload ends up "completed",
+    or "failed" when the write raised.
+    """
+
+    started = time.perf_counter()
+    db = SessionLocal()
+
+    try:
+        if graph is not None:
+            save_graph_index(upload_id, *graph)
+
+        record = save_analysis(
+            db=db,
+            graph_id="AUTO",
+            risk_score=float(len(suspicious_accounts)),
+            cycle=ring_counts["cycle"],
+            smurf=ring_counts["smurf"],
+            shell=ring_counts["shell"],
+            commit=False
+        )
+
+        upsert_fraud_accounts(db, suspicious_accounts, upload_key=analysis_key)
+
+        save_upload_results(
+            db,
+            upload_id,
+            fraud_rings,
+            suspicious_accounts,
+            transactions=transactions
+        )
+
+        # Read before commit expires the instance and close detaches it
+        record_id = record.id
+
+        db.commit()
+
+    except Exception:
+        db.rollback()
+        PERSIST_WRITES.labels(outcome="failed").inc()
+        logger.exception("Writing upload %s failed", upload_id)
+
+        try:
+            set_upload_status(db, upload_id, "failed")
+            db.commit()
+        except Exception:
+            db.rollback()
+        raise
+
+    finally:
+        db.close()
+
+    PERSIST_WRITES.labels(outcome="completed").inc()
+    PERSIST_SECONDS.observe(time.perf_counter() - started)
+    logger.info("Saved analysis %s as upload %s", record_id, upload_id)
+
+
+# -----------------------------
+# Write-Behind Queue
+# -----------------------------
+class WriteBehindQueue:
+    """One writer thread draining finished analyses into the database.
+
+    A single writer keeps SQLite to one write transaction per process;
+    the bounded queue makes run_analysis wait once the writer falls
+    `max_pending` analyses behind, instead of holding every frame.
+    """
+
+    def __init__(self, max_pending):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_writer(self):
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="rift-db-writer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, write, *args):
+        self._ensure_writer()
+        self._queue.put((write, args))
+        PERSIST_QUEUE_DEPTH.set(self._queue.unfinished_tasks)
+
+    def _run(self):
+
+        while True:
+            write, args = self._queue.get()
+            try:
+                write(*args)
+            except Exception:
+                logger.exception("Write-behind task %s failed", getattr(write, "__name__", write))
+            finally:
+                self._queue.task_done()
+                PERSIST_QUEUE_DEPTH.set(self._queue.unfinished_tasks)
+
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    def flush(self):
+        """Block until everything submitted so far is written."""
+
+        if self._thread is not None:
+            self._queue.join()
+
+
+_writer = WriteBehindQueue(WRITE_BEHIND_MAX_PENDING)
+
+# The writer is a daemon thread: drain it on interpreter exit, and in
+# pool workers, which leave through multiprocessing rather than atexit
+atexit.register(_writer.flush)
+multiprocessing.util.Finalize(None, _writer.flush, exitpriority=10)
+
+
+def persist_analysis(filename, ring_counts, fraud_rings, suspicious_accounts, transactions,
+                     graph=None, analysis_key=None):
+    """Register the upload and queue its results; returns the upload id.
+
+    Only the upload row is written before returning. Its status moves
+    from "pending" to "completed" (or "failed") once the writer is done.
+    """
+
+    db = SessionLocal()
+    try:
+        upload_id = create_upload(db, filename)
+    finally:
+        db.close()
+
+    # The next analysis in this process sees these flags even if the
+    # writer hasn't committed them yet
+    record_flags(suspicious_accounts, analysis_key)
+
+    args = (
+        upload_id,
+        ring_counts,
+        fraud_rings,
+        suspicious_accounts,
+        transactions if PERSIST_TRANSACTIONS else None,
+        graph if GRAPH_INDEX_ENABLED else None,
+        analysis_key
+    )
+
+    if WRITE_BEHIND:
+        _writer.submit(write_analysis, *args)
+    else:
+        write_analysis(*args)
+
+    return upload_id
+
+
+def flush_writes():
+    _writer.flush()
+
+
+def pending_writes():
+    return _writer.pending()
+
+
+def recover_pending_uploads():
+    """Uploads left "pending" by a previous process never got written."""
+
+    db = SessionLocal()
+    try:
+        count = interrupt_pending_uploads(db)
+    finally:
+        db.close()
+
+    if count:
+        logger.warning("Marked %d unwritten uploads as interrupted", count)
@@ -0,0 +1,259 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.config import (
+    KNOWN_FRAUD_ENABLED,
+    MAX_SUSPICIOUS_ACCOUNTS,
+    MODEL_MODE,
+    RESULT_CACHE_DIR,
+    RESULT_CACHE_DISK_BYTES,
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_MEMORY_ENTRIES
+)
+from app.core.fraud_index import flag_history
+from app.core.model_registry import get_model
+from app.utils.metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES
+
+
+# Bump whenever detector or scoring output changes for the same input,
+# so stale responses stop matching
+ANALYSIS_VERSION = "3"
+
+
+# -----------------------------
+# Cache Keys
+# -----------------------------
+def upload_digest():
+    """Hash object spool_upload feeds with the raw upload bytes."""
+    return hashlib.sha256()
+
+
+def analysis_fingerprint():
+    """Everything besides the upload bytes that changes the response."""
+
+    model = get_model()
+
+    return {
+        "version": ANALYSIS_VERSION,
+        "top_n": MAX_SUSPICIOUS_ACCOUNTS,
+        "model_mode": MODEL_MODE,
+        "model": model.trained_at.isoformat() if model is not None else None,
+        # Whether repeat offenders are boosted at all; the history itself
+        # is checked per entry, see history_matches
+        "known_fraud": KNOWN_FRAUD_ENABLED
+    }
+
+
+def cache_key(digest):
+    """Key for an upload: its content hash plus the analysis fingerprint."""
+
+    key = hashlib.sha256(digest.digest())
+    key.update(json.dumps(analysis_fingerprint(), sort_keys=True).encode())
+
+    return key.hexdigest()
+
+
+# -----------------------------
+# Known-Fraud History
+# -----------------------------
+def _flag_history(response):
+    """Prior flags of the listed accounts, the epoch and whether the
+    response was cut to top_n; None when there is no history to check.
+
+    Flags written by the analysis itself are left out, so storing a
+    response never makes it stale.
+    """
+
+    key = response["summary"].get("analysis_key")
+    ids = [a["account_id"] for a in response["suspicious_accounts"]]
+
+    history = flag_history(ids, key) if key is not None else None
+    if history is None:
+        return None
+
+    times, epoch = history
+    truncated = bool(MAX_SUSPICIOUS_ACCOUNTS) and len(ids) >= MAX_SUSPICIOUS_ACCOUNTS
+
+    return times, epoch, truncated
+
+
+def history_matches(entry):
+    """Whether flags from other datasets still give the stored response.
+
+    Only the listed accounts' prior flags are compared, so an upload that
+    flags unrelated accounts leaves every other entry valid. A response
+    cut to top_n also depends on accounts it doesn't list, so it is only
+    kept while no other dataset's flags arrive.
+    """
+
+    if entry.get("history") is None:
+        return True
+
+    current = _flag_history(entry["response"])
+    if current is None:
+        return True
+
+    times, epoch, truncated = current
+    listed = [a["prior_flags"] for a in entry["response"]["suspicious_accounts"]]
+
+    if not np.array_equal(times, listed):
+        return False
+
+    return not truncated or epoch == entry["history"]["epoch"]
+
+
+# -----------------------------
+# Two-Tier Cache
+# -----------------------------
+class ResultCache:
+    """Analysis responses keyed by cache_key.
+
+    A small in-memory LRU sits in front of gzipped JSON files on disk; the
+    disk tier evicts least recently used files once it exceeds max_bytes.
+    An entry whose known-fraud history moved on is a miss.
+    """
+
+    def __init__(self, directory, memory_entries, max_bytes):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json.gz")
+
+    def _remember(self, key, response):
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        tier = "memory"
+
+        if entry is None:
+            path = self._path(key)
+            try:
+                with gzip.open(path, "rt") as f:
+                    entry = json.load(f)
+                os.utime(path)  # disk eviction is by last use
+            except (OSError, ValueError):
+                entry = None
+            tier = "disk"
+
+        if entry is None or not history_matches(entry):
+            with self._lock:
+                self.stats["misses"] += 1
+            CACHE_MISSES.inc()
+            return None
+
+        with self._lock:
+            self._remember(key, entry)
+            self._hit(tier)
+
+        return entry["response"]
+
+    def _hit(self, tier):
+        self.stats[f"{tier}_hits"] += 1
+        CACHE_HITS.labels(tier=tier).inc()
+
+    def put(self, key, response):
+
+        history = _flag_history(response)
+        entry = {
+            "response": response,
+            "history": {"epoch": history[1]} if history is not None else None
+        }
+
+        with self._lock:
+            self._remember(key, entry)
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write then rename so a reader never sees half a file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wt") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+        self._evict()
+
+    def _evict(self):
+
+        entries = []
+        total = 0
+
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json.gz"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+            total -= size
+            with self._lock:
+                self.stats["evictions"] += 1
+            CACHE_EVICTIONS.inc()
+
+            if total <= self.max_bytes:
+                break
+
+    def info(self):
+
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round(
+            (stats["memory_hits"] + stats["disk_hits"]) / lookups, 3
+        ) if lookups else None
+
+        return stats
+
+
+_cache = ResultCache(
+    RESULT_CACHE_DIR,
+    RESULT_CACHE_MEMORY_ENTRIES,
+    RESULT_CACHE_DISK_BYTES
+) if RESULT_CACHE_ENABLED else None
+
+
+def get_cache():
+    return _cache
@@ -0,0 +1,88 @@
+import json
+import zlib
+
+import numpy as np
+from fastapi.responses import Response, StreamingResponse
+
+from app.config import RESULT_GZIP_LEVEL, RESULT_STREAM_BATCH
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _numpy_default(value):
+    # Only reached for values json can't encode natively, so plain floats
+    # and strings never pay for this check
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(separators=(",", ":"), default=_numpy_default)
+
+
+def encode_json(value):
+    return _encoder.encode(value).encode()
+
+
+def json_response(results):
+    """A response FastAPI sends as-is, skipping jsonable_encoder's walk."""
+
+    return Response(content=encode_json(results), media_type="application/json")
+
+
+# -----------------------------
+# NDJSON
+# -----------------------------
+def iter_ndjson(results, batch_size=RESULT_STREAM_BATCH):
+    """An analysis response as NDJSON chunks.
+
+    The summary comes first, then one line per suspicious account and
+    per ring, then {"type": "end"} so clients can tell a complete
+    stream from a cut one.
+    """
+
+    yield encode_json({"type": "summary", **results["summary"]}) + b"\n"
+
+    for kind, items in (
+        ("account", results["suspicious_accounts"]),
+        ("ring", results["fraud_rings"])
+    ):
+        for i in range(0, len(items), batch_size):
+            lines = [_encoder.encode({"type": kind, **item}) for item in items[i:i + batch_size]]
+            yield ("\n".join(lines) + "\n").encode()
+
+    yield b'{"type":"end"}\n'
+
+
+def gzip_chunks(chunks, level=RESULT_GZIP_LEVEL):
+    # wbits=31: gzip framing, so clients decode it as Content-Encoding: gzip
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+
+    yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding):
+    return "gzip" in (accept_encoding or "").lower()
+
+
+def ndjson_response(results, accept_encoding=None, headers=None):
+    """Stream an analysis response as NDJSON, gzipped when the client accepts it."""
+
+    chunks = iter_ndjson(results)
+    headers = dict(headers or {})
+
+    if accepts_gzip(accept_encoding):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    headers["Vary"] = "Accept-Encoding"
+
+    return StreamingResponse(chunks, media_type=NDJSON_MEDIA_TYPE, headers=headers)
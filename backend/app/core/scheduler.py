@@ -0,0 +1,87 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from app.utils.metrics import stage_memory
+
+
+class Stage:
+    """One pipeline step: `fn` is called with the results of `deps`, in order."""
+
+    def __init__(self, name, fn, deps=()):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+
+
+def _timed(stage, args):
+
+    stats = {}
+
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+
+    with stage_memory(stats):
+        result = stage.fn(*args)
+
+    stats["wall_seconds"] = round(time.perf_counter() - wall_start, 4)
+    stats["cpu_seconds"] = round(time.thread_time() - cpu_start, 4)
+
+    return result, stats
+
+
+def run_stages(stages, inputs=None, max_workers=4, on_stage=None):
+    """Run a DAG of stages, each as soon as its inputs exist.
+
+    `inputs` seeds results that aren't produced by a stage. Returns the
+    results and per-stage wall/CPU time and memory readings keyed by stage
+    name. CPU time is the stage thread's own; work a stage hands to other
+    processes is not counted. The first failing stage's exception is re-raised.
+    """
+
+    results = dict(inputs or {})
+    timings = {}
+
+    pending = {stage.name: stage for stage in stages}
+
+    for stage in stages:
+        unknown = [d for d in stage.deps if d not in pending and d not in results]
+        if unknown:
+            raise ValueError(f"Stage {stage.name!r} depends on unknown {unknown}")
+
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        while pending or running:
+
+            ready = [
+                stage for stage in pending.values()
+                if all(dep in results for dep in stage.deps)
+            ]
+
+            for stage in ready:
+                del pending[stage.name]
+                if on_stage:
+                    on_stage(stage.name, "running")
+                args = [results[dep] for dep in stage.deps]
+                running[executor.submit(_timed, stage, args)] = stage
+
+            if not running:
+                raise ValueError(f"Stages {sorted(pending)} can never run (cycle?)")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                stage = running.pop(future)
+
+                try:
+                    results[stage.name], timings[stage.name] = future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+
+                if on_stage:
+                    on_stage(stage.name, "done")
+
+    return results, timings
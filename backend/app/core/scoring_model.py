@@ -1,37 +1,26 @@
-import numpy as np
 import pandas as pd
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
 
+from app.config import MODEL_MODE
+from app.core.model_registry import feature_matrix, fit_model, get_model
 
-def compute_anomaly_scores(feature_df):
 
-    # Remove account_id before ML
-    X = feature_df.drop(columns=["account_id"])
+def compute_anomaly_scores(feature_df, mode=MODEL_MODE):
 
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    model = get_model()
 
-    model = IsolationForest(
-        n_estimators=200,
-        contamination=0.05,
-        random_state=42
-    )
+    if mode == "pretrained" and model is None:
+        raise RuntimeError("No persisted anomaly model is loaded.")
 
-    model.fit(X_scaled)
-
-    # Higher anomaly → more negative → invert
-    raw_scores = -model.score_samples(X_scaled)
-
-    # Normalize to 0–100
-    min_score = raw_scores.min()
-    max_score = raw_scores.max()
-
-    normalized = 100 * (raw_scores - min_score) / (max_score - min_score + 1e-8)
+    if mode == "refit" or model is None:
+        # Fit on this upload alone; scores are relative to this file
+        model, raw_scores = fit_model(feature_matrix(feature_df))
+        ml_score = model.normalize(raw_scores)
+    else:
+        ml_score = model.score(feature_df)
 
     result = pd.DataFrame({
         "account_id": feature_df["account_id"],
-        "ml_score": normalized
+        "ml_score": ml_score
     })
 
     return result
@@ -1,63 +1,52 @@
+import numpy as np
+
+
 def detect_shell_layers(graph, cycle_nodes):
 
     rings = []
     ring_index = 500
-    degree_map = dict(graph.degree())
-
-    visited_mid = set()
-
-    for start in graph.nodes():
-
-        if start in cycle_nodes:
-            continue
-
-        if degree_map[start] <= 2:
-            continue
-
-        for mid1 in graph.successors(start):
-
-            if mid1 in cycle_nodes:
-                continue
 
-            if degree_map[mid1] != 2:
-                continue
+    n = graph.number_of_nodes()
 
-            if mid1 in visited_mid:
-                continue
+    in_cycle = np.zeros(n, dtype=bool)
+    in_cycle[list(cycle_nodes)] = True
 
-            succ1 = list(graph.successors(mid1))
-            if len(succ1) != 1:
-                continue
+    # A pass-through layer has exactly one sender and one receiver
+    is_mid = (
+        (graph.in_degree == 1) &
+        (graph.out_degree == 1) &
+        ~in_cycle
+    )
 
-            mid2 = succ1[0]
+    mid1 = np.flatnonzero(is_mid)
 
-            if mid2 in cycle_nodes:
-                continue
+    start = graph.in_indices[graph.in_indptr[mid1]]
+    mid2 = graph.indices[graph.indptr[mid1]]
 
-            if degree_map[mid2] != 2:
-                continue
+    keep = (
+        (graph.degree[start] > 2) &
+        ~in_cycle[start] &
+        is_mid[mid2]
+    )
 
-            succ2 = list(graph.successors(mid2))
-            if len(succ2) != 1:
-                continue
+    start, mid1, mid2 = start[keep], mid1[keep], mid2[keep]
 
-            end = succ2[0]
+    end = graph.indices[graph.indptr[mid2]]
 
-            if end in cycle_nodes:
-                continue
+    keep = ~in_cycle[end] & ~graph.has_edges(end, start)
 
-            if graph.has_edge(end, start):
-                continue
+    start, mid1, mid2, end = start[keep], mid1[keep], mid2[keep], end[keep]
 
-            rings.append({
-                "ring_id": f"RING_L_{ring_index}",
-                "members": [start, mid1, mid2, end],
-                "pattern_type": "shell_layering",
-                "risk_score": 88.0
-            })
+    # Same emission order as walking starts, then their successors
+    order = np.lexsort((mid1, start))
 
-            visited_mid.add(mid1)
-            visited_mid.add(mid2)
-            ring_index += 1
+    for i in order:
+        rings.append({
+            "ring_id": f"RING_L_{ring_index}",
+            "members": [int(start[i]), int(mid1[i]), int(mid2[i]), int(end[i])],
+            "pattern_type": "shell_layering",
+            "risk_score": 88.0
+        })
+        ring_index += 1
 
-    return rings
\ No newline at end of file
+    return rings
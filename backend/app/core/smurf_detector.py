@@ -1,51 +1,162 @@
-
-def detect_smurfing(df, threshold=10, window_hours=72):
+import numpy as np
+
+
+# -----------------------------
+# Account Aggregates
+# -----------------------------
+def flow_aggregates(src, dst, amount, n):
+    """Per-account incoming/outgoing counts, means and distinct counterparties."""
+
+    in_count = np.bincount(dst, minlength=n)
+    out_count = np.bincount(src, minlength=n)
+
+    avg_in = np.bincount(dst, weights=amount, minlength=n) / np.maximum(in_count, 1)
+    avg_out = np.bincount(src, weights=amount, minlength=n) / np.maximum(out_count, 1)
+
+    pairs = np.unique(src * n + dst)
+    distinct_out = np.bincount(pairs // n, minlength=n)
+    distinct_in = np.bincount(pairs % n, minlength=n)
+
+    return {
+        "in_count": in_count,
+        "out_count": out_count,
+        "avg_in": avg_in,
+        "avg_out": avg_out,
+        "distinct_in": distinct_in,
+        "distinct_out": distinct_out
+    }
+
+
+# -----------------------------
+# Sliding-Window Fan-in / Fan-out
+# -----------------------------
+def detect_smurfing(
+    tx,
+    threshold=10,
+    window_hours=72,
+    fan_in=True,
+    fan_out=True,
+    fragmentation_ratio=0.6,
+    min_aggregation=5
+):
+    """Flag accounts that touch `threshold` distinct counterparties inside
+    any rolling `window_hours` window.
+
+    Both directions are scanned in one pass over (direction, account, time)
+    sorted arrays with a two-pointer window and counterparty counts. Only
+    accounts that can possibly trip (enough distinct counterparties overall
+    and, unless fragmentation_ratio is None, small-in / large-out flows)
+    are scanned at all. Ring members are the account followed by every
+    counterparty of the first window that trips.
+    """
+
+    src = tx["src"].to_numpy(dtype=np.int64)
+    dst = tx["dst"].to_numpy(dtype=np.int64)
+    amount = tx["amount"].to_numpy(dtype=np.float64)
+    seconds = tx["timestamp"].to_numpy().astype("datetime64[s]").astype(np.int64)
+
+    if len(src) == 0:
+        return []
+
+    n = int(max(src.max(), dst.max())) + 1
+    agg = flow_aggregates(src, dst, amount, n)
+
+    # Fragmentation: small deposits in, larger transfers out
+    fragmented = np.ones(n, dtype=bool)
+    if fragmentation_ratio is not None:
+        fragmented = agg["avg_in"] <= agg["avg_out"] * fragmentation_ratio
+
+    accounts, counterparties, times, directions = [], [], [], []
+
+    if fan_out:
+        eligible = agg["distinct_out"] >= threshold
+        if fragmentation_ratio is not None:
+            # Dispersal must follow aggregation, otherwise it's payroll
+            eligible &= fragmented & (agg["in_count"] >= min_aggregation)
+        rows = eligible[src]
+        accounts.append(src[rows])
+        counterparties.append(dst[rows])
+        times.append(seconds[rows])
+        directions.append(np.zeros(rows.sum(), dtype=np.int8))
+
+    if fan_in:
+        eligible = agg["distinct_in"] >= threshold
+        if fragmentation_ratio is not None:
+            eligible &= fragmented & (agg["out_count"] >= 1)
+        rows = eligible[dst]
+        accounts.append(dst[rows])
+        counterparties.append(src[rows])
+        times.append(seconds[rows])
+        directions.append(np.ones(rows.sum(), dtype=np.int8))
+
+    if not accounts:
+        return []
+
+    account = np.concatenate(accounts)
+    counterparty = np.concatenate(counterparties)
+    t = np.concatenate(times)
+    direction = np.concatenate(directions)
+
+    if len(account) == 0:
+        return []
+
+    order = np.lexsort((t, account, direction))
+    account, counterparty, t, direction = (
+        account[order], counterparty[order], t[order], direction[order]
+    )
+
+    change = (account[1:] != account[:-1]) | (direction[1:] != direction[:-1])
+    starts = np.r_[0, np.flatnonzero(change) + 1]
+    ends = np.r_[starts[1:], len(account)]
+
+    return _scan_windows(
+        account.tolist(), counterparty.tolist(), t.tolist(), direction.tolist(),
+        starts.tolist(), ends.tolist(),
+        threshold, window_hours * 3600
+    )
+
+
+def _scan_windows(account, counterparty, t, direction, starts, ends,
+                  threshold, window_seconds):
 
     suspicious = []
-
-    df = df.sort_values("timestamp")
-
-    grouped_out = df.groupby("sender_id")
-
-    for sender, group in grouped_out:
-
-        if len(group) < threshold:
-            continue
-
-        distinct_receivers = group["receiver_id"].nunique()
-
-        if distinct_receivers < threshold:
-            continue
-
-        group = group.sort_values("timestamp")
-
-        # Check burst window
-        time_span = (
-            group["timestamp"].max() -
-            group["timestamp"].min()
-        ).total_seconds() / 3600
-
-        if time_span > window_hours:
-            continue  # Not bursty → likely payroll
-
-        # Check prior fan-in (aggregation required)
-        incoming = df[df["receiver_id"] == sender]
-
-        if len(incoming) < 5:
-            continue  # No aggregation → payroll-like
-
-        # Fragmentation check (small deposits then big dispersal)
-        avg_in = incoming["amount"].mean()
-        avg_out = group["amount"].mean()
-
-        if avg_in > avg_out * 0.6:
-            continue  # Not fragmented → payroll
-
-        suspicious.append({
-            "ring_id": f"RING_S_{sender}",
-            "members": list(group["receiver_id"].unique()) + [sender],
-            "pattern_type": "smurfing",
-            "risk_score": 93.0
-        })
+    ring_index = 1
+
+    for start, end in zip(starts, ends):
+
+        counts = {}
+        left = start
+
+        for right in range(start, end):
+
+            cp = counterparty[right]
+            counts[cp] = counts.get(cp, 0) + 1
+
+            while t[right] - t[left] > window_seconds:
+                old = counterparty[left]
+                if counts[old] == 1:
+                    del counts[old]
+                else:
+                    counts[old] -= 1
+                left += 1
+
+            if len(counts) >= threshold:
+
+                # Keep the whole burst that shares this window's start
+                for later in range(right + 1, end):
+                    if t[later] - t[left] > window_seconds:
+                        break
+                    counts.setdefault(counterparty[later], 0)
+
+                suspicious.append({
+                    "ring_id": f"RING_S_{ring_index:03d}",
+                    "members": [account[start]] + list(counts),
+                    "pattern_type": (
+                        "smurfing_fan_in" if direction[start] else "smurfing_fan_out"
+                    ),
+                    "risk_score": 93.0
+                })
+                ring_index += 1
+                break
 
     return suspicious
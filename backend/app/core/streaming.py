@@ -0,0 +1,336 @@
+import heapq
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.config import (
+    STREAM_IDLE_SECONDS,
+    STREAM_MAX_EVENTS,
+    STREAM_MAX_MONITORS,
+    STREAM_WINDOW_HOURS
+)
+
+
+# Same trip rule as detect_smurfing, applied to the live window
+SMURF_THRESHOLD = 10
+FRAGMENTATION_RATIO = 0.6
+MIN_AGGREGATION = 5
+
+LATENCY_SAMPLES = 10_000
+
+
+def parse_timestamp(value):
+    """Epoch seconds from an ISO-8601 string or a number of seconds."""
+
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+
+    return ts.timestamp()
+
+
+class _Flow:
+    """One account's traffic inside the window, per direction."""
+
+    __slots__ = ("counterparties", "count", "total")
+
+    def __init__(self):
+        self.counterparties = Counter()
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, counterparty, amount):
+        self.counterparties[counterparty] += 1
+        self.count += 1
+        self.total += amount
+
+    def remove(self, counterparty, amount):
+        left = self.counterparties[counterparty] - 1
+        if left:
+            self.counterparties[counterparty] = left
+        else:
+            del self.counterparties[counterparty]
+        self.count -= 1
+        self.total -= amount
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class SlidingWindowMonitor:
+    """Time-windowed transaction graph with online smurfing alerts.
+
+    Keeps every event of the last `window_hours` (by event time) and, per
+    account, the counterparties it paid and was paid by in that window.
+    An account alerts the moment its distinct fan-out or fan-in reaches
+    `threshold` under the fragmentation rule detect_smurfing uses, and
+    re-arms once it drops back below. At most `max_events` are held; past
+    that the oldest go early and are counted as shed. Events are kept in a
+    heap on event time, so ones arriving out of order still expire on time.
+    """
+
+    def __init__(self, window_hours=STREAM_WINDOW_HOURS, threshold=SMURF_THRESHOLD,
+                 max_events=STREAM_MAX_EVENTS):
+        self.window_seconds = window_hours * 3600
+        self.threshold = threshold
+        self.max_events = max_events
+
+        # (t, src, dst, amount) min-heap
+        self.events = []
+        self.outgoing = {}
+        self.incoming = {}
+        self.watermark = float("-inf")
+
+        # (direction, account) pairs currently over threshold
+        self.tripped = set()
+
+        self.lock = threading.Lock()
+        self.clients = 0
+        self.last_used = time.monotonic()
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.stats = {
+            "events": 0,
+            "alerts": 0,
+            "expired": 0,
+            "shed": 0,
+            "late": 0
+        }
+
+    # -----------------------------
+    # Window maintenance
+    # -----------------------------
+    def _drop_oldest(self):
+
+        t, src, dst, amount = heapq.heappop(self.events)
+
+        for flows, account, counterparty in (
+            (self.outgoing, src, dst),
+            (self.incoming, dst, src)
+        ):
+            flow = flows[account]
+            flow.remove(counterparty, amount)
+            if not flow.count:
+                del flows[account]
+
+        for key in (("out", src), ("in", dst)):
+            if key in self.tripped and not self._over_threshold(*key):
+                self.tripped.discard(key)
+
+    def _expire(self):
+
+        horizon = self.watermark - self.window_seconds
+
+        while self.events and self.events[0][0] < horizon:
+            self._drop_oldest()
+            self.stats["expired"] += 1
+
+        # Room for the event about to be added
+        while len(self.events) >= self.max_events:
+            self._drop_oldest()
+            self.stats["shed"] += 1
+
+    def _flow(self, flows, account):
+        flow = flows.get(account)
+        if flow is None:
+            flow = flows[account] = _Flow()
+        return flow
+
+    # -----------------------------
+    # Trip rule
+    # -----------------------------
+    def _over_threshold(self, direction, account):
+
+        out_flow = self.outgoing.get(account)
+        in_flow = self.incoming.get(account)
+
+        if direction == "out":
+            if out_flow is None or len(out_flow.counterparties) < self.threshold:
+                return False
+            # Dispersal must follow aggregation, otherwise it's payroll
+            return (
+                in_flow is not None and
+                in_flow.count >= MIN_AGGREGATION and
+                in_flow.average <= out_flow.average * FRAGMENTATION_RATIO
+            )
+
+        if in_flow is None or len(in_flow.counterparties) < self.threshold:
+            return False
+        return (
+            out_flow is not None and
+            in_flow.average <= out_flow.average * FRAGMENTATION_RATIO
+        )
+
+    def _alert(self, direction, account, event):
+
+        flow = (self.outgoing if direction == "out" else self.incoming)[account]
+
+        return {
+            "alert": "smurfing_fan_out" if direction == "out" else "smurfing_fan_in",
+            "account_id": account,
+            "distinct_counterparties": len(flow.counterparties),
+            "window_transactions": flow.count,
+            "window_amount": round(flow.total, 2),
+            "counterparties": sorted(flow.counterparties),
+            "window_end": datetime.fromtimestamp(self.watermark, timezone.utc).isoformat(),
+            "transaction_id": event.get("transaction_id")
+        }
+
+    # -----------------------------
+    # Ingestion
+    # -----------------------------
+    def ingest(self, event):
+        """Add one transaction; returns the alerts it trips (usually none)."""
+
+        started = time.perf_counter()
+
+        src = str(event["sender_id"])
+        dst = str(event["receiver_id"])
+        amount = float(event["amount"])
+        t = parse_timestamp(event["timestamp"])
+
+        alerts = []
+
+        with self.lock:
+            self.stats["events"] += 1
+            self.last_used = time.monotonic()
+
+            if t < self.watermark - self.window_seconds:
+                # Already outside the window; it can't change anything
+                self.stats["late"] += 1
+                self.latencies.append(time.perf_counter() - started)
+                return alerts
+
+            self.watermark = max(self.watermark, t)
+            self._expire()
+
+            heapq.heappush(self.events, (t, src, dst, amount))
+            self._flow(self.outgoing, src).add(dst, amount)
+            self._flow(self.incoming, dst).add(src, amount)
+
+            # A transfer changes the in/out mix of both ends
+            for direction, account in (("out", src), ("in", src), ("out", dst), ("in", dst)):
+                key = (direction, account)
+                if key in self.tripped:
+                    if not self._over_threshold(direction, account):
+                        self.tripped.discard(key)
+                elif self._over_threshold(direction, account):
+                    self.tripped.add(key)
+                    alerts.append(self._alert(direction, account, event))
+
+            self.stats["alerts"] += len(alerts)
+            self.latencies.append(time.perf_counter() - started)
+
+        return alerts
+
+    @contextmanager
+    def connected(self):
+        """Hold the stream open, so it isn't expired or removed, while a
+        client is sending."""
+
+        with self.lock:
+            self.clients += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self.clients -= 1
+                self.last_used = time.monotonic()
+
+    def idle_for(self, now):
+        """Seconds since the last event or disconnect; None while connected."""
+
+        with self.lock:
+            return None if self.clients else now - self.last_used
+
+    def info(self):
+
+        with self.lock:
+            stats = dict(self.stats)
+            stats.update({
+                "window_hours": self.window_seconds / 3600,
+                "window_events": len(self.events),
+                "window_accounts": len(set(self.outgoing) | set(self.incoming)),
+                "tripped_accounts": len(self.tripped)
+            })
+            latencies = np.array(self.latencies)
+
+        if len(latencies):
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+            stats["latency_us"] = {
+                "p50": round(float(p50), 1),
+                "p99": round(float(p99), 1),
+                "max": round(float(latencies.max()) * 1e6, 1)
+            }
+
+        return stats
+
+
+# -----------------------------
+# Stream Registry
+# -----------------------------
+class TooManyStreams(Exception):
+    pass
+
+
+class StreamInUse(Exception):
+    pass
+
+
+_monitors = {}
+_monitors_lock = threading.Lock()
+
+
+def _expire_idle():
+
+    now = time.monotonic()
+
+    for name, monitor in list(_monitors.items()):
+        idle = monitor.idle_for(now)
+        if idle is not None and idle >= STREAM_IDLE_SECONDS:
+            del _monitors[name]
+
+
+def get_monitor(name, create=True):
+    """The named stream's monitor; None if it doesn't exist and create is
+    off. Streams idle for STREAM_IDLE_SECONDS are dropped first; raises
+    TooManyStreams if STREAM_MAX_MONITORS are still open."""
+
+    with _monitors_lock:
+        _expire_idle()
+
+        monitor = _monitors.get(name)
+        if monitor is None and create:
+            if len(_monitors) >= STREAM_MAX_MONITORS:
+                raise TooManyStreams(f"At most {STREAM_MAX_MONITORS} streams can be open.")
+            monitor = _monitors[name] = SlidingWindowMonitor()
+        elif monitor is not None and create:
+            # About to be written to; don't let it expire before it connects
+            with monitor.lock:
+                monitor.last_used = time.monotonic()
+
+    return monitor
+
+
+def remove_monitor(name):
+    """Drop a stream and return its final stats; None if it doesn't exist.
+    Raises StreamInUse while a client is connected to it."""
+
+    with _monitors_lock:
+        monitor = _monitors.get(name)
+        if monitor is None:
+            return None
+        with monitor.lock:
+            in_use = monitor.clients > 0
+        if in_use:
+            raise StreamInUse(f"Stream {name} has a client connected.")
+        del _monitors[name]
+
+    return monitor.info()
@@ -0,0 +1,368 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import resource
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+from app.config import (
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_REQUEST_ROWS,
+    ADMISSION_MAX_ROWS,
+    JOB_WORKERS,
+    POOL_WORKERS,
+    WORKER_MEMORY_LIMIT_MB
+)
+from app.core.ingest import estimate_rows, read_upload
+from app.utils.logger import get_logger
+from app.utils.metrics import (
+    ADMISSION_REJECTIONS,
+    ADMITTED_ROWS,
+    POOL_QUEUE_DEPTH
+)
+
+
+logger = get_logger(__name__)
+
+# Until a few analyses have finished, assume this per-worker throughput
+DEFAULT_ROWS_PER_SECOND = 100_000
+
+MAX_RETRY_AFTER_SECONDS = 300
+
+
+class UploadRejected(Exception):
+    """Admission refused an upload; maps straight onto an HTTP error."""
+
+    def __init__(self, status_code, detail, retry_after=None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    def headers(self):
+        if self.retry_after is None:
+            return None
+        return {"Retry-After": str(self.retry_after)}
+
+
+class UnreadableUpload(ValueError):
+    pass
+
+
+class AnalysisMemoryExceeded(MemoryError):
+    pass
+
+
+# -----------------------------
+# Worker Side
+# -----------------------------
+def _warm_worker():
+    # Pay the heavy imports, model and fraud history once per process, not per upload
+    import networkx  # noqa: F401
+    import sklearn.ensemble  # noqa: F401
+    import app.core.orchestrator  # noqa: F401
+    from app.core.fraud_index import load_known_fraud
+    from app.core.model_registry import load_model
+
+    load_model()
+    load_known_fraud()
+
+
+def _ping():
+    return os.getpid()
+
+
+def _vm_size_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+
+
+@contextmanager
+def address_space_limit(extra_bytes):
+    """Cap the worker's address space at its current size plus extra_bytes.
+
+    Allocations past the cap raise MemoryError in this worker instead of
+    pushing the whole host into swap or the OOM killer.
+    """
+
+    try:
+        limit = _vm_size_bytes() + extra_bytes if extra_bytes else None
+    except OSError:
+        limit = None  # no /proc; run unlimited
+
+    if limit is None:
+        yield
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+# Under RLIMIT_AS an exhausted allocation doesn't always surface as
+# MemoryError: parsers, BLAS and thread creation report it their own way
+_OUT_OF_MEMORY_MESSAGES = ("out of memory", "cannot allocate memory", "can't start new thread")
+
+
+def out_of_memory(e):
+
+    while e is not None:
+        if isinstance(e, MemoryError):
+            return True
+        if any(m in str(e).lower() for m in _OUT_OF_MEMORY_MESSAGES):
+            return True
+        e = e.__cause__ or e.__context__
+
+    return False
+
+
+def _analyze_in_worker(path, filename, memory_limit_bytes):
+    from app.core.orchestrator import run_analysis
+
+    with address_space_limit(memory_limit_bytes):
+        try:
+            df = read_upload(path)
+        except Exception as e:
+            if memory_limit_bytes and out_of_memory(e):
+                raise AnalysisMemoryExceeded("Upload exceeds the per-request memory limit.")
+            raise UnreadableUpload(str(e))
+
+        try:
+            return run_analysis(df, filename=filename)
+        except Exception as e:
+            if memory_limit_bytes and out_of_memory(e):
+                raise AnalysisMemoryExceeded("Analysis exceeds the per-request memory limit.")
+            raise
+
+
+def _analyze_history_in_worker(start, end, memory_limit_bytes):
+    from app.core.history_store import get_history_store
+    from app.core.orchestrator import run_analysis
+
+    store = get_history_store()
+    store.refresh()
+
+    with address_space_limit(memory_limit_bytes):
+        try:
+            tx, accounts = store.load_range(start, end)
+            label = f"history:{start or ''}..{end or ''}"
+            return run_analysis(tx, accounts=accounts, filename=label)
+        except Exception as e:
+            if memory_limit_bytes and out_of_memory(e):
+                raise AnalysisMemoryExceeded("Analysis exceeds the per-request memory limit.")
+            raise
+
+
+# -----------------------------
+# Pools
+# -----------------------------
+# "analyze" serves /analyze behind admission control; "jobs" runs POST
+# /jobs analyses one per job thread, so the job queue is its admission
+_POOL_SIZES = {"analyze": POOL_WORKERS, "jobs": JOB_WORKERS}
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def get_pool(kind="analyze"):
+
+    with _pool_lock:
+        pool = _pools.get(kind)
+        if pool is None:
+            # spawn: the API process runs threads, which fork doesn't mix with
+            pool = _pools[kind] = ProcessPoolExecutor(
+                max_workers=_POOL_SIZES[kind],
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker
+            )
+
+    return pool
+
+
+def _reset_pool(broken):
+
+    with _pool_lock:
+        for kind, pool in list(_pools.items()):
+            if pool is broken:
+                del _pools[kind]
+
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def start_pool():
+    """Start and warm every worker now rather than on the first uploads."""
+
+    pool = get_pool()
+    pids = {f.result() for f in [pool.submit(_ping) for _ in range(POOL_WORKERS)]}
+
+    logger.info("Analysis pool ready (%d workers)", len(pids))
+
+
+def stop_pool():
+
+    with _pool_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_in_pool(kind, fn, *args):
+    """Run fn(*args) on a pool and wait for it, from a non-async thread."""
+
+    pool = get_pool(kind)
+
+    try:
+        return pool.submit(fn, *args).result()
+    except BrokenProcessPool:
+        logger.error("%s pool broke, restarting it", kind.capitalize())
+        _reset_pool(pool)
+        raise RuntimeError("The analysis worker died (killed by the OS?); resubmit the job.")
+
+
+# -----------------------------
+# Admission Control
+# -----------------------------
+class AdmissionController:
+    """Admits uploads by estimated row count.
+
+    At most `workers` analyses run while up to `max_queue` wait; beyond
+    that, or once admitted rows pass `max_rows`, callers are told when to
+    retry from the observed throughput. `pool` labels its metrics.
+    """
+
+    def __init__(self, pool, workers, max_queue, max_rows, max_request_rows):
+        self.pool = pool
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_rows = max_rows
+        self.max_request_rows = max_request_rows
+
+        self.admitted = 0
+        self.admitted_rows = 0
+        self.rows_per_second = DEFAULT_ROWS_PER_SECOND
+
+        self._lock = threading.Lock()
+
+    def _retry_after(self):
+        backlog = self.admitted_rows / (self.rows_per_second * self.workers)
+        return max(1, min(MAX_RETRY_AFTER_SECONDS, math.ceil(backlog)))
+
+    def admit(self, rows, force=False):
+        """Claim a slot for `rows`, or raise UploadRejected. `force` claims
+        one regardless, for work that was already accepted once."""
+
+        if rows > self.max_request_rows and not force:
+            ADMISSION_REJECTIONS.labels(pool=self.pool, reason="too_large").inc()
+            raise UploadRejected(
+                413,
+                f"Upload of ~{rows} rows exceeds the {self.max_request_rows} row limit; submit it with POST /jobs."
+            )
+
+        with self._lock:
+            if force:
+                reason = None
+            elif self.admitted >= self.workers + self.max_queue:
+                reason = "queue_full"
+            elif self.admitted and self.admitted_rows + rows > self.max_rows:
+                reason = "rows_budget"
+            else:
+                reason = None
+
+            if reason is None:
+                self.admitted += 1
+                self.admitted_rows += rows
+
+            retry_after = self._retry_after()
+            self._publish()
+
+        if reason is not None:
+            ADMISSION_REJECTIONS.labels(pool=self.pool, reason=reason).inc()
+            raise UploadRejected(429, "Analysis queue is full, retry later.", retry_after)
+
+    def release(self, rows, seconds=None):
+
+        with self._lock:
+            self.admitted -= 1
+            self.admitted_rows -= rows
+
+            if seconds and rows:
+                # Smooth, so one odd upload doesn't swing Retry-After
+                self.rows_per_second = 0.8 * self.rows_per_second + 0.2 * (rows / seconds)
+
+            self._publish()
+
+    def _publish(self):
+        ADMITTED_ROWS.labels(pool=self.pool).set(self.admitted_rows)
+        POOL_QUEUE_DEPTH.labels(pool=self.pool).set(max(0, self.admitted - self.workers))
+
+
+_admission = AdmissionController(
+    "analyze",
+    POOL_WORKERS,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_ROWS,
+    ADMISSION_MAX_REQUEST_ROWS
+)
+
+
+async def _run_admitted(rows, fn, *args):
+    """Admit `rows` worth of work, then run fn(*args, memory limit) on the pool."""
+
+    _admission.admit(rows)
+
+    pool = get_pool()
+    elapsed = None
+
+    try:
+        future = pool.submit(fn, *args, WORKER_MEMORY_LIMIT_MB * 1024 ** 2)
+        results = await asyncio.wrap_future(future)
+        elapsed = results["summary"]["processing_time_seconds"]
+    except BrokenProcessPool:
+        # A worker died (e.g. killed by the OS); replace the pool
+        logger.error("Analysis pool broke, restarting it")
+        _reset_pool(pool)
+        ADMISSION_REJECTIONS.labels(pool="analyze", reason="pool_unavailable").inc()
+        raise UploadRejected(503, "Analysis workers are restarting, retry shortly.", 5)
+    finally:
+        _admission.release(rows, elapsed)
+
+    return results
+
+
+async def analyze_upload(path, filename=None):
+    """Admit a spooled upload and analyze it on the worker pool.
+
+    Metrics recorded inside the worker stay in its process; the caller
+    records them from the response summary.
+
+    Raises UploadRejected when admission refuses it or the pool is down,
+    UnreadableUpload for files that don't parse and AnalysisMemoryExceeded
+    when the analysis outgrows its memory limit.
+    """
+
+    rows = await asyncio.to_thread(estimate_rows, path)
+
+    return await _run_admitted(rows, _analyze_in_worker, path, filename)
+
+
+async def analyze_history(start, end, rows):
+    """Analyze the stored days [start, end] on the worker pool.
+
+    `rows` is the range's size from the store's segment metadata; the
+    workers map the segments themselves, so nothing is re-parsed or
+    shipped between processes. Raises as analyze_upload does, plus
+    EmptyRange when no segment falls in the range.
+    """
+
+    return await _run_admitted(rows, _analyze_history_in_worker, start, end)
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
-from .database import Base
+from app.core.database import Base
 
 class Upload(Base):
     __tablename__ = "uploads"
@@ -12,10 +12,10 @@ class Upload(Base):
 class Transaction(Base):
     __tablename__ = "transactions"
     id = Column(Integer, primary_key=True, index=True)
-    upload_id = Column(Integer, ForeignKey("uploads.id"))
+    upload_id = Column(Integer, ForeignKey("uploads.id"), index=True)
     transaction_id = Column(String)
-    sender_id = Column(String)
-    receiver_id = Column(String)
+    sender_id = Column(String, index=True)
+    receiver_id = Column(String, index=True)
     amount = Column(Float)
     timestamp = Column(DateTime)
 
@@ -30,21 +30,31 @@ class FraudRing(Base):
     __tablename__ = "fraud_rings"
     id = Column(Integer, primary_key=True, index=True)
     upload_id = Column(Integer, ForeignKey("uploads.id"))
-    ring_id = Column(String)
+    ring_id = Column(String, index=True)
     pattern_type = Column(String)
     risk_score = Column(Float)
 
+    # Ring ids (RING_001, ...) are only unique within one upload
+    __table_args__ = (
+        Index("ix_fraud_rings_upload_ring", "upload_id", "ring_id"),
+    )
+
 class RingMember(Base):
     __tablename__ = "ring_members"
     id = Column(Integer, primary_key=True, index=True)
-    ring_fk = Column(Integer, ForeignKey("fraud_rings.id"))
-    account_id = Column(String)
+    ring_fk = Column(Integer, ForeignKey("fraud_rings.id"), index=True)
+    account_id = Column(String, index=True)
 
 class SuspiciousAccount(Base):
     __tablename__ = "suspicious_accounts"
     id = Column(Integer, primary_key=True, index=True)
     upload_id = Column(Integer, ForeignKey("uploads.id"))
-    account_id = Column(String)
+    account_id = Column(String, index=True)
     suspicion_score = Column(Float)
     detected_patterns = Column(Text)
-    ring_id = Column(String)
+    ring_id = Column(String, index=True)
+
+    # Score-range reads within one upload
+    __table_args__ = (
+        Index("ix_suspicious_accounts_upload_score", "upload_id", "suspicion_score"),
+    )
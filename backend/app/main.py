@@ -2,16 +2,43 @@ from app.core.database import Base, engine
 
 # IMPORT MODELS BEFORE create_all
 from app.models import db_models
+from app.db import model
 
 Base.metadata.create_all(bind=engine)
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+# create_all skips indexes added to tables that already exist
+for table in Base.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+from fastapi import FastAPI, UploadFile, File, Header, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
-import io
 import asyncio
-
-from app.core.orchestrator import run_analysis
+import os
+
+from app.api import history, incremental, jobs, streaming, uploads
+from app.core.ingest import discard_spool, is_supported_upload, spool_upload
+from app.core.fraud_index import load_known_fraud
+from app.core.jobs import resume_jobs
+from app.core.persistence import flush_writes, recover_pending_uploads
+from app.core.model_registry import load_model
+from app.core.result_cache import cache_key, get_cache, upload_digest
+from app.core.result_stream import json_response, ndjson_response
+from app.core.worker_pool import (
+    AnalysisMemoryExceeded,
+    UnreadableUpload,
+    UploadRejected,
+    analyze_upload,
+    start_pool,
+    stop_pool
+)
+from app.utils.metrics import (
+    UPLOAD_BYTES,
+    UPLOAD_ROWS,
+    record_summary,
+    render_metrics,
+    track_in_flight
+)
 
 app = FastAPI(
     title="RIFT 2026 – Money Muling Detection Engine",
@@ -26,6 +53,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+def load_anomaly_model():
+    # Score uploads with the persisted model when one has been trained
+    load_model()
+
+
+@app.on_event("startup")
+def load_fraud_history():
+    # Repeat offenders are boosted from memory, not per-account queries
+    load_known_fraud()
+
+
+@app.on_event("startup")
+def recover_unwritten_uploads():
+    # Before any worker starts writing: "pending" now means lost
+    recover_pending_uploads()
+
+
+@app.on_event("startup")
+def resume_analysis_jobs():
+    # Jobs a restart interrupted pick up from their spooled upload
+    resume_jobs()
+
+
+@app.on_event("startup")
+def warm_analysis_pool():
+    # Workers import sklearn/networkx and load the model before traffic
+    start_pool()
+
+
+@app.on_event("shutdown")
+def shutdown_analysis_pool():
+    stop_pool()
+
+
+@app.on_event("shutdown")
+def drain_write_behind():
+    flush_writes()
+
+
+app.include_router(jobs.router)
+app.include_router(incremental.router)
+app.include_router(streaming.router)
+app.include_router(uploads.router)
+app.include_router(history.router)
+
+
 @app.get("/")
 def home():
     return {
@@ -33,26 +107,84 @@ def home():
     }
 
 
-@app.post("/analyze")
-async def analyze_data(file: UploadFile = File(...)):
+@app.get("/metrics")
+def metrics():
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
 
-    if not file.filename.endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Please upload a valid CSV file.")
 
-    content = await file.read()
+@app.get("/cache/stats")
+def cache_stats():
+    cache = get_cache()
+    return cache.info() if cache is not None else {"enabled": False}
 
-    try:
-        df = pd.read_csv(io.BytesIO(content))
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid CSV format.")
 
-    # Run blocking computation in separate thread
-    try:
-        results = await asyncio.to_thread(run_analysis, df)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+def _respond(results, response_format, accept_encoding, headers):
+    if response_format == "ndjson":
+        return ndjson_response(results, accept_encoding, headers)
 
-    return results
+    response = json_response(results)
+    response.headers.update(headers)
+    return response
+
+
+@app.post("/analyze")
+async def analyze_data(
+    file: UploadFile = File(...),
+    refresh: bool = False,
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    accept_encoding: str = Header(None)
+):
+    """`refresh=true` skips the result cache and recomputes.
+
+    `format=ndjson` streams the summary, then accounts and rings one per
+    line (gzipped when the client accepts it) instead of one document.
+    """
+
+    if not is_supported_upload(file.filename):
+        raise HTTPException(status_code=400, detail="Please upload a CSV, Parquet or Arrow file.")
+
+    cache = get_cache()
+
+    with track_in_flight():
+        digest = upload_digest()
+        path = await spool_upload(file, digest=digest)
+
+        if cache is not None:
+            key = await asyncio.to_thread(cache_key, digest)
+
+            if not refresh:
+                cached = await asyncio.to_thread(cache.get, key)
+                if cached is not None:
+                    discard_spool(path)
+                    return _respond(cached, response_format, accept_encoding, {"X-Cache": "hit"})
+
+        UPLOAD_BYTES.observe(os.path.getsize(path))
+
+        # Admitted by estimated size, then parsed and analyzed in a
+        # pre-warmed worker process
+        try:
+            results = await analyze_upload(path, file.filename)
+        except UploadRejected as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers())
+        except UnreadableUpload:
+            raise HTTPException(status_code=400, detail="Invalid or unreadable upload.")
+        except AnalysisMemoryExceeded as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            discard_spool(path)
+
+        UPLOAD_ROWS.observe(results["summary"]["total_transactions_analyzed"])
+        record_summary(results["summary"])
+
+        headers = {}
+        if cache is not None:
+            await asyncio.to_thread(cache.put, key, results)
+            headers["X-Cache"] = "miss"
+
+    return _respond(results, response_format, accept_encoding, headers)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime
+from sqlalchemy import Column, Integer, Float, String, DateTime, Text, UniqueConstraint
 from datetime import datetime
 from app.core.database import Base
 
@@ -26,4 +26,35 @@ class FraudAccount(Base):
     total_times_flagged = Column(Integer, default=1)
     highest_score_seen = Column(Float)
     last_pattern_type = Column(String)
-    last_flagged_at = Column(DateTime, default=datetime.utcnow)
+    last_flagged_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class FraudAccountFlag(Base):
+    """One account flagged by one analysed dataset; counted once however
+    often that dataset is re-analysed."""
+
+    __tablename__ = "fraud_account_flags"
+    __table_args__ = (UniqueConstraint("account_id", "upload_key", name="uq_fraud_account_flag"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(String, nullable=False)
+    upload_key = Column(String, nullable=False, index=True)
+    flagged_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+# -----------------------------
+# Background Analysis Jobs
+# -----------------------------
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    status = Column(String, default="queued", index=True)
+    filename = Column(String)
+    upload_path = Column(String)
+    result_path = Column(String)
+    progress = Column(Text)  # JSON: {"running": [...], "done": [...]}
+    error = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
@@ -7,7 +7,8 @@ def save_analysis(
     risk_score: float,
     cycle: int,
     smurf: int,
-    shell: int
+    shell: int,
+    commit: bool = True
 ):
     record = AnalysisResult(
         graph_id=graph_id,
@@ -18,7 +19,12 @@ def save_analysis(
     )
 
     db.add(record)
-    db.commit()
-    db.refresh(record)
+
+    if commit:
+        db.commit()
+        db.refresh(record)
+    else:
+        # Caller commits; flush so record.id is assigned
+        db.flush()
 
     return record
@@ -1,13 +1,16 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from datetime import datetime
-from app.models.db_models import FraudAccount
+from app.config import DB_BATCH_SIZE
+from app.models.db_models import FraudAccount, FraudAccountFlag
 
 
-def update_fraud_account(db: Session, account_data: dict):
+def _flag(db: Session, account_data: dict, flagged_at=None):
 
     account_id = account_data["account_id"]
     score = account_data["suspicion_score"]
     pattern = account_data["detected_patterns"][0]
+    flagged_at = flagged_at or datetime.utcnow()
 
     existing = db.query(FraudAccount).filter(
         FraudAccount.account_id == account_id
@@ -17,14 +20,120 @@ def update_fraud_account(db: Session, account_data: dict):
         existing.total_times_flagged += 1
         existing.highest_score_seen = max(existing.highest_score_seen, score)
         existing.last_pattern_type = pattern
-        existing.last_flagged_at = datetime.utcnow()
+        existing.last_flagged_at = flagged_at
     else:
         new_account = FraudAccount(
             account_id=account_id,
             total_times_flagged=1,
             highest_score_seen=score,
-            last_pattern_type=pattern
+            last_pattern_type=pattern,
+            last_flagged_at=flagged_at
         )
         db.add(new_account)
 
+
+def update_fraud_account(db: Session, account_data: dict):
+
+    _flag(db, account_data)
     db.commit()
+
+
+def _first_flags(db: Session, accounts: list, upload_key, now, insert, batch_size):
+    """Record (account, upload_key) flags and return the accounts that had
+    none yet, so re-analysing a dataset doesn't count its flags again."""
+
+    table = FraudAccountFlag.__table__
+    rows = [
+        {"account_id": a["account_id"], "upload_key": upload_key, "flagged_at": now}
+        for a in accounts
+    ]
+
+    if insert is None:
+        seen = {
+            account_id for (account_id,) in db.query(FraudAccountFlag.account_id).filter(
+                FraudAccountFlag.upload_key == upload_key
+            )
+        }
+        rows = [r for r in rows if r["account_id"] not in seen]
+        if rows:
+            db.execute(table.insert(), rows)
+        new = {r["account_id"] for r in rows}
+    else:
+        stmt = insert(table).on_conflict_do_nothing(
+            index_elements=[table.c.account_id, table.c.upload_key]
+        ).returning(table.c.account_id)
+
+        new = set()
+        for i in range(0, len(rows), batch_size):
+            new.update(db.execute(stmt, rows[i:i + batch_size]).scalars().all())
+
+    return [a for a in accounts if a["account_id"] in new]
+
+
+def upsert_fraud_accounts(db: Session, accounts: list, upload_key=None, batch_size=DB_BATCH_SIZE):
+    """Flag many accounts at once, without committing.
+
+    Same effect as update_fraud_account per account, but one
+    INSERT ... ON CONFLICT(account_id) DO UPDATE per batch instead of a
+    SELECT and a commit each. With `upload_key`, accounts already flagged
+    under that key are skipped. The caller commits, so the whole analysis
+    lands in one transaction.
+    """
+
+    if not accounts:
+        return 0
+
+    now = datetime.utcnow()
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        greatest = func.max  # two-argument max() is scalar in SQLite
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        greatest = func.greatest
+    else:
+        insert = greatest = None
+
+    if upload_key is not None:
+        accounts = _first_flags(db, accounts, upload_key, now, insert, batch_size)
+        if not accounts:
+            return 0
+
+    if insert is None:
+        # No native upsert here; same transaction, one row at a time
+        for account in accounts:
+            _flag(db, account, now)
+        db.flush()
+        return len(accounts)
+
+    table = FraudAccount.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.account_id],
+        set_={
+            "total_times_flagged": table.c.total_times_flagged + 1,
+            "highest_score_seen": greatest(
+                func.coalesce(table.c.highest_score_seen, stmt.excluded.highest_score_seen),
+                stmt.excluded.highest_score_seen
+            ),
+            "last_pattern_type": stmt.excluded.last_pattern_type,
+            "last_flagged_at": stmt.excluded.last_flagged_at
+        }
+    )
+
+    rows = [
+        {
+            "account_id": a["account_id"],
+            "total_times_flagged": 1,
+            "highest_score_seen": a["suspicion_score"],
+            "last_pattern_type": a["detected_patterns"][0],
+            "last_flagged_at": now
+        }
+        for a in accounts
+    ]
+
+    for i in range(0, len(rows), batch_size):
+        db.execute(stmt, rows[i:i + batch_size])
+
+    return len(rows)
@@ -0,0 +1,34 @@
+from sqlalchemy.orm import Session
+from app.models.db_models import AnalysisJob
+
+
+def create_job(db: Session, job_id: str, filename: str, upload_path: str):
+
+    job = AnalysisJob(
+        id=job_id,
+        status="queued",
+        filename=filename,
+        upload_path=upload_path
+    )
+
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    return job
+
+
+def get_job(db: Session, job_id: str):
+    return db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+
+
+def update_job(db: Session, job_id: str, **fields):
+
+    db.query(AnalysisJob).filter(AnalysisJob.id == job_id).update(fields)
+    db.commit()
+
+
+def unfinished_jobs(db: Session):
+    return db.query(AnalysisJob).filter(
+        AnalysisJob.status.in_(["queued", "running"])
+    ).order_by(AnalysisJob.created_at).all()
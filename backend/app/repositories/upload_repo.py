@@ -0,0 +1,202 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import DB_BATCH_SIZE
+from app.db.model import FraudRing, RingMember, SuspiciousAccount, Transaction, Upload
+
+
+def _insert_batches(db: Session, table, rows, batch_size):
+    # Core executemany; the ORM unit of work is far too slow at 1e5+ rows
+    for i in range(0, len(rows), batch_size):
+        db.execute(insert(table), rows[i:i + batch_size])
+
+
+def create_upload(db: Session, filename):
+    """Register an analysis before its results are written."""
+
+    upload = Upload(filename=filename, uploaded_at=datetime.utcnow(), status="pending")
+
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+
+    return upload.id
+
+
+def set_upload_status(db: Session, upload_id: int, status: str):
+    db.query(Upload).filter(Upload.id == upload_id).update({"status": status})
+
+
+def interrupt_pending_uploads(db: Session):
+    """Mark uploads whose write never finished, e.g. across a restart."""
+
+    count = db.query(Upload).filter(Upload.status == "pending").update({"status": "interrupted"})
+    db.commit()
+
+    return count
+
+
+def save_upload_results(
+    db: Session,
+    upload_id: int,
+    fraud_rings: list,
+    suspicious_accounts: list,
+    transactions=None,
+    batch_size=DB_BATCH_SIZE
+):
+    """Store one analysis in the normalized tables, without committing.
+
+    `transactions` is the upload frame (transaction_id, sender_id,
+    receiver_id, amount, timestamp) or None to skip the raw rows.
+    """
+
+    if transactions is not None and len(transactions):
+        timestamps = transactions["timestamp"]
+        if getattr(timestamps.dt, "tz", None) is not None:
+            timestamps = timestamps.dt.tz_convert(None)
+
+        if "transaction_id" in transactions.columns:
+            tx_ids = transactions["transaction_id"].astype(str).tolist()
+        else:
+            tx_ids = [None] * len(transactions)
+
+        rows = [
+            {
+                "upload_id": upload_id,
+                "transaction_id": tx_id,
+                "sender_id": sender,
+                "receiver_id": receiver,
+                "amount": amount,
+                "timestamp": ts
+            }
+            for tx_id, sender, receiver, amount, ts in zip(
+                tx_ids,
+                transactions["sender_id"].astype(str).tolist(),
+                transactions["receiver_id"].astype(str).tolist(),
+                transactions["amount"].astype(float).tolist(),
+                timestamps.dt.to_pydatetime().tolist()
+            )
+        ]
+        _insert_batches(db, Transaction.__table__, rows, batch_size)
+
+    _insert_batches(db, FraudRing.__table__, [
+        {
+            "upload_id": upload_id,
+            "ring_id": r["ring_id"],
+            "pattern_type": r["pattern_type"],
+            "risk_score": r["risk_score"]
+        }
+        for r in fraud_rings
+    ], batch_size)
+
+    # Members hang off the ring's primary key
+    ring_pks = dict(db.execute(
+        select(FraudRing.ring_id, FraudRing.id).where(FraudRing.upload_id == upload_id)
+    ).all())
+
+    _insert_batches(db, RingMember.__table__, [
+        {"ring_fk": ring_pks[r["ring_id"]], "account_id": account}
+        for r in fraud_rings
+        for account in r["member_accounts"]
+    ], batch_size)
+
+    _insert_batches(db, SuspiciousAccount.__table__, [
+        {
+            "upload_id": upload_id,
+            "account_id": a["account_id"],
+            "suspicion_score": a["suspicion_score"],
+            "detected_patterns": json.dumps(a["detected_patterns"]),
+            "ring_id": a["ring_id"]
+        }
+        for a in suspicious_accounts
+    ], batch_size)
+
+    set_upload_status(db, upload_id, "completed")
+
+
+# -----------------------------
+# Reads
+# -----------------------------
+# Keyset pages: `after` is the sort key of the previous page's last row,
+# so deep pages cost the same index seek as the first one. Each query
+# fetches limit + 1 rows; the extra one only says whether more follow.
+def list_uploads(db: Session, limit: int, after=None, status=None):
+
+    query = db.query(Upload)
+
+    if status is not None:
+        query = query.filter(Upload.status == status)
+    if after is not None:
+        query = query.filter(Upload.id < after)
+
+    return query.order_by(Upload.id.desc()).limit(limit + 1).all()
+
+
+def get_upload(db: Session, upload_id: int):
+    return db.query(Upload).filter(Upload.id == upload_id).first()
+
+
+def count_rows(db: Session, model, upload_id: int):
+    return db.query(func.count(model.id)).filter(model.upload_id == upload_id).scalar()
+
+
+def get_rings(db: Session, upload_id: int, limit: int, after=None, pattern_type=None):
+
+    query = db.query(FraudRing).filter(FraudRing.upload_id == upload_id)
+
+    if pattern_type is not None:
+        query = query.filter(FraudRing.pattern_type == pattern_type)
+    if after is not None:
+        query = query.filter(FraudRing.id > after)
+
+    return query.order_by(FraudRing.id).limit(limit + 1).all()
+
+
+def get_ring(db: Session, upload_id: int, ring_id: str):
+    return db.query(FraudRing).filter(
+        FraudRing.upload_id == upload_id,
+        FraudRing.ring_id == ring_id
+    ).first()
+
+
+def get_ring_members(db: Session, ring_pk: int, limit: int, after=None):
+
+    query = db.query(RingMember).filter(RingMember.ring_fk == ring_pk)
+
+    if after is not None:
+        query = query.filter(RingMember.id > after)
+
+    return query.order_by(RingMember.id).limit(limit + 1).all()
+
+
+def get_accounts_by_score(
+    db: Session,
+    upload_id: int,
+    limit: int,
+    after=None,
+    min_score=None,
+    max_score=None
+):
+    """Highest score first; `after` is the last row's (score, id)."""
+
+    query = db.query(SuspiciousAccount).filter(SuspiciousAccount.upload_id == upload_id)
+
+    if min_score is not None:
+        query = query.filter(SuspiciousAccount.suspicion_score >= min_score)
+    if max_score is not None:
+        query = query.filter(SuspiciousAccount.suspicion_score <= max_score)
+
+    if after is not None:
+        score, row_id = after
+        query = query.filter(or_(
+            SuspiciousAccount.suspicion_score < score,
+            and_(SuspiciousAccount.suspicion_score == score, SuspiciousAccount.id > row_id)
+        ))
+
+    return query.order_by(
+        SuspiciousAccount.suspicion_score.desc(),
+        SuspiciousAccount.id
+    ).limit(limit + 1).all()
@@ -0,0 +1,14 @@
+import logging
+import os
+
+
+LOG_LEVEL = os.getenv("RIFT_LOG_LEVEL", "INFO")
+
+logging.basicConfig(
+    level=LOG_LEVEL,
+    format="%(asctime)s %(levelname)s [%(name)s] %(message)s"
+)
+
+
+def get_logger(name):
+    return logging.getLogger(name)
@@ -0,0 +1,203 @@
+import os
+import resource
+import tracemalloc
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest
+)
+
+
+# tracemalloc slows allocation-heavy code noticeably; opt in per deployment
+TRACEMALLOC_ENABLED = os.getenv("RIFT_TRACEMALLOC", "0") == "1"
+
+if TRACEMALLOC_ENABLED:
+    tracemalloc.start()
+
+
+STAGE_SECONDS = Histogram(
+    "rift_stage_duration_seconds",
+    "Wall time of each analysis stage",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+
+STAGE_CPU_SECONDS = Counter(
+    "rift_stage_cpu_seconds_total",
+    "Thread CPU time spent in each analysis stage",
+    ["stage"]
+)
+
+STAGE_RSS_DELTA = Gauge(
+    "rift_stage_rss_delta_bytes",
+    "Change in process RSS across the stage; stages running alongside it count too",
+    ["stage"]
+)
+
+STAGE_TRACED_DELTA = Gauge(
+    "rift_stage_traced_delta_bytes",
+    "Change in tracemalloc-traced memory across the stage (RIFT_TRACEMALLOC=1 only)",
+    ["stage"]
+)
+
+ANALYSIS_SECONDS = Histogram(
+    "rift_analysis_duration_seconds",
+    "End-to-end run_analysis time",
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+
+ROWS_PROCESSED = Counter("rift_rows_processed_total", "Transactions analyzed")
+EDGES_PROCESSED = Counter("rift_edges_processed_total", "Aggregated graph edges analyzed")
+
+ROWS_PER_SECOND = Gauge("rift_last_rows_per_second", "Throughput of the last analysis")
+EDGES_PER_SECOND = Gauge("rift_last_edges_per_second", "Edge throughput of the last analysis")
+
+UPLOAD_BYTES = Histogram(
+    "rift_upload_bytes",
+    "Size of accepted uploads",
+    buckets=tuple(2 ** p for p in range(10, 36, 2))
+)
+
+UPLOAD_ROWS = Histogram(
+    "rift_upload_rows",
+    "Transactions per accepted upload",
+    buckets=tuple(10 ** p for p in range(1, 9))
+)
+
+ANALYSES_IN_FLIGHT = Gauge(
+    "rift_analyses_in_flight",
+    "Analyses queued or running (queue depth)"
+)
+
+POOL_QUEUE_DEPTH = Gauge(
+    "rift_pool_queue_depth",
+    "Admitted uploads waiting for an analysis worker",
+    ["pool"]
+)
+
+ADMITTED_ROWS = Gauge(
+    "rift_admitted_rows",
+    "Estimated rows admitted to the analysis pool (queued + running)",
+    ["pool"]
+)
+
+ADMISSION_REJECTIONS = Counter(
+    "rift_admission_rejections_total",
+    "Uploads turned away by admission control",
+    ["pool", "reason"]
+)
+
+CACHE_HITS = Counter("rift_result_cache_hits_total", "Result cache hits", ["tier"])
+CACHE_MISSES = Counter("rift_result_cache_misses_total", "Result cache misses")
+CACHE_EVICTIONS = Counter("rift_result_cache_evictions_total", "Responses evicted from the disk tier")
+
+PERSIST_QUEUE_DEPTH = Gauge(
+    "rift_persist_queue_depth",
+    "Finished analyses waiting for the write-behind writer"
+)
+
+PERSIST_SECONDS = Histogram(
+    "rift_persist_seconds",
+    "Time to write one analysis to the database"
+)
+
+PERSIST_WRITES = Counter(
+    "rift_persist_writes_total",
+    "Analyses written by the write-behind writer",
+    ["outcome"]
+)
+
+
+# -----------------------------
+# Recording Helpers
+# -----------------------------
+PAGE_SIZE = resource.getpagesize()
+
+
+def current_rss_bytes():
+    """Resident set size right now, or None off Linux."""
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@contextmanager
+def stage_memory(stats):
+    """Fill `stats` with how much memory the wrapped stage left behind.
+
+    Both readings are before/after differences of process-wide counters
+    (the process peak can't be reset per stage), so concurrent stages show
+    up in each other's numbers.
+    """
+
+    rss_before = current_rss_bytes()
+    if TRACEMALLOC_ENABLED:
+        traced_before = tracemalloc.get_traced_memory()[0]
+
+    yield
+
+    rss_after = current_rss_bytes()
+    if rss_before is not None and rss_after is not None:
+        stats["rss_delta_bytes"] = rss_after - rss_before
+
+    if TRACEMALLOC_ENABLED:
+        stats["traced_delta_bytes"] = tracemalloc.get_traced_memory()[0] - traced_before
+
+
+def record_stage_timings(stage_timings):
+
+    for stage, stats in stage_timings.items():
+
+        STAGE_SECONDS.labels(stage).observe(stats["wall_seconds"])
+
+        if "cpu_seconds" in stats:
+            STAGE_CPU_SECONDS.labels(stage).inc(stats["cpu_seconds"])
+
+        if "rss_delta_bytes" in stats:
+            STAGE_RSS_DELTA.labels(stage).set(stats["rss_delta_bytes"])
+
+        if "traced_delta_bytes" in stats:
+            STAGE_TRACED_DELTA.labels(stage).set(stats["traced_delta_bytes"])
+
+
+def record_analysis(seconds, rows, edges):
+
+    ANALYSIS_SECONDS.observe(seconds)
+    ROWS_PROCESSED.inc(rows)
+    EDGES_PROCESSED.inc(edges)
+
+    if seconds > 0:
+        ROWS_PER_SECOND.set(rows / seconds)
+        EDGES_PER_SECOND.set(edges / seconds)
+
+
+def record_summary(summary):
+    """Record an analysis from its response summary, wherever it ran."""
+
+    record_stage_timings(summary["stage_timings"])
+    record_analysis(
+        summary["processing_time_seconds"],
+        summary["total_transactions_analyzed"],
+        summary["total_edges_analyzed"]
+    )
+
+
+@contextmanager
+def track_in_flight():
+
+    ANALYSES_IN_FLIGHT.inc()
+    try:
+        yield
+    finally:
+        ANALYSES_IN_FLIGHT.dec()
+
+
+def render_metrics():
+    return generate_latest(), CONTENT_TYPE_LATEST
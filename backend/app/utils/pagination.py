@@ -0,0 +1,38 @@
+import base64
+import json
+
+
+def encode_cursor(key):
+    """Opaque cursor for a keyset position (an id or a list of sort keys)."""
+
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; ValueError for anything it didn't make."""
+
+    if cursor is None:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor.")
+
+
+def page(rows, limit, view, key):
+    """Page body from limit + 1 fetched rows.
+
+    `view` renders a row; `key` gives the keyset position of a row.
+    """
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "items": [view(r) for r in rows],
+        "limit": limit,
+        "next_cursor": encode_cursor(key(rows[-1])) if has_more else None
+    }
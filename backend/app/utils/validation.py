@@ -0,0 +1,19 @@
+REQUIRED_COLUMNS = [
+    "transaction_id",
+    "sender_id",
+    "receiver_id",
+    "amount",
+    "timestamp"
+]
+
+
+def missing_columns(columns):
+    return [col for col in REQUIRED_COLUMNS if col not in columns]
+
+
+ACCOUNT_COLUMNS = ["sender_id", "receiver_id"]
+
+
+def blank_account_rows(df):
+    """Rows with no sender or receiver, which can't become graph edges."""
+    return int(df[ACCOUNT_COLUMNS].isna().any(axis=1).sum())
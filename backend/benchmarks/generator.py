@@ -0,0 +1,349 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# -----------------------------
+# Defaults
+# -----------------------------
+START = pd.Timestamp("2026-01-01")
+SPAN_DAYS = 30
+
+# Share of rows spent on planted fraud / legitimate hubs
+FRAUD_FRACTION = 0.01
+HUB_FRACTION = 0.01
+
+# Background accounts per row; ~20 transactions per account
+ACCOUNTS_PER_ROW = 0.05
+
+HOUR = 3600
+
+
+# -----------------------------
+# Planted Patterns
+# -----------------------------
+# Every pattern returns (src, dst, amount, seconds, is_fraud) arrays and
+# the next free account code. Planted fraud uses fresh accounts so the
+# structure can't be disturbed by background traffic. Where a pattern
+# touches background accounts it respects their hidden order (`rank`),
+# so it never closes a cycle through them.
+
+def _pattern(src, dst, amount, seconds, fraud):
+    return (
+        np.asarray(src, dtype=np.int64),
+        np.asarray(dst, dtype=np.int64),
+        np.asarray(amount, dtype=np.float64),
+        np.asarray(seconds, dtype=np.int64),
+        np.full(len(src), fraud, dtype=np.int8)
+    )
+
+
+def _ordered(rng, rank, count):
+    """`count` (earlier, later) pairs of distinct background accounts."""
+
+    a = rng.integers(0, len(rank), count)
+    b = rng.integers(0, len(rank) - 1, count)
+    b[b >= a] += 1
+
+    return rank[np.minimum(a, b)], rank[np.maximum(a, b)]
+
+
+def _groups(rng, count, low, high):
+    """Sizes, start offsets and per-row (group, position) for `count` groups."""
+
+    sizes = rng.integers(low, high + 1, count)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    group = np.repeat(np.arange(count), sizes)
+    position = np.arange(sizes.sum()) - starts[group]
+
+    return sizes, starts, group, position
+
+
+def plant_cycles(rng, count, next_code, span):
+    """Rings of length 3-5, each hop a few hours after the last."""
+
+    sizes, starts, group, position = _groups(rng, count, 3, 5)
+
+    src = next_code + starts[group] + position
+    dst = next_code + starts[group] + (position + 1) % sizes[group]
+
+    base = rng.integers(0, span - 5 * 6 * HOUR, count)
+    seconds = base[group] + position * rng.integers(HOUR, 6 * HOUR, len(src))
+
+    # Each layer skims a little off the top
+    amount = rng.uniform(5_000, 50_000, count)[group] * 0.97 ** position
+
+    return _pattern(src, dst, amount, seconds, 1), next_code + sizes.sum()
+
+
+def plant_fan_in(rng, count, next_code, span, rank):
+    """10-20 mules paying one aggregator inside 48h, which then moves it on."""
+
+    sizes, _, group, _ = _groups(rng, count, 10, 20)
+
+    aggregators = next_code + np.arange(count)
+    mules = next_code + count + np.arange(sizes.sum())
+
+    base = rng.integers(0, span - 72 * HOUR, count)
+
+    deposits = _pattern(
+        mules,
+        aggregators[group],
+        rng.uniform(500, 9_500, len(mules)),
+        base[group] + rng.integers(0, 48 * HOUR, len(mules)),
+        1
+    )
+    exits = _pattern(
+        aggregators,
+        rng.choice(rank, count),
+        rng.uniform(20_000, 150_000, count),
+        base + 60 * HOUR,
+        1
+    )
+
+    return _concat([deposits, exits]), next_code + count + sizes.sum()
+
+
+def plant_fan_out(rng, count, next_code, span, rank):
+    """One large deposit split across 10-20 fresh receivers inside 48h."""
+
+    sizes, _, group, _ = _groups(rng, count, 10, 20)
+
+    hubs = next_code + np.arange(count)
+    receivers = next_code + count + np.arange(sizes.sum())
+
+    base = rng.integers(0, span - 72 * HOUR, count)
+
+    deposits = _pattern(
+        rng.choice(rank, count),
+        hubs,
+        rng.uniform(20_000, 150_000, count),
+        base,
+        1
+    )
+    splits = _pattern(
+        hubs[group],
+        receivers,
+        rng.uniform(500, 9_500, len(receivers)),
+        base[group] + rng.integers(HOUR, 48 * HOUR, len(receivers)),
+        1
+    )
+
+    return _concat([deposits, splits]), next_code + count + sizes.sum()
+
+
+def plant_shell_chains(rng, count, next_code, span, rank):
+    """start -> shell -> shell -> end, the shells seeing nothing else."""
+
+    first = next_code + 2 * np.arange(count)
+    second = first + 1
+
+    start, end = _ordered(rng, rank, count)
+
+    base = rng.integers(0, span - 24 * HOUR, count)
+    amount = rng.uniform(5_000, 80_000, count)
+
+    hops = _concat([
+        _pattern(start, first, amount, base, 1),
+        _pattern(first, second, amount * 0.98, base + 4 * HOUR, 1),
+        _pattern(second, end, amount * 0.96, base + 8 * HOUR, 1)
+    ])
+
+    return hops, next_code + 2 * count
+
+
+def plant_payroll(rng, count, next_code, span, rank):
+    """Hubs funded once, then paying 100-300 employees on one day a month."""
+
+    sizes, _, group, _ = _groups(rng, count, 100, 300)
+
+    hubs = next_code + np.arange(count)
+    pay_day = rng.integers(0, span - 24 * HOUR, count)
+
+    # Employers come from the front of the order, employees after them
+    split = max(1, len(rank) // 100)
+
+    funding = _pattern(
+        rng.choice(rank[:split], count),
+        hubs,
+        rng.uniform(500_000, 2_000_000, count),
+        np.maximum(pay_day - 24 * HOUR, 0),
+        0
+    )
+    salaries = _pattern(
+        hubs[group],
+        rng.choice(rank[split:], len(group)),
+        rng.uniform(1_500, 6_000, len(group)),
+        pay_day[group] + rng.integers(0, 4 * HOUR, len(group)),
+        0
+    )
+
+    return _concat([funding, salaries]), next_code + count
+
+
+def plant_merchants(rng, count, rows, next_code, span, rank):
+    """Merchants collecting card-sized payments from customers all period."""
+
+    hubs = next_code + np.arange(count)
+    merchant = rng.integers(0, count, rows)
+
+    sales = _pattern(
+        rng.choice(rank, rows),
+        hubs[merchant],
+        rng.lognormal(3.5, 1.0, rows),
+        rng.integers(0, span, rows),
+        0
+    )
+
+    return sales, next_code + count
+
+
+def _concat(parts):
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+# -----------------------------
+# Background Traffic
+# -----------------------------
+def background_traffic(rng, rows, rank, span):
+    """Random transfers oriented along a hidden account order.
+
+    Keeping the background acyclic means every cycle in the output is a
+    planted one, however large the file gets.
+    """
+
+    src, dst = _ordered(rng, rank, rows)
+
+    return _pattern(
+        src,
+        dst,
+        rng.lognormal(5.0, 1.2, rows),
+        rng.integers(0, span, rows),
+        0
+    )
+
+
+# -----------------------------
+# Generator
+# -----------------------------
+def generate_transactions(
+    rows,
+    seed=0,
+    fraud_fraction=FRAUD_FRACTION,
+    hub_fraction=HUB_FRACTION,
+    accounts=None,
+    span_days=SPAN_DAYS
+):
+    """A seeded, labelled transaction frame in the upload schema.
+
+    The same (rows, seed, ...) always produces the same frame. Planted
+    patterns scale with `rows`; `is_fraud` marks their transactions.
+    """
+
+    rng = np.random.default_rng(seed)
+    span = span_days * 24 * HOUR
+
+    if accounts is None:
+        accounts = max(1_000, int(rows * ACCOUNTS_PER_ROW))
+
+    # Planted fraud budget split evenly across the four typologies
+    fraud_rows = int(rows * fraud_fraction)
+    per_pattern = fraud_rows // 4
+
+    n_cycles = max(1, per_pattern // 4)
+    n_fan_in = max(1, per_pattern // 16)
+    n_fan_out = max(1, per_pattern // 16)
+    n_shells = max(1, per_pattern // 3)
+
+    hub_rows = int(rows * hub_fraction)
+    n_payroll = max(1, hub_rows // 2 // 200)
+    n_merchants = max(1, n_payroll)
+    merchant_rows = max(200, hub_rows // 2)
+
+    rank = rng.permutation(accounts)
+    parts = []
+
+    part, next_code = plant_cycles(rng, n_cycles, accounts, span)
+    parts.append(part)
+
+    for plant, count in (
+        (plant_fan_in, n_fan_in),
+        (plant_fan_out, n_fan_out),
+        (plant_shell_chains, n_shells),
+        (plant_payroll, n_payroll)
+    ):
+        part, next_code = plant(rng, count, next_code, span, rank)
+        parts.append(part)
+
+    part, next_code = plant_merchants(rng, n_merchants, merchant_rows, next_code, span, rank)
+    parts.append(part)
+
+    # At least one of each pattern is planted, so very small requests
+    # can come back slightly longer than `rows`
+    planted = sum(len(part[0]) for part in parts)
+    parts.append(background_traffic(rng, max(rows - planted, 0), rank, span))
+
+    src, dst, amount, seconds, fraud = _concat(parts)
+
+    order = np.argsort(seconds, kind="stable")
+    src, dst, amount, seconds, fraud = (
+        src[order], dst[order], amount[order], seconds[order], fraud[order]
+    )
+
+    # Shuffle account codes so planted accounts aren't a recognisable range
+    names = np.array(
+        [f"ACC_{i:08d}" for i in range(next_code)], dtype=object
+    )[rng.permutation(next_code)]
+
+    n = len(src)
+
+    return pd.DataFrame({
+        "transaction_id": pd.Series(np.arange(n)).map("TX_{:010d}".format),
+        "sender_id": names[src],
+        "receiver_id": names[dst],
+        "amount": np.round(amount, 2),
+        "timestamp": START + pd.to_timedelta(seconds, unit="s"),
+        "is_fraud": fraud
+    })
+
+
+def write_transactions(df, path):
+    """Write as Parquet for .parquet paths, CSV (optionally .gz/.zst) otherwise."""
+
+    if path.endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False, date_format="%Y-%m-%d %H:%M:%S")
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main(argv):
+    # python -m benchmarks.generator --rows 1000000 --output tx.parquet
+    parser = argparse.ArgumentParser(description="Generate a labelled synthetic transaction file.")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fraud-fraction", type=float, default=FRAUD_FRACTION)
+    parser.add_argument("--hub-fraction", type=float, default=HUB_FRACTION)
+    parser.add_argument("--accounts", type=int, default=None)
+    parser.add_argument("--output", default="transactions.csv")
+    args = parser.parse_args(argv)
+
+    df = generate_transactions(
+        args.rows,
+        seed=args.seed,
+        fraud_fraction=args.fraud_fraction,
+        hub_fraction=args.hub_fraction,
+        accounts=args.accounts
+    )
+    write_transactions(df, args.output)
+
+    print(f"Wrote {len(df)} rows ({int(df['is_fraud'].sum())} fraudulent) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,96 @@
+import argparse
+import http.client
+import json
+import sys
+import time
+from urllib.parse import urlsplit
+
+from app.core.ingest import read_upload
+
+
+def iter_events(path, rate=None):
+    """Transactions from a file as stream events, in timestamp order.
+
+    `rate` (events/second) paces the replay; None sends as fast as possible.
+    """
+
+    df = read_upload(path).sort_values("timestamp", kind="stable")
+    df["timestamp"] = df["timestamp"].dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+    columns = ["transaction_id", "sender_id", "receiver_id", "amount", "timestamp"]
+    interval = 1.0 / rate if rate else 0.0
+    next_send = time.perf_counter()
+
+    for row in df[columns].itertuples(index=False):
+        if interval:
+            next_send += interval
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        yield dict(zip(columns, row))
+
+
+def replay_local(path, rate=None):
+    """Feed a file straight into an in-process monitor."""
+
+    from app.core.streaming import SlidingWindowMonitor
+
+    monitor = SlidingWindowMonitor()
+
+    for event in iter_events(path, rate):
+        for alert in monitor.ingest(event):
+            print(json.dumps(alert))
+
+    print(json.dumps({"stats": monitor.info()}))
+
+
+def replay_http(path, url, rate=None, batch=500):
+    """POST a file as chunked NDJSON and print the alerts streamed back."""
+
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80)
+
+    def body():
+        lines = []
+        for event in iter_events(path, rate):
+            lines.append(json.dumps(event))
+            if len(lines) >= batch:
+                yield ("\n".join(lines) + "\n").encode()
+                lines = []
+        if lines:
+            yield ("\n".join(lines) + "\n").encode()
+
+    conn.request(
+        "POST",
+        parts.path,
+        body=body(),
+        headers={"Content-Type": "application/x-ndjson"},
+        encode_chunked=True
+    )
+
+    response = conn.getresponse()
+    for line in response:
+        print(line.decode().rstrip())
+
+    conn.close()
+
+
+def main(argv):
+    # python -m benchmarks.replay tx.csv --url http://127.0.0.1:8023/stream/default/events
+    parser = argparse.ArgumentParser(description="Replay a transaction file as a live stream.")
+    parser.add_argument("path")
+    parser.add_argument("--url", help="stream endpoint; omit to replay in-process")
+    parser.add_argument("--rate", type=float, default=None, help="events per second")
+    parser.add_argument("--batch", type=int, default=500, help="events per HTTP chunk")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        replay_http(args.path, args.url, args.rate, args.batch)
+    else:
+        replay_local(args.path, args.rate)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,295 @@
+import argparse
+import atexit
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Keep benchmark analyses out of the service's database and data
+# directories (graph indexes, result cache, history, jobs, feeds); a fresh
+# scratch directory per run also keeps earlier flags from boosting scores
+SCRATCH_DIR = tempfile.mkdtemp(prefix="rift_benchmark_")
+atexit.register(shutil.rmtree, SCRATCH_DIR, ignore_errors=True)
+
+os.environ.setdefault("RIFT_DATABASE_URL", "sqlite:///" + os.path.join(SCRATCH_DIR, "rift.db"))
+for variable, name in (
+    ("RIFT_GRAPH_INDEX_DIR", "graph_index"),
+    ("RIFT_RESULT_CACHE_DIR", "cache"),
+    ("RIFT_HISTORY_DIR", "history"),
+    ("RIFT_JOBS_DIR", "jobs"),
+    ("RIFT_INCREMENTAL_DIR", "incremental")
+):
+    os.environ.setdefault(variable, os.path.join(SCRATCH_DIR, name))
+
+import numpy as np
+import pandas as pd
+
+from app.core.database import Base, engine
+from app.models import db_models  # noqa: F401  (registers the tables)
+from app.db import model  # noqa: F401
+from app.core.ingest import read_upload
+from app.core.interning import intern_accounts
+from app.core.graph_builder import build_graph
+from app.core.cycle_detector import detect_cycles
+from app.core.smurf_detector import detect_smurfing
+from app.core.shell_detector import detect_shell_layers
+from app.core.activity import build_account_activity
+from app.core.partitioning import cycle_members
+from app.core.feature_engineering import build_node_features
+from app.core.model_registry import load_model
+from app.core.scoring_model import compute_anomaly_scores
+from app.core.orchestrator import run_analysis
+from app.core.persistence import flush_writes
+from benchmarks.generator import generate_transactions, write_transactions
+
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+# A stage only counts as regressed if it is slower by this fraction...
+DEFAULT_TOLERANCE = 0.2
+# ...and by at least this much wall time, so tiny stages don't flap
+MIN_REGRESSION_SECONDS = 0.01
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+def measure(fn, *args, repeat=3, memory=True):
+    """Best/median wall time and CPU time over `repeat` calls, plus one
+    extra call under tracemalloc for the peak Python/NumPy allocation.
+
+    Returns (stats, result of the last timed call).
+    """
+
+    walls = []
+    cpus = []
+    result = None
+
+    for _ in range(repeat):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        result = fn(*args)
+
+        walls.append(time.perf_counter() - wall_start)
+        cpus.append(time.process_time() - cpu_start)
+
+    stats = {
+        "wall_seconds_best": round(min(walls), 4),
+        "wall_seconds_median": round(statistics.median(walls), 4),
+        "cpu_seconds_median": round(statistics.median(cpus), 4)
+    }
+
+    # Traced separately; tracemalloc would distort the timings above
+    if memory:
+        tracemalloc.start()
+        try:
+            fn(*args)
+            stats["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # Lifetime peak of the benchmark process, not of this stage
+    stats["process_peak_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    return stats, result
+
+
+def benchmark_size(rows, seed=0, repeat=3, memory=True, fmt="csv", workdir=None):
+    """Time every pipeline stage on one generated dataset."""
+
+    df = generate_transactions(rows, seed=seed)
+
+    path = os.path.join(workdir or tempfile.gettempdir(), f"rift_bench_{rows}_{seed}.{fmt}")
+    write_transactions(df, path)
+
+    stages = {}
+
+    try:
+        stages["ingest"], df = measure(read_upload, path, repeat=repeat, memory=memory)
+        file_bytes = os.path.getsize(path)
+    finally:
+        os.remove(path)
+
+    stages["intern"], (tx, accounts) = measure(intern_accounts, df, repeat=repeat, memory=memory)
+
+    stages["build_graph"], graph = measure(
+        lambda: build_graph(tx, n_nodes=len(accounts)), repeat=repeat, memory=memory
+    )
+    stages["detect_cycles"], (cycle_rings, _) = measure(detect_cycles, graph, repeat=repeat, memory=memory)
+    stages["detect_smurfing"], smurf_rings = measure(detect_smurfing, tx, repeat=repeat, memory=memory)
+
+    in_cycle = cycle_members(cycle_rings)
+    stages["detect_shell_layers"], shell_rings = measure(
+        detect_shell_layers, graph, in_cycle, repeat=repeat, memory=memory
+    )
+
+    stages["build_account_activity"], activity = measure(
+        build_account_activity, graph, repeat=repeat, memory=memory
+    )
+    stages["build_node_features"], features = measure(
+        build_node_features, activity, repeat=repeat, memory=memory
+    )
+    stages["compute_anomaly_scores"], _ = measure(
+        compute_anomaly_scores, features, repeat=repeat, memory=memory
+    )
+
+    # run_analysis converts timestamps in place; give each call its own frame
+    stages["run_analysis"], response = measure(
+        lambda: run_analysis(df.copy()), repeat=repeat, memory=memory
+    )
+
+    summary = response["summary"]
+
+    # What the write-behind writer still owes after the timed runs
+    persist_start = time.perf_counter()
+    flush_writes()
+    persist_flush_seconds = round(time.perf_counter() - persist_start, 4)
+
+    return {
+        "rows": len(df),
+        "file_format": fmt,
+        "file_bytes": file_bytes,
+        "accounts": len(accounts),
+        "edges": graph.number_of_edges(),
+        "rings": {
+            "cycles": len(cycle_rings),
+            "smurfing": len(smurf_rings),
+            "shell": len(shell_rings)
+        },
+        "suspicious_accounts": summary["suspicious_accounts_flagged"],
+        "precision": summary["precision"],
+        "recall": summary["recall"],
+        "stages": stages,
+        "run_analysis_stage_timings": summary["stage_timings"],
+        "persist_flush_seconds": persist_flush_seconds,
+        "rows_per_second": round(len(df) / stages["run_analysis"]["wall_seconds_best"], 1)
+    }
+
+
+def environment():
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__
+    }
+
+
+# -----------------------------
+# Comparison
+# -----------------------------
+def compare_results(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Stages whose best wall time regressed against a previous results file.
+
+    Runs are matched on row count; sizes or stages missing from either
+    side are skipped.
+    """
+
+    regressions = []
+    baseline_runs = {run["rows"]: run for run in baseline["runs"]}
+
+    for run in current["runs"]:
+        before = baseline_runs.get(run["rows"])
+        if before is None:
+            continue
+
+        for stage, stats in run["stages"].items():
+            if stage not in before["stages"]:
+                continue
+
+            old = before["stages"][stage]["wall_seconds_best"]
+            new = stats["wall_seconds_best"]
+
+            if new > old * (1 + tolerance) and new - old >= MIN_REGRESSION_SECONDS:
+                regressions.append({
+                    "rows": run["rows"],
+                    "stage": stage,
+                    "baseline_seconds": old,
+                    "current_seconds": new,
+                    "slowdown": round(new / old, 2) if old else None
+                })
+
+    return regressions
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main(argv):
+    # python -m benchmarks.run --rows 10000 100000 --output bench.json [--baseline old.json]
+    parser = argparse.ArgumentParser(description="Benchmark every analysis stage on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--model", help="score with this persisted anomaly model")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="previous results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+
+    if args.model and load_model(args.model) is None:
+        print(f"No model at {args.model}")
+        return 1
+
+    results = {
+        "environment": environment(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "runs": []
+    }
+
+    for rows in args.rows:
+        run = benchmark_size(
+            rows,
+            seed=args.seed,
+            repeat=args.repeat,
+            memory=not args.no_memory,
+            fmt=args.format
+        )
+        results["runs"].append(run)
+
+        print(
+            f"{rows:>10} rows  "
+            f"run_analysis {run['stages']['run_analysis']['wall_seconds_best']:.3f}s  "
+            f"({run['rows_per_second']:.0f} rows/s)"
+        )
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = compare_results(results, baseline, args.tolerance)
+
+        for r in regressions:
+            print(
+                f"REGRESSION {r['stage']} @ {r['rows']} rows: "
+                f"{r['baseline_seconds']:.3f}s -> {r['current_seconds']:.3f}s"
+            )
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
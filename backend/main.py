@@ -1,7 +1,12 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
-import io
+from app.core.ingest import (
+    discard_spool,
+    is_supported_upload,
+    read_upload,
+    spool_upload
+)
+from app.utils.validation import REQUIRED_COLUMNS
 from engine import ForensicsEngine
 from schemas import ForensicsResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -29,18 +34,17 @@ app.add_middleware(
 
 @app.post("/analyze", response_model=ForensicsResponse)
 async def analyze_transactions(file: UploadFile = File(...)):
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="Only CSV files are allowed")
-    
+    if not is_supported_upload(file.filename):
+        raise HTTPException(status_code=400, detail="Only CSV, Parquet or Arrow files are allowed")
+
+    path = await spool_upload(file)
+
     try:
-        # Read CSV
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
-        
-        # Validate Columns
-        required_cols = ['transaction_id', 'sender_id', 'receiver_id', 'amount', 'timestamp']
-        if not all(col in df.columns for col in required_cols):
-            raise HTTPException(status_code=400, detail=f"Missing columns. Required: {required_cols}")
+        # Parse the spooled upload (chunked CSV or memory-mapped columnar)
+        try:
+            df = read_upload(path)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Missing columns. Required: {REQUIRED_COLUMNS}")
 
         # Run Analysis
         engine = ForensicsEngine(df)
@@ -48,8 +52,12 @@ async def analyze_transactions(file: UploadFile = File(...)):
         
         return results
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        discard_spool(path)
 
 if __name__ == "__main__":
     import uvicorn
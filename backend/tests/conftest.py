@@ -0,0 +1,43 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+
+# Point every store at a scratch directory before app.config is imported,
+# so tests never touch the service's database, indexes or caches
+SCRATCH_DIR = tempfile.mkdtemp(prefix="rift_tests_")
+atexit.register(shutil.rmtree, SCRATCH_DIR, ignore_errors=True)
+
+os.environ["RIFT_DATABASE_URL"] = "sqlite:///" + os.path.join(SCRATCH_DIR, "rift.db")
+for variable, name in (
+    ("RIFT_GRAPH_INDEX_DIR", "graph_index"),
+    ("RIFT_RESULT_CACHE_DIR", "cache"),
+    ("RIFT_HISTORY_DIR", "history"),
+    ("RIFT_JOBS_DIR", "jobs"),
+    ("RIFT_INCREMENTAL_DIR", "incremental")
+):
+    os.environ[variable] = os.path.join(SCRATCH_DIR, name)
+
+# Flags from one test's analysis would boost scores in the next
+os.environ["RIFT_KNOWN_FRAUD"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+
+    from app.core.database import Base, engine
+    from app.models import db_models  # noqa: F401  (registers the tables)
+    from app.db import model  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+
+    yield engine
+
+    from app.core.persistence import flush_writes
+    flush_writes()
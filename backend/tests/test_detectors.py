@@ -0,0 +1,173 @@
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from app.core.cycle_detector import cycles_through_edge, detect_cycles
+from app.core.graph_builder import build_graph
+from app.core.smurf_detector import detect_smurfing
+from benchmarks.generator import generate_transactions
+
+
+WINDOW_SECONDS = 72 * 3600
+
+
+def _random_tx(n_rows, n_accounts, seed, days=10):
+
+    rng = np.random.default_rng(seed)
+
+    return pd.DataFrame({
+        "src": rng.integers(0, n_accounts, n_rows).astype(np.int32),
+        "dst": rng.integers(0, n_accounts, n_rows).astype(np.int32),
+        "amount": rng.uniform(10, 1000, n_rows),
+        "timestamp": pd.Timestamp("2024-01-01") + pd.to_timedelta(
+            rng.integers(0, days * 86400, n_rows), unit="s"
+        )
+    })
+
+
+def _canonical(cycle):
+    i = cycle.index(min(cycle))
+    return tuple(cycle[i:] + cycle[:i])
+
+
+# -----------------------------
+# Cycles
+# -----------------------------
+def test_cycles_match_networkx():
+
+    tx = _random_tx(600, 150, seed=1)
+    graph = build_graph(tx, n_nodes=150)
+
+    rings, truncated = detect_cycles(graph)
+    found = [_canonical([int(m) for m in r["members"]]) for r in rings]
+
+    reference = nx.DiGraph()
+    reference.add_edges_from(zip(tx["src"].tolist(), tx["dst"].tolist()))
+    expected = {
+        _canonical(c) for c in nx.simple_cycles(reference, length_bound=5) if len(c) >= 3
+    }
+
+    assert truncated == 0
+    assert len(found) == len(set(found))
+    assert set(found) == expected
+    assert expected
+
+
+def test_cycle_cap_is_reported():
+
+    # Every ordered pair of 8 accounts: one SCC with thousands of 3-5 cycles
+    pairs = [(a, b) for a in range(8) for b in range(8) if a != b]
+    tx = pd.DataFrame({
+        "src": np.array([a for a, _ in pairs], dtype=np.int32),
+        "dst": np.array([b for _, b in pairs], dtype=np.int32),
+        "amount": 100.0,
+        "timestamp": pd.Timestamp("2024-01-01")
+    })
+    graph = build_graph(tx, n_nodes=8)
+
+    rings, truncated = detect_cycles(graph, max_cycles_per_scc=10)
+
+    assert truncated == 1
+    assert len(rings) == 10
+    assert detect_cycles(graph)[1] == 0
+
+
+def test_edge_search_cap_is_reported():
+
+    nodes = range(8)
+    succ = {a: {b for b in nodes if b != a} for a in nodes}
+    pred = {a: {b for b in nodes if b != a} for a in nodes}
+
+    cycles, complete = cycles_through_edge(succ, pred, 0, 1, max_cycles=10)
+    assert not complete
+    assert len(cycles) == 10
+
+    cycles, complete = cycles_through_edge(succ, pred, 0, 1)
+    assert complete
+    assert all(c[0] == 0 and 1 in c for c in cycles)
+
+
+# -----------------------------
+# Smurfing
+# -----------------------------
+def _brute_force_smurfing(tx, threshold=10, fragmentation_ratio=0.6, min_aggregation=5):
+    """Every account and direction, every window end, no pruning."""
+
+    src = tx["src"].to_numpy()
+    dst = tx["dst"].to_numpy()
+    amount = tx["amount"].to_numpy()
+    seconds = tx["timestamp"].to_numpy().astype("datetime64[s]").astype(np.int64)
+
+    rings = set()
+
+    for account in np.unique(np.concatenate([src, dst])).tolist():
+
+        sent, got = src == account, dst == account
+        avg_in = amount[got].mean() if got.any() else 0.0
+        avg_out = amount[sent].mean() if sent.any() else 0.0
+        fragmented = avg_in <= avg_out * fragmentation_ratio
+
+        for pattern, rows, peers, eligible in (
+            ("smurfing_fan_out", sent, dst, fragmented and got.sum() >= min_aggregation),
+            ("smurfing_fan_in", got, src, fragmented and sent.sum() >= 1)
+        ):
+            if not eligible:
+                continue
+
+            order = np.flatnonzero(rows)[np.argsort(seconds[rows], kind="stable")]
+            t, cp = seconds[order], peers[order]
+
+            for right in range(len(t)):
+                left = int(np.searchsorted(t, t[right] - WINDOW_SECONDS, side="left"))
+                if len(set(cp[left:right + 1].tolist())) >= threshold:
+                    burst = cp[left:][t[left:] - t[left] <= WINDOW_SECONDS]
+                    rings.add((pattern, account, frozenset(burst.tolist())))
+                    break
+
+    return rings
+
+
+def _rings(found):
+    return {
+        (r["pattern_type"], int(r["members"][0]), frozenset(int(m) for m in r["members"][1:]))
+        for r in found
+    }
+
+
+def test_smurfing_matches_brute_force_window():
+
+    df = generate_transactions(4000, seed=5)
+    accounts, codes = np.unique(
+        np.concatenate([df["sender_id"].to_numpy(), df["receiver_id"].to_numpy()]),
+        return_inverse=True
+    )
+
+    tx = pd.DataFrame({
+        "src": codes[:len(df)].astype(np.int32),
+        "dst": codes[len(df):].astype(np.int32),
+        "amount": df["amount"].to_numpy(),
+        "timestamp": pd.to_datetime(df["timestamp"]).to_numpy()
+    })
+
+    expected = _brute_force_smurfing(tx)
+
+    assert expected
+    assert _rings(detect_smurfing(tx)) == expected
+
+
+def test_smurfing_ignores_spread_out_deposits():
+
+    start = pd.Timestamp("2024-01-01")
+    rows = []
+
+    # Twelve senders, but never ten inside one 72h window
+    for i in range(12):
+        rows.append((100 + i, 0, 50.0, start + pd.Timedelta(hours=10 * i)))
+    for i in range(12):
+        rows.append((0, 200 + i, 900.0, start + pd.Timedelta(hours=10 * (20 + i))))
+
+    tx = pd.DataFrame(rows, columns=["src", "dst", "amount", "timestamp"])
+    tx[["src", "dst"]] = tx[["src", "dst"]].astype(np.int32)
+
+    assert detect_smurfing(tx) == []
+    assert _brute_force_smurfing(tx) == set()
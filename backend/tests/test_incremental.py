@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+from app.core.incremental import AnalysisState
+
+
+def _transactions(n_rows, n_accounts, seed):
+    """Random transfers with planted fan-in/fan-out hubs and short cycles."""
+
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2024-01-01")
+
+    rows = [
+        (f"A{s}", f"A{d}", float(rng.uniform(100, 1000)), start + pd.Timedelta(seconds=int(t)))
+        for s, d, t in zip(
+            rng.integers(0, n_accounts, n_rows),
+            rng.integers(0, n_accounts, n_rows),
+            rng.integers(0, 20 * 86400, n_rows)
+        )
+    ]
+
+    for hub in range(12):
+        base = start + pd.Timedelta(days=int(rng.integers(0, 18)))
+        # Small deposits in from many senders, larger transfers out; every
+        # third hub spreads them too thinly for any 72h window to trip
+        spacing = 10 if hub % 3 == 0 else 1
+        for i in range(12):
+            rows.append((f"M{hub}_{i}", f"H{hub}", 50.0, base + pd.Timedelta(hours=spacing * i)))
+        for i in range(12):
+            rows.append((f"H{hub}", f"O{hub}_{i}", 900.0, base + pd.Timedelta(hours=spacing * (20 + i))))
+
+    for ring in range(6):
+        members = [f"C{ring}_{i}" for i in range(3 + ring % 3)]
+        for a, b in zip(members, members[1:] + members[:1]):
+            rows.append((a, b, 500.0, start + pd.Timedelta(days=ring)))
+
+    df = pd.DataFrame(rows, columns=["sender_id", "receiver_id", "amount", "timestamp"])
+    df = df.sample(frac=1, random_state=seed).reset_index(drop=True)
+    df.insert(0, "transaction_id", [f"T{i}" for i in range(len(df))])
+
+    return df
+
+
+def _rings(state):
+    return sorted(
+        (r["pattern_type"], tuple(sorted(r["member_accounts"])))
+        for r in state.ring_views()
+    )
+
+
+# The random feeds span 20 days in shuffled order; accept all of it as late
+WHOLE_FEED = 24 * 30
+
+
+def test_incremental_appends_match_a_full_analysis():
+
+    df = _transactions(3000, 600, seed=7)
+
+    incremental = AnalysisState(lateness_hours=WHOLE_FEED)
+    incremental.append(df.iloc[:500])
+
+    # Small, time-shuffled batches stay on the incremental path
+    for start in range(500, len(df), 50):
+        incremental.append(df.iloc[start:start + 50])
+
+    scratch = AnalysisState(lateness_hours=WHOLE_FEED)
+    scratch.append(df)
+
+    assert incremental.src.size == len(df)
+    assert any(p.startswith("smurfing") for p, _ in _rings(scratch))
+    assert _rings(incremental) == _rings(scratch)
+
+
+def test_overlapping_batches_are_deduplicated():
+
+    df = _transactions(500, 100, seed=3)
+
+    state = AnalysisState(lateness_hours=WHOLE_FEED)
+    state.append(df.iloc[:300])
+    result = state.append(df.iloc[200:])
+
+    assert result["summary"]["duplicates_skipped"] == 100
+    assert state.src.size == len(df)
+
+
+def test_time_ordered_feed_prunes_what_left_the_window():
+
+    df = _transactions(3000, 600, seed=11).sort_values("timestamp", kind="stable")
+    df = df.reset_index(drop=True)
+
+    incremental = AnalysisState(lateness_hours=24)
+    for start in range(0, len(df), 50):
+        incremental.append(df.iloc[start:start + 50])
+
+    scratch = AnalysisState(lateness_hours=WHOLE_FEED)
+    scratch.append(df)
+
+    assert _rings(incremental) == _rings(scratch)
+
+    # Only about the last two days of ids and window events are kept
+    retained = sum(
+        len(w.events) for windows in (incremental.fan_out, incremental.fan_in)
+        for w in windows.values()
+    )
+    assert len(incremental.seen_tx) < len(df) / 4
+    assert retained < len(df) / 2
+
+    # A replayed id from the first day is now too late to check, so skipped
+    result = incremental.append(df.iloc[:10])
+    assert result["summary"]["late_skipped"] == 10
+    assert result["summary"]["transactions_appended"] == 0
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from app.core.ingest import read_upload
+from app.core.interning import intern_accounts
+from app.core.worker_pool import UnreadableUpload, _analyze_in_worker
+
+
+ROWS = [
+    ("T1", "A", "B", 10.0, "2024-01-01 00:00:00"),
+    ("T2", None, "C", 10.0, "2024-01-01 01:00:00"),
+    ("T3", "B", "C", 10.0, "2024-01-01 02:00:00"),
+    ("T4", "C", "A", 10.0, "2024-01-01 03:00:00")
+]
+
+COLUMNS = ["transaction_id", "sender_id", "receiver_id", "amount", "timestamp"]
+
+
+@pytest.fixture
+def blank_sender(tmp_path):
+    path = tmp_path / "blank.csv"
+    pd.DataFrame(ROWS, columns=COLUMNS).to_csv(path, index=False)
+    return str(path)
+
+
+def test_blank_account_ids_are_rejected(blank_sender):
+
+    with pytest.raises(ValueError, match="no sender_id or receiver_id"):
+        read_upload(blank_sender)
+
+    # /analyze answers UnreadableUpload with a 400
+    with pytest.raises(UnreadableUpload):
+        _analyze_in_worker(blank_sender, "blank.csv", 0)
+
+
+def test_blank_account_ids_are_rejected_in_parquet(tmp_path):
+
+    pytest.importorskip("pyarrow")
+
+    path = str(tmp_path / "blank.parquet")
+    pd.DataFrame(ROWS, columns=COLUMNS).to_parquet(path)
+
+    with pytest.raises(ValueError, match="no sender_id or receiver_id"):
+        read_upload(path)
+
+
+def test_interning_refuses_missing_ids():
+
+    df = pd.DataFrame(ROWS, columns=COLUMNS)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+
+    with pytest.raises(ValueError):
+        intern_accounts(df)
@@ -0,0 +1,71 @@
+import math
+import os
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import jobs as jobs_api
+from app.core import jobs
+from app.core.worker_pool import AdmissionController, stop_pool
+from benchmarks.generator import generate_transactions
+
+
+@pytest.fixture
+def client(monkeypatch):
+
+    monkeypatch.setattr(jobs_api, "get_cache", lambda: None)
+
+    app = FastAPI()
+    app.include_router(jobs_api.router)
+
+    yield TestClient(app)
+
+    stop_pool()
+
+
+def _upload(client, tmp_path):
+
+    path = tmp_path / "job.csv"
+    generate_transactions(1000, seed=3).to_csv(path, index=False)
+
+    with open(path, "rb") as f:
+        return client.post("/jobs", files={"file": ("job.csv", f, "text/csv")})
+
+
+def _spooled():
+    return {name for name in os.listdir(jobs.jobs_dir()) if name.startswith("rift_upload_")}
+
+
+def test_full_queue_is_rejected(client, monkeypatch, tmp_path):
+
+    admission = AdmissionController("jobs", 1, 0, math.inf, math.inf)
+    admission.admit(0)
+    monkeypatch.setattr(jobs, "_admission", admission)
+
+    before = _spooled()
+    response = _upload(client, tmp_path)
+
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    assert _spooled() == before
+
+
+def test_finished_jobs_free_their_slot(client, monkeypatch, tmp_path):
+
+    admission = AdmissionController("jobs", 1, 0, math.inf, math.inf)
+    monkeypatch.setattr(jobs, "_admission", admission)
+
+    response = _upload(client, tmp_path)
+    assert response.status_code == 202
+
+    job_id = response.json()["job_id"]
+    deadline = time.monotonic() + 120
+
+    while client.get(f"/jobs/{job_id}").json()["status"] in ("queued", "running"):
+        assert time.monotonic() < deadline
+        time.sleep(0.2)
+
+    assert client.get(f"/jobs/{job_id}").json()["status"] == "succeeded"
+    assert admission.admitted == 0
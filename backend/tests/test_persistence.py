@@ -0,0 +1,111 @@
+import pytest
+
+from app.core import fraud_index, orchestrator, persistence
+from app.core.database import SessionLocal
+from app.core.orchestrator import run_analysis
+from app.core.persistence import flush_writes
+from app.db.model import FraudRing, SuspiciousAccount
+from app.models.db_models import FraudAccount
+from app.repositories.upload_repo import count_rows, get_upload
+from benchmarks.generator import generate_transactions
+
+
+@pytest.fixture
+def transactions():
+    return generate_transactions(2000, seed=21)
+
+
+def _stored(upload_id):
+
+    db = SessionLocal()
+    try:
+        return (
+            get_upload(db, upload_id).status,
+            count_rows(db, FraudRing, upload_id),
+            count_rows(db, SuspiciousAccount, upload_id)
+        )
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("write_behind", [False, True])
+def test_analysis_is_persisted(monkeypatch, transactions, write_behind):
+
+    monkeypatch.setattr(persistence, "WRITE_BEHIND", write_behind)
+    monkeypatch.setattr(orchestrator, "WRITE_BEHIND", write_behind)
+
+    results = run_analysis(transactions, filename="persist.csv")
+    summary = results["summary"]
+
+    assert summary["persistence"] == ("pending" if write_behind else "completed")
+
+    flush_writes()
+
+    status, rings, accounts = _stored(summary["upload_id"])
+
+    assert status == "completed"
+    assert rings == summary["fraud_rings_detected"]
+    assert accounts == summary["suspicious_accounts_flagged"]
+
+
+def _times_flagged(account_ids):
+
+    db = SessionLocal()
+    try:
+        return dict(
+            db.query(FraudAccount.account_id, FraudAccount.total_times_flagged)
+            .filter(FraudAccount.account_id.in_(account_ids))
+        )
+    finally:
+        db.close()
+
+
+def _known_fraud(monkeypatch):
+
+    monkeypatch.setattr(persistence, "WRITE_BEHIND", False)
+    monkeypatch.setattr(orchestrator, "WRITE_BEHIND", False)
+    monkeypatch.setattr(fraud_index, "KNOWN_FRAUD_ENABLED", True)
+
+
+def _prior(results):
+    return {a["account_id"]: a["prior_flags"] for a in results["suspicious_accounts"]}
+
+
+def test_reanalysis_counts_flags_once(monkeypatch):
+
+    _known_fraud(monkeypatch)
+
+    df = generate_transactions(2000, seed=33)
+
+    first = run_analysis(df.copy(), filename="first.csv")
+    flagged = _times_flagged([a["account_id"] for a in first["suspicious_accounts"]])
+
+    # A restarted process only knows the first run's flags from the table
+    monkeypatch.setattr(fraud_index, "_index", fraud_index.KnownFraudIndex())
+
+    # Same transactions in another order, as a history replay would see them
+    again = run_analysis(df.sample(frac=1, random_state=1), filename="again.csv")
+
+    assert _times_flagged(list(flagged)) == flagged
+
+    # Neither run counts this dataset's own flags as history
+    assert _prior(again) == _prior(first)
+
+
+def test_reanalysis_does_not_boost_itself(monkeypatch):
+
+    _known_fraud(monkeypatch)
+
+    df = generate_transactions(3000, seed=7)
+
+    first = run_analysis(df.copy(), filename="first.csv")
+    again = run_analysis(df.copy(), filename="again.csv")
+
+    assert again["suspicious_accounts"] == first["suspicious_accounts"]
+
+    # Another dataset over the same accounts does see the first one's flags
+    flagged = _times_flagged([a["account_id"] for a in first["suspicious_accounts"]])
+    other = _prior(run_analysis(df.iloc[:2000].copy(), filename="other.csv"))
+
+    assert other.keys() & flagged.keys()
+    assert {a: other[a] for a in flagged if a in other} == {a: flagged[a] for a in flagged if a in other}
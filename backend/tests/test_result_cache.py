@@ -0,0 +1,35 @@
+from app.core import fraud_index, orchestrator, persistence, result_cache
+from app.core.database import SessionLocal
+from app.core.orchestrator import run_analysis
+from app.core.result_cache import ResultCache
+from app.repositories.fraud_account_repo import upsert_fraud_accounts
+from benchmarks.generator import generate_transactions
+
+
+def test_known_fraud_history_keeps_entries_valid(monkeypatch, tmp_path):
+
+    monkeypatch.setattr(persistence, "WRITE_BEHIND", False)
+    monkeypatch.setattr(orchestrator, "WRITE_BEHIND", False)
+    monkeypatch.setattr(fraud_index, "KNOWN_FRAUD_ENABLED", True)
+
+    cache = ResultCache(str(tmp_path), memory_entries=0, max_bytes=1 << 30)
+
+    key = result_cache.cache_key(result_cache.upload_digest())
+    results = run_analysis(generate_transactions(3000, seed=7), filename="first.csv")
+
+    cache.put(key, results)
+
+    # The analysis's own flags don't make its entry stale
+    assert result_cache.cache_key(result_cache.upload_digest()) == key
+    assert cache.get(key) == results
+
+    # Another dataset flagging one of the listed accounts does
+    db = SessionLocal()
+    try:
+        upsert_fraud_accounts(db, results["suspicious_accounts"][:1], upload_key="another-dataset")
+        db.commit()
+    finally:
+        db.close()
+
+    assert cache.get(key) is None
+    assert cache.info()["disk_hits"] == 1
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.streaming import router
+from app.core import streaming
+
+
+@pytest.fixture
+def client(monkeypatch):
+
+    monkeypatch.setattr(streaming, "_monitors", {})
+    monkeypatch.setattr(streaming, "STREAM_MAX_MONITORS", 2)
+
+    app = FastAPI()
+    app.include_router(router)
+
+    return TestClient(app)
+
+
+def _send(client, name, events):
+
+    body = "\n".join(json.dumps(e) for e in events)
+    response = client.post(f"/stream/{name}/events", content=body)
+
+    return response.status_code, [json.loads(line) for line in response.text.splitlines()]
+
+
+def _fan_out(n):
+    """Small deposits in, then one larger transfer out to each of n peers."""
+
+    events = [
+        {"sender_id": f"M{i}", "receiver_id": "H", "amount": 50, "timestamp": 3600 * i}
+        for i in range(6)
+    ]
+    events += [
+        {"sender_id": "H", "receiver_id": f"O{i}", "amount": 900, "timestamp": 36000 + 60 * i}
+        for i in range(n)
+    ]
+    return events
+
+
+def test_events_alert_and_report_stats(client):
+
+    status, lines = _send(client, "feed", _fan_out(10) + ["not an event"])
+
+    assert status == 200
+    assert [line["alert"] for line in lines if "alert" in line] == ["smurfing_fan_out"]
+    assert lines[-2]["line"] == 17
+    assert lines[-1]["stats"]["events"] == 16
+
+
+def test_streams_can_be_deleted(client):
+
+    _send(client, "a", _fan_out(3))
+    _send(client, "b", _fan_out(3))
+
+    assert _send(client, "c", _fan_out(3))[0] == 429
+
+    deleted = client.delete("/stream/a")
+    assert deleted.status_code == 200
+    assert deleted.json()["events"] == 9
+
+    assert client.delete("/stream/a").status_code == 404
+    assert client.get("/stream/a/stats").status_code == 404
+    assert _send(client, "c", _fan_out(3))[0] == 200
+
+
+def test_idle_streams_expire(client, monkeypatch):
+
+    _send(client, "a", _fan_out(3))
+    _send(client, "b", _fan_out(3))
+
+    monkeypatch.setattr(streaming, "STREAM_IDLE_SECONDS", 0)
+
+    assert _send(client, "c", _fan_out(3))[0] == 200
+    assert client.get("/stream/a/stats").status_code == 404
+
+
+def test_connected_streams_are_kept(monkeypatch):
+
+    monkeypatch.setattr(streaming, "_monitors", {})
+    monkeypatch.setattr(streaming, "STREAM_IDLE_SECONDS", 0)
+
+    monitor = streaming.get_monitor("live")
+
+    with monitor.connected():
+        assert streaming.get_monitor("live", create=False) is monitor
+        with pytest.raises(streaming.StreamInUse):
+            streaming.remove_monitor("live")
+
+    assert streaming.get_monitor("live", create=False) is None